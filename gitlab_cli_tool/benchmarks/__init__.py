@@ -0,0 +1,3 @@
+"""
+Benchmarks, run as modules, e.g. python -m gitlab_cli_tool.benchmarks.decode
+"""
@@ -0,0 +1,253 @@
+"""
+Latency of CLI commands run end to end against a local mock Gitlab,
+split into phases (startup, import, secrets, http, filter, render, other):
+    python -m gitlab_cli_tool.benchmarks.cli --runners 500 --repeat 5 --output before.json
+    python -m gitlab_cli_tool.benchmarks.cli --runners 500 --repeat 5 --compare before.json
+Paths:
+    oneshot - new process per command, like 'python -m gitlab_cli_tool.gitlab_cli ...',
+              with empty cache and cold imports
+    repl    - all commands typed into one session of gitlab_cli_tool.run,
+              credentials, connections and imports are reused
+"""
+import argparse
+import builtins
+import contextlib
+import io
+import json
+import os
+import shlex
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+from unittest import mock
+
+from tabulate import tabulate
+
+from gitlab_cli_tool.benchmarks.mock_gitlab import MockGitlab
+from gitlab_cli_tool.timings import timer, IMPORT, SECRETS, HTTP, FILTER, RENDER
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+PATHS = ("oneshot", "repl")
+COMMANDS = {
+    "list": ["runners", "list"],
+    "name": ["runners", "list", "--name", "qa-01"],
+    "tag": ["runners", "list", "--tag", "atf"],
+    "ignore": ["runners", "list", "--ignore", "tag", "ios13"],
+    "pause": ["runners", "pause", "--name", "qa-02"],
+    "retag": ["runners", "retag", "pool-1:pool-one", "--name", "qa-03"],
+}
+MEASURED_PHASES = (IMPORT, SECRETS, HTTP, FILTER, RENDER)
+PHASES = ("startup",) + MEASURED_PHASES + ("other", "total")
+
+
+@contextlib.contextmanager
+def gitlab_home(server: MockGitlab):
+    """
+    Temporary HOME with secrets of the mock server and no cache of runners
+    """
+    with tempfile.TemporaryDirectory() as home:
+        os.makedirs(os.path.join(home, ".gitlab-cli"))
+        with open(os.path.join(home, ".gitlab-cli", "secrets.txt"), "w") as f:
+            f.write(server.secrets())
+        yield home
+
+
+def breakdown(
+    phases: Dict[str, float], command: float, total: float
+) -> Dict[str, float]:
+    """
+    :param phases: seconds per phase measured by timer
+    :param command: seconds from start to end of the command
+    :param total: seconds seen by the user, command plus process startup
+    :return: seconds per phase of PHASES, time not covered by any phase is 'other'
+    """
+    result = {phase: phases.get(phase, 0.0) for phase in MEASURED_PHASES}
+    result["startup"] = total - command
+    result["other"] = command - sum(result[phase] for phase in MEASURED_PHASES)
+    result["total"] = total
+    return result
+
+
+def run_oneshot(server: MockGitlab, args: List[str]) -> Dict[str, float]:
+    with gitlab_home(server) as home:
+        start = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, "-m", "gitlab_cli_tool.benchmarks.oneshot"] + args,
+            input="Y\n",
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+            env=dict(os.environ, HOME=home),
+            cwd=PROJECT_DIR,
+        )
+        total = time.perf_counter() - start
+    if completed.returncode:
+        raise RuntimeError(f"Command {args} failed: {completed.stderr}")
+    phases = json.loads(completed.stdout.splitlines()[-1])
+    return breakdown(phases, phases.pop("command"), total)
+
+
+def run_repl(server: MockGitlab, commands: List[List[str]]) -> List[Dict[str, float]]:
+    """
+    Commands are fed to the prompt of REPL one after another,
+    each is timed from returning its line to the next prompt
+    """
+    from gitlab_cli_tool import run
+
+    lines = iter([" ".join(map(shlex.quote, args)) for args in commands])
+    results = []
+    started: Optional[float] = None
+
+    def prompt(*args, **kwargs):
+        nonlocal started
+        finished = time.perf_counter()
+        phases = timer.reset()
+        if started is not None:
+            results.append(breakdown(phases, finished - started, finished - started))
+        line = next(lines, None)
+        if line is None:
+            raise EOFError
+        started = time.perf_counter()
+        return line
+
+    with gitlab_home(server) as home, mock.patch.dict(os.environ, {"HOME": home}):
+        with mock.patch.object(run, "prompt", prompt), mock.patch.object(
+            builtins, "input", return_value="Y"
+        ), contextlib.redirect_stdout(io.StringIO()):
+            run.main()
+    return results
+
+
+def median(samples: List[Dict[str, float]]) -> Dict[str, float]:
+    return {
+        phase: statistics.median(sample[phase] for sample in samples)
+        for phase in PHASES
+    }
+
+
+def run(
+    paths: List[str], commands: List[str], runners_count: int, repeat: int
+) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """
+    :return: path -> command -> median seconds per phase
+    """
+    samples = {path: {command: [] for command in commands} for path in paths}
+    with MockGitlab(runners_count) as server:
+        for _ in range(repeat):
+            if "oneshot" in paths:
+                for command in commands:
+                    samples["oneshot"][command].append(
+                        run_oneshot(server, COMMANDS[command])
+                    )
+            if "repl" in paths:
+                session = run_repl(server, [COMMANDS[command] for command in commands])
+                for command, result in zip(commands, session):
+                    samples["repl"][command].append(result)
+    return {
+        path: {
+            command: median(results) for command, results in commands_samples.items()
+        }
+        for path, commands_samples in samples.items()
+    }
+
+
+def git_commit() -> str:
+    try:
+        commit = subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PROJECT_DIR,
+            stderr=subprocess.DEVNULL,
+            universal_newlines=True,
+        ).strip()
+        dirty = subprocess.call(
+            ["git", "diff", "--quiet", "HEAD", "--", "gitlab_cli_tool"], cwd=PROJECT_DIR
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{commit}-dirty" if dirty else commit
+
+
+def phases_table(results: Dict[str, Dict[str, Dict[str, float]]]) -> str:
+    return tabulate(
+        [
+            [path, command] + [round(phases[phase] * 1000, 1) for phase in PHASES]
+            for path, commands in results.items()
+            for command, phases in commands.items()
+        ],
+        ["PATH", "COMMAND"] + [f"{phase.upper()} MS" for phase in PHASES],
+    )
+
+
+def compare_table(
+    baseline: Dict[str, Dict[str, Dict[str, float]]],
+    results: Dict[str, Dict[str, Dict[str, float]]],
+) -> str:
+    rows = []
+    for path, commands in results.items():
+        for command, phases in commands.items():
+            before = baseline.get(path, {}).get(command)
+            if before is None:
+                continue
+            rows.append(
+                [
+                    path,
+                    command,
+                    round(before["total"] * 1000, 1),
+                    round(phases["total"] * 1000, 1),
+                    f"{(phases['total'] / before['total'] - 1) * 100:+.1f}%",
+                ]
+                + [
+                    f"{(phases[phase] - before[phase]) * 1000:+.1f}"
+                    for phase in PHASES[:-1]
+                ]
+            )
+    return tabulate(
+        rows,
+        ["PATH", "COMMAND", "BASELINE MS", "CURRENT MS", "CHANGE"]
+        + [f"{phase.upper()} +/- MS" for phase in PHASES[:-1]],
+    )
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--paths", nargs="+", choices=PATHS, default=list(PATHS))
+    parser.add_argument(
+        "--commands", nargs="+", choices=list(COMMANDS), default=list(COMMANDS)
+    )
+    parser.add_argument(
+        "--runners", type=int, default=100, help="Runners of mock Gitlab"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Median of that many runs"
+    )
+    parser.add_argument("--output", help="Save results as JSON, e.g. to compare later")
+    parser.add_argument("--compare", help="JSON saved by --output of other commit")
+    parsed_args = parser.parse_args(args)
+
+    results = run(
+        parsed_args.paths, parsed_args.commands, parsed_args.runners, parsed_args.repeat
+    )
+    commit = git_commit()
+    print(
+        f"commit {commit}, {parsed_args.runners} runners, median of {parsed_args.repeat}"
+    )
+    print(phases_table(results))
+    if parsed_args.compare:
+        with open(parsed_args.compare) as f:
+            baseline = json.load(f)
+        print(f"\ncompared with commit {baseline['commit']}")
+        print(compare_table(baseline["results"], results))
+    if parsed_args.output:
+        with open(parsed_args.output, "w") as f:
+            json.dump(
+                {"commit": commit, "runners": parsed_args.runners, "results": results},
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
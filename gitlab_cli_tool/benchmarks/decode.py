@@ -0,0 +1,123 @@
+"""
+Decode time and transfer size of 100-item pages in the shape Gitlab returns them
+(data/runners_page.json, data/jobs_page.json):
+    python -m gitlab_cli_tool.benchmarks.decode --repeat 200
+"""
+import argparse
+import gzip
+import json
+import os
+import time
+import zlib
+from typing import Callable, Dict, List
+
+from tabulate import tabulate
+
+from gitlab_cli_tool import decoding
+from gitlab_cli_tool.models import runner_from_json
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+PAGES = ("runners_page.json", "jobs_page.json")
+
+
+def load_page(name: str) -> bytes:
+    with open(os.path.join(DATA_DIR, name), "rb") as f:
+        return f.read()
+
+
+def available_backends() -> List[str]:
+    backends = ["json"]
+    if decoding.orjson is not None:
+        backends.append("orjson")
+    return backends
+
+
+def time_decode(decode: Callable[[bytes], List], data: bytes, repeat: int) -> float:
+    """
+    :return: best of 5 rounds, mean seconds per page
+    """
+    rounds = []
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            decode(data)
+        rounds.append((time.perf_counter() - start) / repeat)
+    return min(rounds)
+
+
+def compressed_sizes(data: bytes) -> Dict[str, int]:
+    sizes = {
+        "identity": len(data),
+        "gzip": len(gzip.compress(data)),
+        "deflate": len(zlib.compress(data)),
+    }
+    if decoding.BROTLI:
+        try:
+            import brotli
+        except ImportError:
+            import brotlicffi as brotli
+        sizes["br"] = len(brotli.compress(data))
+    return sizes
+
+
+def decoders(page: str, backend: str) -> Dict[str, Callable[[bytes], List]]:
+    if page == "runners_page.json":
+        return {
+            # what requests Response.json() and Runner(**dict) did before
+            "dicts then Runner": lambda data: [
+                runner_from_json(runner) for runner in json.loads(data)
+            ],
+            "decode_runners": lambda data: decoding.decode_runners(data, backend),
+        }
+    return {
+        "dicts then runner ids": lambda data: [
+            job["runner"]["id"] for job in json.loads(data)
+        ],
+        "decode_job_runner_ids": lambda data: decoding.decode_job_runner_ids(
+            data, backend
+        ),
+    }
+
+
+def run(repeat: int) -> List[List]:
+    """
+    :return: rows of page, backend, decoder, microseconds per page
+    """
+    rows = []
+    for page in PAGES:
+        data = load_page(page)
+        for backend in available_backends():
+            for name, decode in decoders(page, backend).items():
+                if backend != "json" and name.startswith("dicts"):
+                    continue
+                elapsed = time_decode(decode, data, repeat)
+                rows.append([page, backend, name, round(elapsed * 1e6, 1)])
+    return rows
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=200, help="Decodes per round")
+    parsed_args = parser.parse_args(args)
+    print(
+        tabulate(
+            run(parsed_args.repeat),
+            ["PAGE", "BACKEND", "DECODER", "US PER PAGE"],
+        )
+    )
+    print()
+    print(
+        tabulate(
+            [
+                [page, encoding, size]
+                for page in PAGES
+                for encoding, size in compressed_sizes(load_page(page)).items()
+            ],
+            ["PAGE", "ENCODING", "BYTES"],
+        )
+    )
+    print(f"\nAccept-Encoding: {decoding.ACCEPT_ENCODING}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Load test of GitLabDataFilter against a mock Gitlab with a simulated fleet,
+records requests sent to Gitlab and wall time of every scenario:
+    python -m gitlab_cli_tool.benchmarks.load --fleets 50 500 5000 --latency 0.005
+    python -m gitlab_cli_tool.benchmarks.load --fleets 500 --error-rate 0.01 --rate-limit 600
+"""
+import argparse
+import builtins
+import contextlib
+import io
+import os
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from unittest import mock
+
+from tabulate import tabulate
+
+from gitlab_cli_tool.benchmarks.cli import gitlab_home
+from gitlab_cli_tool.benchmarks.mock_gitlab import MockGitlab, PROJECT_ID
+
+FLEETS = (50, 500, 5000)
+# name, kwargs of GitLabDataFilter, run in this order on the same fleet
+SCENARIOS = (
+    ("list cold", {"action": ["list"]}),
+    ("list warm", {"action": ["list"]}),
+    ("list --tag", {"action": ["list"], "tags": ["atf"]}),
+    ("pause", {"action": ["pause"], "names": ["qa-0"]}),
+    ("resume", {"action": ["resume"], "names": ["qa-0"]}),
+    ("retag", {"action": ["retag", "pool-1:pool-one"], "names": ["qa-0"]}),
+)
+
+
+@dataclass
+class ScenarioResult:
+    fleet: int
+    scenario: str
+    seconds: float
+    requests: Counter
+    statuses: Counter
+    error: Optional[str] = None
+
+    @property
+    def requests_count(self) -> int:
+        return sum(self.requests.values())
+
+
+def make_filter(server: MockGitlab, api, kwargs: Dict):
+    """
+    :param api: GitlabAPI shared by scenarios, like in REPL, None for the first one
+    """
+    from gitlab_cli_tool.cli_api import GitLabDataFilter
+
+    return GitLabDataFilter(
+        property_name="runners",
+        secrets={
+            "SERVER": server.url,
+            "TOKEN": server.token,
+            "TRIGGER_TOKEN": "trigger_token",
+            "PROJECT_ID": str(PROJECT_ID),
+        },
+        api=api,
+        **kwargs,
+    )
+
+
+def run_fleet(fleet: int, **server_kwargs) -> List[ScenarioResult]:
+    """
+    Scenarios are run one after another on a new fleet with empty cache of runners,
+    a failing scenario is recorded and the next ones still run
+    """
+    results = []
+    api = None
+    with MockGitlab(fleet, **server_kwargs) as server, gitlab_home(
+        server
+    ) as home, mock.patch.dict(os.environ, {"HOME": home}), mock.patch.object(
+        builtins, "input", return_value="Y"
+    ):
+        try:
+            for scenario, kwargs in SCENARIOS:
+                requests_before = Counter(server.requests)
+                statuses_before = Counter(server.statuses)
+                error = None
+                start = time.perf_counter()
+                try:
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        data_filter = make_filter(server, api, kwargs)
+                        api = data_filter.api
+                        data_filter.get_filtered_data()
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"
+                seconds = time.perf_counter() - start
+                results.append(
+                    ScenarioResult(
+                        fleet,
+                        scenario,
+                        seconds,
+                        server.requests - requests_before,
+                        server.statuses - statuses_before,
+                        error,
+                    )
+                )
+        finally:
+            if api is not None:
+                api.close()
+    return results
+
+
+def run(fleets: List[int], **server_kwargs) -> List[ScenarioResult]:
+    return [result for fleet in fleets for result in run_fleet(fleet, **server_kwargs)]
+
+
+def results_table(results: List[ScenarioResult]) -> str:
+    return tabulate(
+        [
+            [
+                result.fleet,
+                result.scenario,
+                round(result.seconds * 1000, 1),
+                result.requests_count,
+                ", ".join(
+                    f"{status}: {count}"
+                    for status, count in sorted(result.statuses.items())
+                ),
+                result.error or "",
+            ]
+            for result in results
+        ],
+        ["RUNNERS", "SCENARIO", "WALL MS", "REQUESTS", "STATUSES", "ERROR"],
+    )
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fleets", type=int, nargs="+", default=list(FLEETS))
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Seconds added to every response"
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="Part of requests failing with 502",
+    )
+    parser.add_argument(
+        "--rate-limit", type=int, help="Requests per second allowed, then 429"
+    )
+    parsed_args = parser.parse_args(args)
+    results = run(
+        parsed_args.fleets,
+        latency=parsed_args.latency,
+        error_rate=parsed_args.error_rate,
+        rate_limit=parsed_args.rate_limit,
+    )
+    print(results_table(results))
+
+
+if __name__ == "__main__":
+    main()
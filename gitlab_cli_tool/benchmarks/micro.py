@@ -0,0 +1,247 @@
+"""
+Micro-benchmarks of hot functions (filtering, retag, counting jobs, rendering)
+on synthetic fleets of 1k-100k runners with 1-50 tags each.
+Times are stored relative to a fixed calibration workload (data/baselines.json),
+so baselines recorded on one machine hold on another one:
+    python -m gitlab_cli_tool.benchmarks.micro
+    python -m gitlab_cli_tool.benchmarks.micro --update
+tests/test_micro_benchmarks.py fails when a function gets slower than THRESHOLD times its baseline,
+it runs with GITLAB_CLI_BENCHMARKS=1.
+"""
+import argparse
+import json
+import os
+import time
+from functools import lru_cache
+from typing import Callable, Dict, List, Tuple
+
+from tabulate import tabulate
+
+from gitlab_cli_tool.models import Runner
+
+BASELINES_PATH = os.path.join(os.path.dirname(__file__), "data", "baselines.json")
+SIZES = (1000, 10000, 100000)
+MAX_TAGS = 50
+# allowed slowdown against baseline, generous because shared CI machines are noisy
+THRESHOLD = float(os.environ.get("GITLAB_CLI_BENCHMARK_THRESHOLD", 2.0))
+
+
+def build_fleet(count: int, max_tags: int = MAX_TAGS) -> List[Runner]:
+    """
+    New runners on every call, also used by tests.
+    Runner i is named qa-<i // 10>.<i % 10> and has 1 to max_tags tags:
+    os-<i % 7>, pool-<i % 50>, host-<i> and labels shared by many runners
+    """
+    runners = []
+    for i in range(count):
+        tags = [f"os-{i % 7}", f"pool-{i % 50}", f"host-{i}"]
+        tags += [f"label-{(i + j) % 500}" for j in range(max_tags - 3)]
+        runners.append(
+            Runner(
+                id=i,
+                description=f"qa-{i // 10:05}.{i % 10:02}",
+                ip_address=f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}",
+                active=i % 5 != 0,
+                is_shared=False,
+                name="gitlab-runner",
+                online=i % 3 != 0,
+                status="online" if i % 3 else "offline",
+                tag_list=tags[: 1 + i * 7 % max_tags],
+                active_jobs=i % 4,
+            )
+        )
+    return runners
+
+
+@lru_cache(maxsize=None)
+def make_fleet(count: int) -> Tuple[Runner, ...]:
+    """
+    Fleet shared by measurements of all cases, built once per size
+    """
+    return tuple(build_fleet(count))
+
+
+def make_jobs(count: int) -> List[Dict]:
+    return [{"id": i, "runner": {"id": i * 7 % count}} for i in range(count)]
+
+
+def make_api():
+    from gitlab_cli_tool.cli_api import GitlabAPI
+
+    return GitlabAPI("https://gitlab.example.com", "token", "trigger_token")
+
+
+def make_data_filter():
+    from gitlab_cli_tool.cli_api import GitLabDataFilter
+
+    return GitLabDataFilter(
+        secrets={
+            "SERVER": "https://gitlab.example.com",
+            "TOKEN": "token",
+            "TRIGGER_TOKEN": "trigger_token",
+            "PROJECT_ID": "1",
+        },
+        api=make_api(),
+    )
+
+
+def filter_by_names_dict(runners: List[Runner]) -> Callable:
+    api = make_api()
+    return lambda: api.filter_by_names_dict(runners, ["qa-00001", "qa-00123.0", "7.01"])
+
+
+def get_projects_filtered_runners_by_tags(runners: List[Runner]) -> Callable:
+    # index of runners is built in every call, as for a single command
+    api = make_api()
+    return lambda: api.get_projects_filtered_runners_by_tags(
+        runners, ["pool-1", "=os-3", "label-42"]
+    )
+
+
+def relative_complement_of_runners(runners: List[Runner]) -> Callable:
+    data_filter = make_data_filter()
+    runners_to_ignore = runners[::3]
+    return lambda: data_filter.relative_complement_of_runners(
+        runners, runners_to_ignore
+    )
+
+
+def retag_algorithm(runners: List[Runner]) -> Callable:
+    from gitlab_cli_tool.cli_api import GitLabDataFilter
+
+    tags_to_change = [["pool-1", "pool-one"], ["os-3", "os-three"]]
+    return lambda: [
+        GitLabDataFilter.retag_algorithm(runner, tags_to_change) for runner in runners
+    ]
+
+
+def count_jobs_for_runners(runners: List[Runner]) -> Callable:
+    from gitlab_cli_tool.cli_api import GitlabAPI
+
+    jobs = make_jobs(len(runners))
+    return lambda: GitlabAPI.count_jobs_for_runners(jobs)
+
+
+def format_output(runners: List[Runner]) -> Callable:
+    from gitlab_cli_tool.cli_api import GitLabDataFilter
+
+    return lambda: GitLabDataFilter.format_output(runners, "mock-project")
+
+
+# name -> function preparing data of the fleet and returning the measured call
+CASES = {
+    function.__name__: function
+    for function in (
+        filter_by_names_dict,
+        get_projects_filtered_runners_by_tags,
+        relative_complement_of_runners,
+        retag_algorithm,
+        count_jobs_for_runners,
+        format_output,
+    )
+}
+
+
+def best_time(function: Callable, rounds: int = 3, min_round: float = 0.02) -> float:
+    """
+    Fast functions are called many times per round, so a round lasts at least min_round
+    :return: seconds per call in the fastest round, slower ones are noise
+    """
+    start = time.perf_counter()
+    function()
+    number = max(1, int(min_round / max(time.perf_counter() - start, 1e-9)))
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        times.append((time.perf_counter() - start) / number)
+    return min(times)
+
+
+def calibration_workload():
+    """
+    Typical interpreter work of the measured functions:
+    building dicts and lists, string operations and sorting
+    """
+    words = [f"runner-{i % 997}-{i}" for i in range(50000)]
+    index = {}
+    for word in words:
+        index.setdefault(word[:10], []).append(word.upper())
+    sorted(words, key=lambda word: word[::-1])
+
+
+@lru_cache(maxsize=None)
+def calibration() -> float:
+    return best_time(calibration_workload, rounds=5)
+
+
+def measure(case: str, size: int, rounds: int = 3) -> float:
+    """
+    :return: time of the case on fleet of size runners, relative to calibration
+    """
+    runners = list(make_fleet(size))
+    return best_time(CASES[case](runners), rounds) / calibration()
+
+
+def key(case: str, size: int) -> str:
+    return f"{case}[{size}]"
+
+
+def load_baselines() -> Dict[str, float]:
+    try:
+        with open(BASELINES_PATH) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_baselines(baselines: Dict[str, float]):
+    with open(BASELINES_PATH, "w") as f:
+        json.dump(
+            {name: float(f"{value:.4g}") for name, value in sorted(baselines.items())},
+            f,
+            indent=2,
+        )
+        f.write("\n")
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument(
+        "--update", action="store_true", help="Store results as new baselines"
+    )
+    parsed_args = parser.parse_args(args)
+    baselines = load_baselines()
+    rows = []
+    results = {}
+    for case in parsed_args.cases:
+        for size in parsed_args.sizes:
+            relative = results[key(case, size)] = measure(case, size)
+            baseline = baselines.get(key(case, size))
+            rows.append(
+                [
+                    case,
+                    size,
+                    round(relative * calibration() * 1000, 2),
+                    round(relative, 3),
+                    round(baseline, 3) if baseline else "",
+                    f"{relative / baseline:.2f}x" if baseline else "",
+                ]
+            )
+    print(f"calibration {calibration() * 1000:.2f} ms")
+    print(
+        tabulate(
+            rows, ["FUNCTION", "RUNNERS", "MS", "RELATIVE", "BASELINE", "VS BASELINE"]
+        )
+    )
+    if parsed_args.update:
+        baselines.update(results)
+        save_baselines(baselines)
+        print(f"Baselines saved to {BASELINES_PATH}")
+
+
+if __name__ == "__main__":
+    main()
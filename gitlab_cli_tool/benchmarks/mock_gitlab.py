@@ -0,0 +1,275 @@
+"""
+Local Gitlab serving the part of REST API used by the CLI, for benchmarks and load tests:
+    with MockGitlab(runners_count=500, latency=0.01, error_rate=0.01, rate_limit=600) as server:
+        print(server.url)
+"""
+import asyncio
+import hashlib
+import json
+import math
+import random
+import socket
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+from aiohttp import web
+
+PROJECT_ID = 1
+PROJECT_NAME = "mock-project"
+MAX_PER_PAGE = 100
+
+
+def make_runner(index: int) -> Dict:
+    """
+    Runner i is named qa-<i // 10>.<i % 10>, every second runner has tag atf,
+    the others ios13
+    """
+    description = f"qa-{index // 10:02}.{index % 10:02}"
+    return {
+        "id": 1000 + index,
+        "description": description,
+        "ip_address": f"10.0.{index // 256 % 256}.{index % 256}",
+        "active": True,
+        "paused": False,
+        "is_shared": False,
+        "runner_type": "project_type",
+        "name": "gitlab-runner",
+        "online": True,
+        "status": "online",
+        "tag_list": ["atf" if index % 2 else "ios13", description, f"pool-{index % 5}"],
+    }
+
+
+class MockGitlab:
+    """
+    aiohttp application run on its own event loop in a background thread,
+    so the synchronous CLI can talk to it over real sockets.
+    Every third runner has a running job. Requests are counted per route
+    and responses per status.
+    """
+
+    def __init__(
+        self,
+        runners_count: int = 100,
+        token: str = "token",
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit: Optional[int] = None,
+        rate_limit_window: float = 1.0,
+        seed: int = 0,
+    ):
+        """
+        :param runners_count: size of the fleet, see make_runner
+        :param token: PRIVATE-TOKEN accepted by the server, other tokens get 401
+        :param latency: seconds every response is delayed by
+        :param error_rate: part of requests answered with 502 and an HTML error page
+        :param rate_limit: requests allowed per rate_limit_window, then 429 with Retry-After,
+        RateLimit-* headers are sent like Gitlab does (None - no limit)
+        :param rate_limit_window: seconds
+        :param seed: of random generator deciding which requests fail
+        """
+        self.token = token
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.rate_limit_window = rate_limit_window
+        self.random = random.Random(seed)
+        self.window_reset = 0.0
+        self.window_requests = 0
+        self.runners = {
+            runner["id"]: runner for runner in map(make_runner, range(runners_count))
+        }
+        self.jobs = [
+            {"id": 5000 + index, "status": "running", "runner": {"id": runner_id}}
+            for index, runner_id in enumerate(list(self.runners)[::3])
+        ]
+        self.requests = Counter()
+        self.statuses = Counter()
+        self.url = ""
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.thread: Optional[threading.Thread] = None
+        self.app_runner: Optional[web.AppRunner] = None
+
+    def make_app(self) -> web.Application:
+        app = web.Application(middlewares=[self.simulate_gitlab])
+        app.router.add_get(
+            "/api/v4/projects/{project_id}/runners", self.get_project_runners
+        )
+        app.router.add_get("/api/v4/projects/{project_id}/jobs", self.get_jobs)
+        app.router.add_get("/api/v4/projects/{project_id}", self.get_project)
+        app.router.add_get("/api/v4/runners/{runner_id}", self.get_runner)
+        app.router.add_put("/api/v4/runners/{runner_id}", self.update_runner)
+        return app
+
+    @web.middleware
+    async def simulate_gitlab(self, request: web.Request, handler):
+        """
+        Counts the request, then delays, authorizes, rate limits
+        and randomly fails it before it gets to the handler
+        """
+        self.requests[
+            f"{request.method} {request.match_info.route.resource.canonical}"
+        ] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if request.headers.get("PRIVATE-TOKEN") != self.token:
+            response = web.json_response({"message": "401 Unauthorized"}, status=401)
+        elif self.rate_limit is not None and not self.take_request():
+            response = web.json_response(
+                {"message": "429 Too Many Requests"},
+                status=429,
+                headers={
+                    "Retry-After": str(math.ceil(self.window_reset - time.time()))
+                },
+            )
+        elif self.random.random() < self.error_rate:
+            # like a proxy in front of Gitlab, error page is not JSON and has no pagination
+            response = web.Response(
+                text="<html><body><h1>502 Bad Gateway</h1></body></html>",
+                status=502,
+                content_type="text/html",
+            )
+        else:
+            response = await handler(request)
+        if self.rate_limit is not None:
+            response.headers.update(self.rate_limit_headers())
+        self.statuses[response.status] += 1
+        return response
+
+    def take_request(self) -> bool:
+        """
+        Fixed window limiter, as Gitlab counts requests of a user
+        :return: False if the limit of the current window is used up
+        """
+        now = time.time()
+        if now >= self.window_reset:
+            self.window_reset = now + self.rate_limit_window
+            self.window_requests = 0
+        self.window_requests += 1
+        return self.window_requests <= self.rate_limit
+
+    def rate_limit_headers(self) -> Dict[str, str]:
+        return {
+            "RateLimit-Limit": str(self.rate_limit),
+            "RateLimit-Observed": str(self.window_requests),
+            "RateLimit-Remaining": str(max(0, self.rate_limit - self.window_requests)),
+            "RateLimit-Reset": str(math.ceil(self.window_reset)),
+        }
+
+    @staticmethod
+    def paginate(request: web.Request, items: List) -> web.Response:
+        """
+        Offset pagination with the headers Gitlab sends: X-Total, X-Total-Pages, Link
+        (with prev, next, first and last pages)
+        """
+        per_page = min(int(request.query.get("per_page", 20)), MAX_PER_PAGE)
+        page = int(request.query.get("page", 1))
+        total_pages = max(1, -(-len(items) // per_page))
+        headers = {
+            "X-Page": str(page),
+            "X-Per-Page": str(per_page),
+            "X-Total": str(len(items)),
+            "X-Total-Pages": str(total_pages),
+        }
+        links = []
+        if page > 1:
+            headers["X-Prev-Page"] = str(page - 1)
+            links.append(f'<{request.url.update_query(page=page - 1)}>; rel="prev"')
+        if page < total_pages:
+            headers["X-Next-Page"] = str(page + 1)
+            links.append(f'<{request.url.update_query(page=page + 1)}>; rel="next"')
+        links.append(f'<{request.url.update_query(page=1)}>; rel="first"')
+        links.append(f'<{request.url.update_query(page=total_pages)}>; rel="last"')
+        headers["Link"] = ", ".join(links)
+        start = (page - 1) * per_page
+        return web.json_response(items[start : start + per_page], headers=headers)
+
+    @staticmethod
+    def listing_fields(runner: Dict) -> Dict:
+        return {key: value for key, value in runner.items() if key != "tag_list"}
+
+    async def get_project_runners(self, request: web.Request) -> web.Response:
+        runners = list(self.runners.values())
+        if "tag_list" in request.query:
+            tags = set(request.query["tag_list"].split(","))
+            runners = [runner for runner in runners if tags <= set(runner["tag_list"])]
+        return self.paginate(
+            request, [self.listing_fields(runner) for runner in runners]
+        )
+
+    async def get_jobs(self, request: web.Request) -> web.Response:
+        return self.paginate(request, self.jobs)
+
+    async def get_project(self, request: web.Request) -> web.Response:
+        return web.json_response(
+            {"id": int(request.match_info["project_id"]), "name": PROJECT_NAME}
+        )
+
+    async def get_runner(self, request: web.Request) -> web.Response:
+        runner = self.runners.get(int(request.match_info["runner_id"]))
+        if runner is None:
+            return web.json_response({"message": "404 Not found"}, status=404)
+        etag = f'W/"{hashlib.sha1(json.dumps(runner).encode()).hexdigest()}"'
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.json_response(runner, headers={"ETag": etag})
+
+    async def update_runner(self, request: web.Request) -> web.Response:
+        runner = self.runners.get(int(request.match_info["runner_id"]))
+        if runner is None:
+            return web.json_response({"message": "404 Not found"}, status=404)
+        payload = await request.json()
+        if "active" in payload:
+            runner["active"] = payload["active"]
+            runner["paused"] = not payload["active"]
+            runner["status"] = "online" if payload["active"] else "paused"
+        if "tag_list" in payload:
+            runner["tag_list"] = [tag for tag in payload["tag_list"].split(",") if tag]
+        return web.json_response(runner)
+
+    async def start_app(self, sock: socket.socket):
+        self.app_runner = web.AppRunner(self.make_app())
+        await self.app_runner.setup()
+        await web.SockSite(self.app_runner, sock).start()
+
+    def start(self) -> str:
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        self.url = f"http://127.0.0.1:{sock.getsockname()[1]}"
+        self.loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        def serve():
+            asyncio.set_event_loop(self.loop)
+            self.loop.run_until_complete(self.start_app(sock))
+            started.set()
+            self.loop.run_forever()
+
+        self.thread = threading.Thread(target=serve, daemon=True)
+        self.thread.start()
+        started.wait()
+        return self.url
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self.app_runner.cleanup(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+    def secrets(self) -> str:
+        """
+        Content of ~/.gitlab-cli/secrets.txt pointing the CLI to this server
+        """
+        return (
+            f"SERVER={self.url}\nTOKEN={self.token}\n"
+            f"TRIGGER_TOKEN=trigger_token\nPROJECT_ID={PROJECT_ID}\n"
+        )
+
+    def __enter__(self) -> "MockGitlab":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
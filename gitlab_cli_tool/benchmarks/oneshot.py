@@ -0,0 +1,36 @@
+"""
+Child process of gitlab_cli_tool.benchmarks.cli, runs one command like the shell does
+and prints seconds spent in every phase as JSON:
+    python -m gitlab_cli_tool.benchmarks.oneshot runners list --tag atf
+Only standard library is imported before the CLI, so import time is measured cold.
+"""
+import json
+import os
+import sys
+import time
+
+
+def main():
+    start = time.perf_counter()
+    from gitlab_cli_tool import gitlab_cli
+    from gitlab_cli_tool.timings import timer
+
+    imported = time.perf_counter()
+    stdout = sys.stdout
+    sys.argv = ["gitlab_cli"] + sys.argv[1:]
+    with open(os.devnull, "w") as devnull:
+        sys.stdout = devnull
+        try:
+            gitlab_cli.main()
+        finally:
+            sys.stdout = stdout
+    finished = time.perf_counter()
+    phases = timer.reset()
+    # network libraries are imported lazily while the command runs
+    phases["import"] = phases.get("import", 0.0) + imported - start
+    phases["command"] = finished - start
+    print(json.dumps(phases))
+
+
+if __name__ == "__main__":
+    main()
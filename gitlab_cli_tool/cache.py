@@ -0,0 +1,84 @@
+import hashlib
+import json
+import os
+import time
+from typing import Dict, Optional
+
+CACHE_DIR = "~/.gitlab-cli/cache"
+CACHE_TTL = 3600  # seconds, runner tags almost never change
+
+
+class RunnerCache:
+    """
+    Runner details (/api/v4/runners/:id) stored on disk, one file per Gitlab server.
+    Entry holds runner JSON, its ETag and the time it was fetched.
+    Entries younger than ttl are used without asking Gitlab,
+    older ones are revalidated with If-None-Match.
+    With refresh entries are not used at all, runners are fetched again and stored.
+    """
+
+    def __init__(self, server: str, ttl: int = CACHE_TTL, refresh: bool = False):
+        self.server = server
+        self.ttl = ttl
+        self.refresh = refresh
+        server_hash = hashlib.sha1(server.encode()).hexdigest()
+        self.filepath = os.path.join(
+            os.path.expanduser(CACHE_DIR), f"runners-{server_hash}.json"
+        )
+        self.entries = None
+        self.changed = False
+
+    def load(self) -> Dict:
+        if self.entries is None:
+            try:
+                with open(self.filepath, "r") as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}
+        return self.entries
+
+    def get(self, runner_id: int) -> Optional[Dict]:
+        if self.refresh:
+            return None
+        return self.load().get(str(runner_id))
+
+    def is_fresh(self, entry: Dict) -> bool:
+        if self.refresh:
+            return False
+        return time.time() - entry["fetched_at"] < self.ttl
+
+    def has_fresh(self, runner_id: int) -> bool:
+        entry = self.get(runner_id)
+        return entry is not None and self.is_fresh(entry)
+
+    def put(self, runner_id: int, data: Dict, etag: Optional[str]):
+        self.load()[str(runner_id)] = {
+            "data": data,
+            "etag": etag,
+            "fetched_at": time.time(),
+        }
+        self.changed = True
+
+    def touch(self, runner_id: int):
+        """
+        Gitlab answered 304 Not Modified, entry is valid for another ttl
+        """
+        self.load()[str(runner_id)]["fetched_at"] = time.time()
+        self.changed = True
+
+    def evict(self, runner_id: int):
+        """
+        Runner was changed and its new details are not known
+        """
+        if self.load().pop(str(runner_id), None) is not None:
+            self.changed = True
+
+    def save(self):
+        if not self.changed:
+            return
+        os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
+        tmp_filepath = f"{self.filepath}.tmp"
+        with open(tmp_filepath, "w") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_filepath, self.filepath)
+        self.changed = False
@@ -1,51 +1,67 @@
 import asyncio
-import copy
+import math
 import os
+import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
 from enum import Enum
-from typing import List, Dict, Union
+from itertools import islice
+from typing import (
+    List,
+    Dict,
+    Union,
+    Optional,
+    Iterator,
+    AsyncIterator,
+    Iterable,
+    Tuple,
+    Callable,
+)
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, quote
 
 import aiohttp
 import requests
 from aiohttp.client import ClientSession
 from aiohttp import ContentTypeError
-from gitlab import Gitlab
-from gitlab.v4.objects import ProjectRunner
 from tabulate import tabulate
-from dataclasses import dataclass, field
 
+from gitlab_cli_tool.cache import RunnerCache, CACHE_TTL
+from gitlab_cli_tool import decoding, expressions
+from gitlab_cli_tool.filters import (
+    RunnerIndex,
+    RunnerSet,
+    compile_name_matcher,
+)
+from gitlab_cli_tool.graphql_api import GitlabGraphQLAPI, GraphQLError
+from gitlab_cli_tool.models import (
+    Runner,
+    Filtering,
+    Actions,
+    PropertyName,
+    Backend,
+    NameMatching,
+    intern_tags,
+)
+from gitlab_cli_tool.planner import QueryPlan, PlannedFilter, LIST, DETAILS
+from gitlab_cli_tool.scheduler import RateLimitScheduler, ScheduledAdapter
+from gitlab_cli_tool.table import RunnerTable
+from gitlab_cli_tool.timings import timer, SECRETS, HTTP, FILTER, RENDER
+from gitlab_cli_tool.tracing import tracer
 
-@dataclass
-class Runner:
-    id: int
-    description: str
-    ip_address: str
-    active: bool
-    is_shared: bool
-    name: str
-    online: bool
-    status: str
-    tag_list: List[str] = field(default_factory=list)
-    active_jobs: int = 0
 
+# number of pages fetched at the same time when GitLab reports the total number of pages
+PAGINATION_WORKERS = 10
 
-class Filtering(Enum):
-    WRONG = 0
-    NAMES = 1
-    TAGS = 2
+# number of runners updated at the same time by pause, resume and retag
+MAX_CONCURRENT_REQUESTS = 20
 
-
-class Actions(Enum):
-    PAUSE = "pause"
-    RESUME = "resume"
-    LIST = "list"
-    RUN = "run"
-    RETAG = "retag"
-
-
-class PropertyName(Enum):
-    RUNNERS = "runners"
-    PIPELINE = "pipeline"
-    # TODO implement listing etc for -> PROJECTS = 'projects'
+# listing endpoints which support keyset pagination with parameters they accept,
+# every other endpoint uses offset pagination
+KEYSET_PAGINATION_ENDPOINTS = {
+    re.compile(r"/api/v4/projects$"): {"order_by": "id", "sort": "asc"},
+    re.compile(r"/api/v4/projects/[^/]+/jobs$"): {"order_by": "id", "sort": "desc"},
+}
 
 
 class GitLabDataFilter:
@@ -57,12 +73,55 @@ class GitLabDataFilter:
         self.branch = kwargs.get("branch")
         self.variables = kwargs.get("variables")
         self.ignore = kwargs.get("ignore")
+        # e.g. "tag:atf AND name:qa-0 AND NOT tag:ios13", see expressions module
+        self.filter_expression = kwargs.get("filter_expression")
+        self.concurrency = kwargs.get("concurrency") or MAX_CONCURRENT_REQUESTS
+        self.cache_ttl = kwargs.get("cache_ttl")
+        if self.cache_ttl is None:
+            self.cache_ttl = CACHE_TTL
+        self.refresh = kwargs.get("refresh", False)
+        self.backend = kwargs.get("backend") or Backend.REST.value
+        self.show_active_jobs = not kwargs.get("no_jobs", False)
+        self.explain = kwargs.get("explain", False)
+        # how --name and --ignore name patterns are matched
+        self.name_matching = kwargs.get("name_matching") or NameMatching.SUBSTRING.value
+        # fetched together with runners, GraphQL backend assigns active jobs directly to runners
+        self.project_name = None
+        self.counted_jobs = None
+        # built from runners with details, shared by tag filters and REPL completion
+        self.runner_index = None
         self.server = ""
         self.token = ""
         self.trigger_token = ""
         self.project_id = ""
-        self.assign_secrets()
-        self.api = GitlabAPI(self.server, self.token, self.trigger_token)
+        # REPL passes secrets and api from the previous command to reuse connections
+        self.secrets = kwargs.get("secrets")
+        with timer.phase(SECRETS):
+            if self.secrets:
+                self.assign_secrets_to_class(self.secrets)
+            else:
+                self.assign_secrets()
+        self.api = kwargs.get("api")
+        if self.api:
+            self.api.max_concurrent_requests = self.concurrency
+        else:
+            self.api = GitlabAPI(
+                self.server,
+                self.token,
+                self.trigger_token,
+                max_concurrent_requests=self.concurrency,
+            )
+        self.api.runner_cache.ttl = self.cache_ttl
+        # changes are computed from the current state of runners, never from the cache
+        self.api.runner_cache.refresh = self.refresh or self.changes_runners()
+
+    def changes_runners(self) -> bool:
+        return (
+            self.property_name == PropertyName.RUNNERS.value
+            and bool(self.action)
+            and self.action[0]
+            in (Actions.PAUSE.value, Actions.RESUME.value, Actions.RETAG.value)
+        )
 
     @staticmethod
     def convert_secrets_to_dict(secrets):
@@ -92,11 +151,13 @@ class GitLabDataFilter:
                 )
         with open(filepath, "r") as f:
             secrets = f.read().splitlines()
-            secrets = self.convert_secrets_to_dict(secrets)
-            self.assign_secrets_to_class(secrets)
+            self.secrets = self.convert_secrets_to_dict(secrets)
+            self.assign_secrets_to_class(self.secrets)
 
     @staticmethod
-    def format_output(runners: List[Runner], project_name: str):
+    def format_output(
+        runners: List[Runner], project_name: str, show_active_jobs: bool = True
+    ):
         headers = [
             "NAME",
             "TAGS",
@@ -104,19 +165,25 @@ class GitLabDataFilter:
             "ACTIVE JOBS",
             "STATUS",
         ]
-        runners = sorted(runners, key=lambda i: i.description)
-        table = [
-            [
-                runner.description,
-                ", ".join(runner.tag_list)
-                if len(runner.tag_list) < 5
-                else ", ".join(runner.tag_list[:4]) + " ...",
-                project_name,
-                runner.active_jobs,
-                runner.status,
-            ]
-            for runner in runners
-        ]
+        # rows are sorted and rendered from columns of the table
+        runner_table = RunnerTable.from_runners(runners)
+        table = []
+        for row in runner_table.sort("description"):
+            tag_list = runner_table.row_tags(row)
+            table.append(
+                [
+                    runner_table.descriptions[row],
+                    ", ".join(tag_list)
+                    if len(tag_list) < 5
+                    else ", ".join(tag_list[:4]) + " ...",
+                    project_name,
+                    runner_table.active_jobs[row],
+                    runner_table.statuses[runner_table.status_ids[row]],
+                ]
+            )
+        if not show_active_jobs:
+            headers.remove("ACTIVE JOBS")
+            table = [row[:3] + row[4:] for row in table]
         return tabulate(table, headers)
 
     def run_pipeline(self):
@@ -126,57 +193,207 @@ class GitLabDataFilter:
         self, current_runners: List[Runner], filter_name: Enum, filter_values: List[str]
     ) -> List[Runner]:
         if filter_name == Filtering.NAMES:
-            return self.api.filter_by_names_dict(current_runners, filter_values)
+            return self.api.filter_by_names_dict(
+                current_runners, filter_values, self.name_matching
+            )
         elif filter_name == Filtering.TAGS:
             return self.api.get_projects_filtered_runners_by_tags(
-                current_runners, filter_values
+                current_runners, filter_values, self.runner_index
             )
 
     def relative_complement_of_runners(
         self, runners: List[Runner], runners_to_ignore: List[Runner]
     ) -> List[Runner]:
-        new_runners = []
-        for runner in runners:
-            if runner not in runners_to_ignore:
-                new_runners.append(runner)
-        return new_runners
+        """
+        Runners are compared by id
+        :return: runners which are not in runners_to_ignore, in original order
+        """
+        return list(RunnerSet(runners) - RunnerSet(runners_to_ignore))
 
     def ignore_runners(self, runners: List[Runner]) -> List[Runner]:
-        runners_to_ignore = []
+        node = self.ignore_node()
+        return runners if node is None else self.filter_by_expression(runners, node)
 
-        if self.ignore[0].lower() == "tag":
-            tags = self.ignore[1:]
-            runners_to_ignore = self.filter_runners(runners, Filtering.TAGS, tags)
-        elif self.ignore[0].lower() == "name":
-            names = self.ignore[1:]
-            runners_to_ignore = self.filter_runners(runners, Filtering.NAMES, names)
-        return self.relative_complement_of_runners(runners, runners_to_ignore)
+    def ignore_node(self) -> Optional[expressions.Node]:
+        """
+        '--ignore tag a b' -> NOT (tag:a OR tag:b), None when nothing is ignored
+        """
+        if not self.ignore or self.ignore[0].lower() not in ("name", "tag"):
+            return None
+        node = expressions.any_of(self.ignore[0].lower(), self.ignore[1:])
+        return None if node is None else expressions.Not(node)
 
-    def get_filtered_runners(self) -> List[Runner]:
-        runners = self.api.get_projects_runners(self.project_id)
-        runners = self.api.assign_tags_to_runners_asyncio(runners)
+    def filter_node(self) -> Optional[expressions.Node]:
+        """
+        --name, --tag, --filter and --ignore as one expression, there is logical AND between them,
+        e.g. '--tag =atf --name qa --ignore name qa-03' -> tag:=atf AND name:qa AND NOT name:qa-03
+        """
+        operands = []
         if self.names:
-            runners = self.filter_runners(runners, Filtering.NAMES, self.names)
-        elif self.tags:
-            runners = self.filter_runners(runners, Filtering.TAGS, self.tags)
-        if self.ignore:
-            runners = self.ignore_runners(runners)
-        return runners
+            operands.append(expressions.any_of("name", self.names))
+        if self.tags:
+            operands.append(expressions.any_of("tag", self.tags))
+        if self.filter_expression:
+            operands.append(expressions.parse(self.filter_expression))
+        ignore_node = self.ignore_node()
+        if ignore_node is not None:
+            operands.append(ignore_node)
+        return expressions.join_and([node for node in operands if node is not None])
+
+    def plan_query(self) -> QueryPlan:
+        """
+        All filters are compiled into one expression, its part on name and status
+        is applied to the runners listing, the rest needs details of every runner
+        and is evaluated on their columnar table.
+        Exact tags are pushed down to Gitlab, e.g. '--tag =atf =linux' lists matching runners per tag
+        """
+        node = self.filter_node()
+        if node is None:
+            return QueryPlan([], self.show_active_jobs)
+        server_tag_lists = [
+            sorted(tags) for tags in expressions.exact_tag_alternatives(node) or []
+        ]
+        filters = []
+        for needs, part in zip((LIST, DETAILS), expressions.split_by_data(node)):
+            if part is None:
+                continue
+            description = expressions.describe(part)
+            if "name" in expressions.fields(part):
+                description += f" as {self.name_matching}"
+            # listing is scanned once, runners with details are filtered on their table
+            apply = self.filter_by_expression if needs == LIST else self.filter_table
+            filters.append(
+                PlannedFilter(
+                    description,
+                    needs,
+                    lambda runners, part=part, apply=apply: apply(runners, part),
+                )
+            )
+        return QueryPlan(filters, self.show_active_jobs, server_tag_lists)
+
+    def filter_by_expression(
+        self, runners: List[Runner], node: expressions.Node
+    ) -> List[Runner]:
+        """
+        Expression is compiled into one predicate and runners are filtered in a single pass
+        """
+        predicate = expressions.compile_predicate(
+            node, self.name_matching, self.runner_index
+        )
+        return [runner for runner in runners if predicate(runner)]
+
+    def filter_table(
+        self, runners: List[Runner], node: expressions.Node
+    ) -> List[Runner]:
+        """
+        Runners with details are put into RunnerTable, terms of expression scan its columns
+        and tag vocabulary, operators combine sets of rows
+        :return: matching runners in original order
+        """
+        table = RunnerTable.from_runners(runners)
+        rows = expressions.select_rows(node, table, self.name_matching)
+        return [runners[row] for row in rows]
+
+    def get_projects_runners_graphql(self) -> Optional[List[Runner]]:
+        """
+        :return: runners from GraphQL API or None when REST API should be used
+        """
+        if self.backend == Backend.REST.value:
+            return None
+        try:
+            self.project_name, runners = self.api.get_projects_runners_graphql(
+                self.project_id
+            )
+            return runners
+        except (GraphQLError, aiohttp.ClientError) as err:
+            if self.backend == Backend.GRAPHQL.value:
+                raise
+            print(f"GraphQL is not available ({err}), using REST API")
+            return None
+
+    def get_filtered_runners(self) -> List[Runner]:
+        plan = self.plan_query()
+        with timer.phase(HTTP):
+            runners = self.get_projects_runners_graphql()
+        if runners is None:
+            with timer.phase(HTTP):
+                runners = self.api.get_projects_runners(
+                    self.project_id, plan.server_tag_lists
+                )
+            with timer.phase(FILTER):
+                runners = plan.apply(runners, LIST)
+            with timer.phase(HTTP):
+                (
+                    runners,
+                    self.project_name,
+                    self.counted_jobs,
+                ) = self.api.get_runners_with_project_data(
+                    runners, self.project_id, self.show_active_jobs
+                )
+        else:
+            with timer.phase(FILTER):
+                runners = plan.apply(runners, LIST)
+        with timer.phase(FILTER):
+            self.runner_index = RunnerIndex(runners)
+            return plan.apply(runners, DETAILS)
+
+    def explain_query(self) -> str:
+        """
+        With REST API the runners listing is requested, to count runners left after each filter,
+        GraphQL plan is printed without sending any request
+        """
+        if self.backend in (Backend.GRAPHQL.value, Backend.AUTO.value):
+            steps = (
+                "1. POST /api/graphql (runners with tags, 100 per query)\n"
+                "2. POST /api/graphql (running jobs of the project, 100 per query)"
+            )
+            if self.backend == Backend.AUTO.value:
+                steps += (
+                    "\nREST API is used instead when Gitlab does not support the query,"
+                    " see --backend rest --explain"
+                )
+            return steps
+        plan = self.plan_query()
+        runners = self.api.get_projects_runners(self.project_id, plan.server_tag_lists)
+        counts = []
+        survivors = plan.apply(runners, LIST, counts)
+        cached_details = sum(
+            1 for runner in survivors if self.api.runner_cache.has_fresh(runner.id)
+        )
+        return plan.explain(self.project_id, len(runners), counts, cached_details)
 
     def make_action_on_runners(self, runners: List[Runner]):
         if self.action[0] == Actions.PAUSE.value:
-            runners = self.api.change_runners_dict_status(runners, False)
+            with timer.phase(HTTP):
+                runners = self.api.change_runners_dict_status(runners, False)
         elif self.action[0] == Actions.RESUME.value:
-            runners = self.api.change_runners_dict_status(runners, True)
+            with timer.phase(HTTP):
+                runners = self.api.change_runners_dict_status(runners, True)
         elif self.action[0] == Actions.RETAG.value:
             runners = self.retag_runners(runners)
-        runners = self.api.assign_active_jobs_to_runners(runners, self.project_id)
-        project_name = self.api.get_project(self.project_id).name
-        return self.format_output(runners, project_name)
+        # running jobs are counted together with runner details, before the action,
+        # pausing or retagging a runner does not stop jobs it is running
+        if self.counted_jobs is not None:
+            runners = self.api.set_active_jobs(runners, self.counted_jobs)
+        if self.project_name is None:
+            with timer.phase(HTTP):
+                self.project_name = self.api.get_project(self.project_id).name
+        with timer.phase(RENDER):
+            return self.format_output(runners, self.project_name, self.show_active_jobs)
 
     def get_filtered_data(self):
+        retries = self.api.retry_policy.retries
+        message = self.get_property_data()
+        retries = self.api.retry_policy.retries - retries
+        if retries and isinstance(message, str):
+            message = f"{message}\n{retries} requests to Gitlab sent again after transient errors"
+        return message
+
+    def get_property_data(self):
         # todo check command line arguments
         if self.property_name == PropertyName.RUNNERS.value:
+            if self.explain:
+                return self.explain_query()
             runners = self.get_filtered_runners()
             return self.make_action_on_runners(runners)
         elif self.property_name == PropertyName.PIPELINE.value:
@@ -250,12 +467,14 @@ class GitLabDataFilter:
 
     def commit_changes_to_runners(self, runners_after_changes):
         print("Changing runners...")
-        self.api.change_runners_dict_tags(runners_after_changes)
+        with timer.phase(HTTP):
+            self.api.change_runners_dict_tags(runners_after_changes)
         return runners_after_changes
 
     @staticmethod
     def retag_algorithm(runner: Runner, tags_to_change):
-        runner_after_changes = copy.deepcopy(runner)
+        # only tag list is changed, other fields are immutable and can be shared
+        runner_after_changes = replace(runner, tag_list=list(runner.tag_list))
         for old_tag, new_tag in tags_to_change:
             try:
                 index_to_rename = runner_after_changes.tag_list.index(old_tag)
@@ -270,12 +489,90 @@ class GitLabDataFilter:
 
 
 class GitlabAPI:
-    def __init__(self, server, token, trigger_token):
+    def __init__(
+        self,
+        server,
+        token,
+        trigger_token,
+        pagination_workers=PAGINATION_WORKERS,
+        max_concurrent_requests=MAX_CONCURRENT_REQUESTS,
+    ):
         self.server = server
         self.token = token
-        self.gl = Gitlab(self.server, self.token)
-        self.headers = {"PRIVATE-TOKEN": self.token}
+        # compression is asked for explicitly, listings of jobs shrink several times
+        self.headers = {
+            "PRIVATE-TOKEN": self.token,
+            "Accept-Encoding": decoding.ACCEPT_ENCODING,
+        }
         self.trigger_token = trigger_token
+        self.pagination_workers = pagination_workers
+        self.max_concurrent_requests = max_concurrent_requests
+        # connections are kept alive for the whole lifetime of the object,
+        # REPL keeps one GitlabAPI for the whole session
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        # requests of python-gitlab go through this session too
+        self.session.hooks["response"].append(tracer.requests_hook)
+        # one queue for requests from threads and from the event loop,
+        # it adapts to rate limiting of Gitlab
+        self.scheduler = RateLimitScheduler()
+        # reads failed for a transient reason are sent again, also by python-gitlab
+        self.retry_policy = self.scheduler.retry_policy
+        self.session.mount(
+            "https://",
+            ScheduledAdapter(self.scheduler, pool_maxsize=pagination_workers),
+        )
+        self.session.mount(
+            "http://",
+            ScheduledAdapter(self.scheduler, pool_maxsize=pagination_workers),
+        )
+        self._gl = None
+        self.loop = None
+        self.aiohttp_session = None
+        self.aiohttp_loop = None
+        self.runner_cache = RunnerCache(self.server)
+        self.graphql = GitlabGraphQLAPI(self.server, self.token, self.scheduler)
+
+    @property
+    def gl(self):
+        if self._gl is None:
+            # python-gitlab is imported on first use (pipelines, projects),
+            # listing runners goes straight to REST API without it
+            from gitlab import Gitlab
+
+            self._gl = Gitlab(self.server, self.token, session=self.session)
+        return self._gl
+
+    def run_async(self, coroutine):
+        """
+        Coroutines are run on one event loop owned by the object,
+        so aiohttp session and its connections can be reused between calls
+        """
+        if self.loop is None or self.loop.is_closed():
+            self.loop = asyncio.new_event_loop()
+        return self.loop.run_until_complete(coroutine)
+
+    async def get_aiohttp_session(self) -> ClientSession:
+        if (
+            self.aiohttp_session is None
+            or self.aiohttp_session.closed
+            or self.aiohttp_loop is not asyncio.get_running_loop()
+        ):
+            self.aiohttp_session = aiohttp.ClientSession(
+                trace_configs=[tracer.aiohttp_trace_config()]
+            )
+            self.aiohttp_loop = asyncio.get_running_loop()
+        return self.aiohttp_session
+
+    async def close_aiohttp_session(self):
+        if self.aiohttp_session is not None and not self.aiohttp_session.closed:
+            await self.aiohttp_session.close()
+
+    def close(self):
+        if self.loop is not None and not self.loop.is_closed():
+            self.loop.run_until_complete(self.close_aiohttp_session())
+            self.loop.close()
+        self.session.close()
 
     @staticmethod
     def format_variables(variables: List[str]) -> Dict[str, str]:
@@ -308,15 +605,71 @@ class GitlabAPI:
         except Exception as e:
             return e
 
-    def assign_tags_to_runners_asyncio(
-        self, runners: List[ProjectRunner]
+    def get_projects_runners_graphql(self, project_id) -> Tuple[str, List[Runner]]:
+        """
+        Runners with tags, status and number of running jobs from GraphQL API,
+        a few requests instead of one request per runner
+        :param project_id: id of project
+        :return: name of project and list of runners
+        """
+        return self.run_async(self.get_projects_runners_graphql_async(project_id))
+
+    async def get_projects_runners_graphql_async(
+        self, project_id
+    ) -> Tuple[str, List[Runner]]:
+        session = await self.get_aiohttp_session()
+        return await self.graphql.get_projects_runners(session, project_id)
+
+    def assign_tags_to_runners_asyncio(self, runners: List[Runner]) -> List[Runner]:
+        runners_tags = self.run_async(self.assign_tags_to_runners(runners))
+        return self.build_runners_with_tags(runners, runners_tags)
+
+    def get_runners_with_project_data(
+        self, runners: List[Runner], project_id, with_active_jobs: bool = True
+    ) -> Tuple[List[Runner], str, Optional[Dict[int, int]]]:
+        """
+        Runners details, project name and running jobs of project are independent,
+        so they are fetched concurrently on one event loop
+        :param runners: runners from project runners listing
+        :param project_id: id of project
+        :param with_active_jobs: False if running jobs are not needed
+        :return: runners with tags, name of project, number of running jobs per runner id
+        """
+        return self.run_async(
+            self.get_runners_with_project_data_async(
+                runners, project_id, with_active_jobs
+            )
+        )
+
+    async def get_runners_with_project_data_async(
+        self, runners: List[Runner], project_id, with_active_jobs: bool = True
+    ) -> Tuple[List[Runner], str, Optional[Dict[int, int]]]:
+        session = await self.get_aiohttp_session()
+        tasks = [
+            self.assign_tags_to_runners(runners),
+            self.get_project_name_async(project_id, session),
+        ]
+        if with_active_jobs:
+            tasks.append(self.count_running_jobs_async(project_id, session))
+        runners_tags, project_name, *counted_jobs = await asyncio.gather(*tasks)
+        return (
+            self.build_runners_with_tags(runners, runners_tags),
+            project_name,
+            counted_jobs[0] if counted_jobs else None,
+        )
+
+    def build_runners_with_tags(
+        self, runners: List[Runner], runners_tags: List[List]
     ) -> List[Runner]:
         runner_list = []
-        runners_tags = asyncio.run(self.assign_tags_to_runners(runners))
         for runner, runner_tags in zip(runners, runners_tags):
-            runner_obj = Runner(**runner._attrs)
-            runner_obj.tag_list = runner_tags
-            runner_list.append(runner_obj)
+            # failed request leaves exception instead of tags, see validate_runners_tags
+            runner.tag_list = (
+                intern_tags(runner_tags)
+                if isinstance(runner_tags, list)
+                else runner_tags
+            )
+            runner_list.append(runner)
 
         if runner_list:
             self.validate_runners_tags(runner_list)
@@ -328,47 +681,77 @@ class GitlabAPI:
         for runner in runners:
             if isinstance(runner.tag_list, ContentTypeError):
                 raise Exception("Wrong Gitlab Credentials or try to use VPN")
+            if isinstance(runner.tag_list, Exception):
+                raise RuntimeError(
+                    f"Tags of runner {runner.id} cannot be fetched because of {runner.tag_list}"
+                )
 
-    async def assign_tags_to_runners(self, runners: List[ProjectRunner]) -> List[List]:
-        async with aiohttp.ClientSession() as session:
-            tasks = []
-            for runner in runners:
-                task = self.get_runners_tag_list(runner, session)
-                tasks.append(task)
-            runners_tags = await asyncio.gather(*tasks, return_exceptions=True)
-            return runners_tags
+    async def assign_tags_to_runners(self, runners: List[Runner]) -> List[List]:
+        session = await self.get_aiohttp_session()
+        tasks = []
+        for runner in runners:
+            task = self.get_runners_tag_list(runner, session)
+            tasks.append(task)
+        runners_tags = await asyncio.gather(*tasks, return_exceptions=True)
+        self.runner_cache.save()
+        return runners_tags
 
     async def get_runners_tag_list(
-        self, runner: ProjectRunner, session: ClientSession
+        self, runner: Runner, session: ClientSession
     ) -> List:
-        runner_id = runner._attrs["id"]
+        """
+        Tags are served from runner_cache while the entry is fresh,
+        stale entries are revalidated with ETag so unchanged runner costs no body transfer
+        """
+        runner_id = runner.id
+        cached = self.runner_cache.get(runner_id)
+        if cached and self.runner_cache.is_fresh(cached):
+            return cached["data"]["tag_list"]
+        headers = dict(self.headers)
+        if cached and cached["etag"]:
+            headers["If-None-Match"] = cached["etag"]
         url = f"{self.server}/api/v4/runners/{runner_id}"
-        async with session.get(url, headers=self.headers) as response:
-            runner_tag_list = await response.json()
-            return runner_tag_list["tag_list"]
+        response = await self.scheduler.request_async(
+            session, "GET", url, headers=headers
+        )
+        if response.status == 304 and cached:
+            self.runner_cache.touch(runner_id)
+            return cached["data"]["tag_list"]
+        # transient failures are already retried, error page has no tags
+        response.raise_for_status()
+        runner_tag_list = await response.json()
+        if response.status == 200:
+            self.runner_cache.put(
+                runner_id, runner_tag_list, response.headers.get("ETag")
+            )
+        return runner_tag_list["tag_list"]
 
     @staticmethod
-    def filter_by_names(runners: List[ProjectRunner], names: List[str]) -> List[int]:
+    def filter_by_names(
+        runners: List[Runner],
+        names: List[str],
+        name_matching: str = NameMatching.SUBSTRING.value,
+    ) -> List[int]:
         if not isinstance(names, list):
             raise RuntimeError(f'"names" must be a list, {type(names)} was passed!')
-        filtered_runners = []
-        for runner in runners:
-            for name in names:
-                if name.lower() in runner.description.lower():
-                    filtered_runners.append(runner)
-        return list(set([runner.id for runner in filtered_runners]))
+        matcher = compile_name_matcher(tuple(names), name_matching)
+        return list(set([runner.id for runner in matcher.filter(runners)]))
 
     @staticmethod
-    def filter_by_names_dict(runners: List[Runner], names: List[str]) -> List[Runner]:
+    def filter_by_names_dict(
+        runners: List[Runner],
+        names: List[str],
+        name_matching: str = NameMatching.SUBSTRING.value,
+    ) -> List[Runner]:
+        """
+        :param runners: runners to filter
+        :param names: name patterns, there is logical OR between them
+        :param name_matching: substring (default), glob or regex
+        :return: matching runners in original order
+        """
         if not isinstance(names, list):
             raise RuntimeError(f'"names" must be a list, {type(names)} was passed!')
-        filtered_runners = []
-        for runner in runners:
-            for name in names:
-                if name.lower() in runner.description.lower():
-                    filtered_runners.append(runner)
-                    break
-        return filtered_runners
+        return compile_name_matcher(tuple(names), name_matching).filter(runners)
 
     def get_projects_filtered_runners_by_name(self, project_id, names):
         projects_runners = self.get_projects_runners(project_id)
@@ -378,18 +761,25 @@ class GitlabAPI:
         ]
 
     def get_projects_filtered_runners_by_tags(
-        self, runners: List[Runner], tags: List[str]
+        self,
+        runners: List[Runner],
+        tags: List[str],
+        runner_index: Optional[RunnerIndex] = None,
     ) -> List[Runner]:
+        """
+        Runner matches if any of its tags contains any of passed tags (case insensitive),
+        tags starting with '=' must be equal to runner tag
+        :param runners: runners to filter
+        :param tags: list of tags
+        :param runner_index: index of runners snapshot which contains runners,
+        it is built from runners if not passed
+        :return: matching runners in original order
+        """
         if not isinstance(tags, list):
             raise RuntimeError(f'"tags" must be a list, {type(tags)} was passed!')
-        filtered_runners = []
-        for runner in runners:
-            for tag in tags:
-                if self.check_if_tag_in_list(tag, runner.tag_list):
-                    filtered_runners.append(runner)
-                    # break to not to duplicate runners
-                    break
-        return filtered_runners
+        if runner_index is None:
+            runner_index = RunnerIndex(runners)
+        return runner_index.filter(runners, tags)
 
     def check_if_tag_in_list(self, tag, list_of_runner_tags):
         new_list_of_tags = [runner_tag.lower() for runner_tag in list_of_runner_tags]
@@ -399,8 +789,33 @@ class GitlabAPI:
                 return True
         return False
 
-    def get_projects_runners(self, project_id):
-        return self.get_project(project_id).runners.list(all=True)
+    def get_projects_runners(
+        self, project_id, tag_lists: Optional[List[List[str]]] = None
+    ) -> List:
+        """
+        :param project_id: id of project
+        :param tag_lists: filters for Gitlab, runner has all tags of any of tag lists (exact names),
+        tag lists are fetched concurrently
+        :return: runners of project, each runner once
+        """
+        # JSON is decoded straight into Runner, python-gitlab objects are not built for listings
+        url = f"{self.server}/api/v4/projects/{project_id}/runners?per_page=100"
+        if not tag_lists:
+            return list(self.iterate_pagination(url, decoding.decode_runners))
+        with ThreadPoolExecutor(
+            max_workers=min(len(tag_lists), self.pagination_workers)
+        ) as executor:
+            listings = executor.map(
+                lambda tag_list: self.handle_pagination(
+                    f"{url}&tag_list={quote(','.join(tag_list))}",
+                    decoding.decode_runners,
+                ),
+                tag_lists,
+            )
+            runners = RunnerSet()
+            for listing in listings:
+                runners |= RunnerSet(listing)
+        return list(runners)
 
     def get_runners_by_tags(self, tags, project_id):
         """
@@ -415,10 +830,10 @@ class GitlabAPI:
         if tags:
             for tag in tags:
                 url = f"{self.server}/api/v4/projects/{project_id}/runners/all?tag_list={tag}&per_page=100"
-                runners += self.handle_pagination(url)
+                runners.extend(self.iterate_pagination(url))
         else:
             url = f"{self.server}/api/v4/runners/all?per_page=100"
-            runners = self.handle_pagination(url)
+            runners.extend(self.iterate_pagination(url))
         return runners
 
     @staticmethod
@@ -427,44 +842,221 @@ class GitlabAPI:
             return ""
         return ",".join(tags)
 
-    def handle_pagination(self, url):
-        response = requests.get(url, headers=self.headers)
-        data = response.json()
-        link, state = [x.split(";") for x in response.headers["Link"].split(",")][0]
-        link = link.strip()
-        while "next" in state:
-            response = requests.get(link[1:-1], headers=self.headers)
-            data += response.json()
-            link, state = [x.split(";") for x in response.headers["Link"].split(",")][1]
-            link = link.strip()
-        return data
+    def handle_pagination(
+        self, url, decode: Callable[[bytes], List] = decoding.loads
+    ) -> List:
+        """
+        Function fetches all pages of a listing endpoint.
+        Endpoints from KEYSET_PAGINATION_ENDPOINTS are walked with keyset pagination.
+        Otherwise if GitLab reports the number of pages (X-Total-Pages or X-Total) the remaining
+        pages are fetched concurrently, else the "next" links are followed one by one.
+        :param url: url of the first page
+        :param decode: turns body of page into list of items, e.g. decoding.decode_runners
+        :return: list of items from all pages
+        """
+        return list(self.iterate_pagination(url, decode))
+
+    def iterate_pagination(
+        self, url, decode: Callable[[bytes], List] = decoding.loads
+    ) -> Iterator:
+        """
+        Streaming version of handle_pagination, yields items page by page as they arrive.
+        At most pagination_workers pages are in flight, so memory stays flat for long listings.
+        :param url: url of the first page
+        :return: generator of items
+        """
+        keyset_url = self.get_keyset_url(url)
+        response = self.session.get(keyset_url)
+        if keyset_url != url and response.status_code in (400, 405):
+            # older GitLab versions reject keyset parameters, fall back to offset pagination
+            response = self.session.get(url)
+        # error page is not a page of the listing, it may have no Link header or JSON body
+        response.raise_for_status()
+        yield from decode(response.content)
+        total_pages = self.get_total_pages(response)
+        if total_pages is None:
+            next_url = self.get_next_link(response)
+            while next_url:
+                response = self.session.get(next_url)
+                response.raise_for_status()
+                yield from decode(response.content)
+                next_url = self.get_next_link(response)
+            return
+        urls = (self.get_page_url(url, page) for page in range(2, total_pages + 1))
+        with ThreadPoolExecutor(max_workers=self.pagination_workers) as executor:
+            pending = deque(
+                executor.submit(self.get_page, page_url, decode)
+                for page_url in islice(urls, self.pagination_workers)
+            )
+            try:
+                while pending:
+                    page_data = pending.popleft().result()
+                    for page_url in islice(urls, 1):
+                        pending.append(executor.submit(self.get_page, page_url, decode))
+                    yield from page_data
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    async def aiterate_pagination(
+        self,
+        url,
+        session: ClientSession,
+        decode: Callable[[bytes], List] = decoding.loads,
+    ) -> AsyncIterator:
+        """
+        Asynchronous version of iterate_pagination which uses aiohttp session
+        :param url: url of the first page
+        :param session: aiohttp session
+        :param decode: turns body of page into list of items
+        :return: async generator of items
+        """
+        keyset_url = self.get_keyset_url(url)
+        response = await self.scheduler.request_async(
+            session, "GET", keyset_url, headers=self.headers
+        )
+        if keyset_url != url and response.status in (400, 405):
+            response = await self.scheduler.request_async(
+                session, "GET", url, headers=self.headers
+            )
+        response.raise_for_status()
+        for item in decode(await response.read()):
+            yield item
+        total_pages = self.get_total_pages(response)
+        next_url = self.get_next_link(response)
+        if total_pages is None:
+            while next_url:
+                response = await self.scheduler.request_async(
+                    session, "GET", next_url, headers=self.headers
+                )
+                response.raise_for_status()
+                for item in decode(await response.read()):
+                    yield item
+                next_url = self.get_next_link(response)
+            return
+        urls = (self.get_page_url(url, page) for page in range(2, total_pages + 1))
+        pending = deque(
+            asyncio.ensure_future(self.get_page_async(page_url, session, decode))
+            for page_url in islice(urls, self.pagination_workers)
+        )
+        try:
+            while pending:
+                page_data = await pending.popleft()
+                for page_url in islice(urls, 1):
+                    pending.append(
+                        asyncio.ensure_future(
+                            self.get_page_async(page_url, session, decode)
+                        )
+                    )
+                for item in page_data:
+                    yield item
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def get_page_async(
+        self,
+        url,
+        session: ClientSession,
+        decode: Callable[[bytes], List] = decoding.loads,
+    ) -> List:
+        response = await self.scheduler.request_async(
+            session, "GET", url, headers=self.headers
+        )
+        response.raise_for_status()
+        return decode(await response.read())
+
+    def get_page(self, url, decode: Callable[[bytes], List] = decoding.loads) -> List:
+        response = self.session.get(url)
+        response.raise_for_status()
+        return decode(response.content)
+
+    @staticmethod
+    def get_total_pages(response) -> Optional[int]:
+        """
+        GitLab omits the totals headers for very large collections,
+        in that case None is returned and the caller has to follow "next" links
+        """
+        total_pages = response.headers.get("X-Total-Pages")
+        if total_pages:
+            return int(total_pages)
+        total = response.headers.get("X-Total")
+        per_page = response.headers.get("X-Per-Page")
+        if total and per_page:
+            return math.ceil(int(total) / int(per_page))
+        return None
+
+    @staticmethod
+    def get_next_link(response) -> Optional[str]:
+        next_url = response.links.get("next", {}).get("url")
+        return str(next_url) if next_url else None
+
+    @staticmethod
+    def get_keyset_url(url: str) -> str:
+        """
+        Keyset pagination costs the same for every page, offset pagination gets slower
+        the deeper it goes, so it is used wherever the endpoint supports it
+        :param url: url of the first page
+        :return: url with keyset parameters or unchanged url
+        """
+        scheme, netloc, path, query, fragment = urlsplit(url)
+        params = parse_qsl(query)
+        if any(key in ("pagination", "page") for key, value in params):
+            return url
+        for endpoint, keyset_params in KEYSET_PAGINATION_ENDPOINTS.items():
+            if endpoint.search(path):
+                passed_keys = {key for key, value in params}
+                params.append(("pagination", "keyset"))
+                for key, value in keyset_params.items():
+                    if key not in passed_keys:
+                        params.append((key, value))
+                return urlunsplit((scheme, netloc, path, urlencode(params), fragment))
+        return url
+
+    @staticmethod
+    def get_page_url(url: str, page: int) -> str:
+        scheme, netloc, path, query, fragment = urlsplit(url)
+        params = [(key, value) for key, value in parse_qsl(query) if key != "page"]
+        params.append(("page", str(page)))
+        return urlunsplit((scheme, netloc, path, urlencode(params), fragment))
 
     def get_project(self, id):
         try:
             return self.gl.projects.get(id)
         except TypeError as e:
-            print(e)
-            print("Wrong Gitlab Credentials or try to use VPN")
+            raise RuntimeError(
+                f"Wrong Gitlab Credentials or try to use VPN ({e})"
+            ) from e
 
     def list_all_projects(self):
         try:
-            return self.gl.projects.list(all=True)
+            return self.gl.projects.list(
+                all=True, pagination="keyset", order_by="id", sort="asc"
+            )
         except TypeError as e:
-            print(e)
-            print("Wrong Gitlab Credentials or try to use VPN")
+            raise RuntimeError(
+                f"Wrong Gitlab Credentials or try to use VPN ({e})"
+            ) from e
 
     def list_all_runners(self):
         try:
             return self.gl.runners.list(all=True)
         except TypeError as e:
-            print(e)
-            print("Wrong Gitlab Credentials or try to use VPN")
+            raise RuntimeError(
+                f"Wrong Gitlab Credentials or try to use VPN ({e})"
+            ) from e
 
     def assign_active_jobs_to_runners(
         self, runners: List[Runner], project_id: str
     ) -> List[Runner]:
         jobs = self.get_running_jobs_from_project(project_id)
         counted_jobs_for_runners = self.count_jobs_for_runners(jobs)
+        return self.set_active_jobs(runners, counted_jobs_for_runners)
+
+    @staticmethod
+    def set_active_jobs(
+        runners: List[Runner], counted_jobs_for_runners: Dict[int, int]
+    ) -> List[Runner]:
         for runner in runners:
             if runner.id in counted_jobs_for_runners:
                 runner.active_jobs = counted_jobs_for_runners[runner.id]
@@ -472,12 +1064,15 @@ class GitlabAPI:
                 runner.active_jobs = 0
         return runners
 
-    def get_running_jobs_from_project(self, project_id):
+    def get_running_jobs_from_project(self, project_id) -> Iterator[Dict]:
         url = f"{self.server}/api/v4/projects/{project_id}/jobs?scope[]=running&per_page=100"
-        return self.handle_pagination(url)
+        return self.iterate_pagination(url)
 
     @staticmethod
-    def count_jobs_for_runners(jobs):
+    def count_jobs_for_runners(jobs: Iterable[Dict]) -> Dict[int, int]:
+        """
+        Jobs may be a generator, they are counted while next pages are still being fetched
+        """
         counted_jobs = {}  # number in dict is equal to runner id
         for job in jobs:
             if job["runner"]["id"] in counted_jobs:
@@ -486,6 +1081,26 @@ class GitlabAPI:
                 counted_jobs[job["runner"]["id"]] = 1
         return counted_jobs
 
+    async def count_running_jobs_async(
+        self, project_id, session: ClientSession
+    ) -> Dict[int, int]:
+        url = f"{self.server}/api/v4/projects/{project_id}/jobs?scope[]=running&per_page=100"
+        counted_jobs = {}
+        async for runner_id in self.aiterate_pagination(
+            url, session, decoding.decode_job_runner_ids
+        ):
+            counted_jobs[runner_id] = counted_jobs.get(runner_id, 0) + 1
+        return counted_jobs
+
+    async def get_project_name_async(self, project_id, session: ClientSession) -> str:
+        url = f"{self.server}/api/v4/projects/{project_id}"
+        response = await self.scheduler.request_async(
+            session, "GET", url, headers=self.headers
+        )
+        response.raise_for_status()
+        project = await response.json()
+        return project["name"]
+
     def change_runners_dict_status(
         self, runners: List[Runner], status: bool
     ) -> List[Runner]:
@@ -495,25 +1110,74 @@ class GitlabAPI:
         :param status: True (Resume) / False (Pause)
         :return: List of runners [dict]
         """
+        return self.run_async(self.change_runners_status(runners, status))
+
+    async def change_runners_status(
+        self, runners: List[Runner], status: bool
+    ) -> List[Runner]:
+        """
+        Runners are updated concurrently, at most max_concurrent_requests at the same time.
+        Results are printed as soon as each request completes.
+        """
         payload = {"active": status}
-        for runner in runners:
+        action = "resumed" if status else "paused"
+        semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+        failed = 0
+        session = await self.get_aiohttp_session()
+        tasks = [
+            self.update_runner(runner, payload, session, semaphore)
+            for runner in runners
+        ]
+        for task in asyncio.as_completed(tasks):
+            runner, err = await task
+            if err:
+                failed += 1
+                print(f"Runner {runner.id} cannot be {action} because of {err}")
+                continue
+            runner.status = "online" if status else "paused"
+            print(f"Runner id: {runner.id} is {action}")
+        print(f"{len(runners) - failed} runners {action}, {failed} failed")
+        self.runner_cache.save()
+        return runners
+
+    async def update_runner(
+        self,
+        runner: Runner,
+        payload: Dict,
+        session: ClientSession,
+        semaphore: asyncio.Semaphore,
+    ):
+        """
+        Function sends PUT request with payload for the runner.
+        PUT is idempotent, throttled request waits in the scheduler
+        and transient failures are retried by its retry policy.
+        :return: tuple of runner and exception (None if request succeeded)
+        """
+        url = f"{self.server}/api/v4/runners/{runner.id}"
+        async with semaphore:
             try:
-                url = f"{self.server}/api/v4/runners/{runner.id}"
-                response = requests.put(url, headers=self.headers, data=payload)
+                response = await self.scheduler.request_async(
+                    session, "PUT", url, retry=True, headers=self.headers, json=payload
+                )
                 response.raise_for_status()
-                if status:
-                    runner.status = "online"
-                    print(f"Runner id: {runner.id} is resumed")
-                else:
-                    runner.status = "paused"
-                    print(f"Runner id: {runner.id} is paused")
+                await self.cache_updated_runner(runner.id, response)
             except Exception as err:
-                if status:
-                    print(f"Runner {runner.id} cannot be resumed because of {err}")
-                else:
-                    print(f"Runner {runner.id} cannot be paused because of {err}")
+                return runner, err
+        return runner, None
 
-        return runners
+    async def cache_updated_runner(self, runner_id: int, response):
+        """
+        Gitlab answers PUT with details of the runner after the change,
+        they replace cached details, otherwise the cached runner is dropped
+        """
+        try:
+            runner_details = await response.json()
+        except (ContentTypeError, ValueError):
+            runner_details = None
+        if isinstance(runner_details, dict) and "tag_list" in runner_details:
+            self.runner_cache.put(runner_id, runner_details, None)
+        else:
+            self.runner_cache.evict(runner_id)
 
     def change_runners_dict_tags(
         self, runners_after_changes: List[Runner]
@@ -523,13 +1187,42 @@ class GitlabAPI:
         :param runners_after_changes: List of runners [dict]
         :return: List of runners [dict]
         """
-        for runner in runners_after_changes:
-            try:
-                url = f"{self.server}/api/v4/runners/{runner.id}"
-                payload = {"tag_list": ",".join(runner.tag_list)}
-                response = requests.put(url, headers=self.headers, data=payload)
-                response.raise_for_status()
-                print(f"Runner id: {runner.id} tags changed.")
-            except Exception as err:
+        return self.run_async(self.change_runners_tags(runners_after_changes))
+
+    async def change_runners_tags(
+        self, runners_after_changes: List[Runner]
+    ) -> List[Runner]:
+        """
+        Runners are retagged concurrently, at most max_concurrent_requests at the same time.
+        At the end user gets the list of runners which did and did not change.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+        changed, not_changed = [], []
+        session = await self.get_aiohttp_session()
+        tasks = [
+            self.update_runner(
+                runner, {"tag_list": ",".join(runner.tag_list)}, session, semaphore
+            )
+            for runner in runners_after_changes
+        ]
+        for task in asyncio.as_completed(tasks):
+            runner, err = await task
+            if err:
+                not_changed.append(runner)
                 print(f"Runner {runner.id} cannot be changed because of {err}")
+            else:
+                changed.append(runner)
+                print(f"Runner id: {runner.id} tags changed.")
+        self.inform_user_about_commit(changed, not_changed)
+        self.runner_cache.save()
         return runners_after_changes
+
+    @staticmethod
+    def inform_user_about_commit(changed: List[Runner], not_changed: List[Runner]):
+        print(f"Tags changed for {len(changed)} runners:")
+        for runner in sorted(changed, key=lambda i: i.description):
+            print(f"  {runner.description} (id: {runner.id})")
+        if not_changed:
+            print(f"Tags NOT changed for {len(not_changed)} runners:")
+            for runner in sorted(not_changed, key=lambda i: i.description):
+                print(f"  {runner.description} (id: {runner.id})")
@@ -0,0 +1,52 @@
+"""
+JSON from Gitlab is decoded with the fastest library installed:
+orjson, or json from the standard library.
+"""
+import json
+from typing import Any, List
+
+from gitlab_cli_tool.models import Runner, runner_from_json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# brotli is requested only when urllib3 and aiohttp can decode it
+try:
+    import brotli  # noqa: F401
+
+    BROTLI = True
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+
+        BROTLI = True
+    except ImportError:
+        BROTLI = False
+
+ACCEPT_ENCODING = "gzip, deflate, br" if BROTLI else "gzip, deflate"
+
+JSON_BACKEND = "orjson" if orjson is not None else "json"
+
+
+def loads(data: bytes, backend: str = JSON_BACKEND) -> Any:
+    if backend == "orjson":
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def decode_runners(data: bytes, backend: str = JSON_BACKEND) -> List[Runner]:
+    """
+    :param data: body of runners listing or list of runners details
+    """
+    return [runner_from_json(runner) for runner in loads(data, backend)]
+
+
+def decode_job_runner_ids(data: bytes, backend: str = JSON_BACKEND) -> List[int]:
+    """
+    Jobs are big (pipeline, commit, user...), only ids of their runners are needed
+    :param data: body of jobs listing
+    :return: id of runner of every job which has one
+    """
+    return [job["runner"]["id"] for job in loads(data, backend) if job.get("runner")]
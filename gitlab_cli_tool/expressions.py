@@ -0,0 +1,369 @@
+"""
+Filter expressions, e.g. 'tag:atf AND name:qa-0 AND NOT (tag:ios13 OR status:paused)'
+
+Terms:
+    name:<pattern>  runner name matches pattern (see NameMatching)
+    tag:<part>      any of runner tags contains part (case insensitive)
+    tag:=<tag>      runner has exactly this tag, can be pushed down to Gitlab (tag_list=)
+    status:<status> runner status equals status, e.g. online, paused
+Operators: NOT, AND, OR (in order of precedence) and parentheses.
+--name, --tag and --ignore are turned into the same expressions, see any_of.
+"""
+import re
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Set, Tuple, Union
+
+from gitlab_cli_tool.filters import (
+    EXACT_TAG_PREFIX,
+    RunnerIndex,
+    compile_name_matcher,
+)
+from gitlab_cli_tool.models import NameMatching
+from gitlab_cli_tool.table import RunnerTable
+
+FIELDS = ("name", "tag", "status")
+# fields available in the runners listing, tag needs details of every runner
+LISTING_FIELDS = ("name", "status")
+# at most that many listings of runners by exact tags are asked from Gitlab for AND of ORs
+MAX_SERVER_TAG_LISTS = 10
+
+TOKEN_REGEX = re.compile(r'\s*(\(|\)|[^\s()":]+:=?(?:"[^"]*"|[^\s()]+)|[^\s()]+)')
+
+
+@dataclass
+class Term:
+    field: str
+    value: str
+    exact: bool = False
+
+
+@dataclass
+class Not:
+    operand: "Node"
+
+
+@dataclass
+class And:
+    operands: List["Node"]
+
+
+@dataclass
+class Or:
+    operands: List["Node"]
+
+
+Node = Union[Term, Not, And, Or]
+
+
+def tokenize(expression: str) -> List[str]:
+    tokens = []
+    position = 0
+    expression = expression.rstrip()
+    while position < len(expression):
+        match = TOKEN_REGEX.match(expression, position)
+        if not match:
+            raise RuntimeError(f"Wrong filter expression near: {expression[position:]}")
+        tokens.append(match.group(1))
+        position = match.end()
+    return tokens
+
+
+class Parser:
+    """
+    Recursive descent parser:
+    or_expr := and_expr (OR and_expr)*
+    and_expr := not_expr (AND not_expr)*
+    not_expr := NOT not_expr | '(' or_expr ')' | term
+    """
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        self.tokens = tokenize(expression)
+        self.position = 0
+
+    def parse(self) -> Node:
+        if not self.tokens:
+            raise RuntimeError("Filter expression is empty")
+        node = self.parse_or()
+        if self.position != len(self.tokens):
+            self.error()
+        return node
+
+    def error(self):
+        near = " ".join(self.tokens[self.position :]) or "end of expression"
+        raise RuntimeError(
+            f"Wrong filter expression '{self.expression}' near: {near}. "
+            "HINT: tag:atf AND name:qa-0 AND NOT tag:ios13"
+        )
+
+    def peek(self) -> Optional[str]:
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None
+
+    def accept(self, keyword: str) -> bool:
+        token = self.peek()
+        if token is not None and token.upper() == keyword:
+            self.position += 1
+            return True
+        return False
+
+    def parse_or(self) -> Node:
+        operands = [self.parse_and()]
+        while self.accept("OR"):
+            operands.append(self.parse_and())
+        return operands[0] if len(operands) == 1 else Or(operands)
+
+    def parse_and(self) -> Node:
+        operands = [self.parse_not()]
+        while self.accept("AND"):
+            operands.append(self.parse_not())
+        return operands[0] if len(operands) == 1 else And(operands)
+
+    def parse_not(self) -> Node:
+        if self.accept("NOT"):
+            return Not(self.parse_not())
+        if self.accept("("):
+            node = self.parse_or()
+            if not self.accept(")"):
+                self.error()
+            return node
+        return self.parse_term()
+
+    def parse_term(self) -> Term:
+        token = self.peek()
+        if token is None or ":" not in token:
+            self.error()
+        field, value = token.split(":", 1)
+        field = field.lower()
+        exact = value.startswith("=")
+        value = value[1:] if exact else value
+        value = value.strip('"')
+        if field not in FIELDS or not value or (exact and field != "tag"):
+            self.error()
+        self.position += 1
+        return Term(field, value, exact)
+
+
+def parse(expression: str) -> Node:
+    return Parser(expression).parse()
+
+
+def any_of(field: str, values: List[str]) -> Optional[Node]:
+    """
+    Values of --name or --tag, there is logical OR between them,
+    tags starting with '=' are exact, e.g. ['=atf', 'ios'] -> (tag:=atf OR tag:ios)
+    """
+    terms = []
+    for value in values:
+        exact = field == "tag" and value.startswith(EXACT_TAG_PREFIX)
+        terms.append(
+            Term(field, value[len(EXACT_TAG_PREFIX) :] if exact else value, exact)
+        )
+    return join_or(terms)
+
+
+def describe(node: Node) -> str:
+    if isinstance(node, Term):
+        return f"{node.field}:{'=' if node.exact else ''}{node.value}"
+    if isinstance(node, Not):
+        return f"NOT {describe(node.operand)}"
+    operator = " AND " if isinstance(node, And) else " OR "
+    return "(" + operator.join(describe(operand) for operand in node.operands) + ")"
+
+
+def conjuncts(node: Node) -> List[Node]:
+    return node.operands if isinstance(node, And) else [node]
+
+
+def fields(node: Node) -> Set[str]:
+    if isinstance(node, Term):
+        return {node.field}
+    if isinstance(node, Not):
+        return fields(node.operand)
+    return set().union(*(fields(operand) for operand in node.operands))
+
+
+def split_by_data(node: Node) -> Tuple[Optional[Node], Optional[Node]]:
+    """
+    Top level AND is split into the part which can be evaluated on the runners listing
+    and the part which needs runners details (tags)
+    :return: listing part, details part (None if empty)
+    """
+    listing, details = [], []
+    for operand in conjuncts(node):
+        if fields(operand) <= set(LISTING_FIELDS):
+            listing.append(operand)
+        else:
+            details.append(operand)
+    return join_and(listing), join_and(details)
+
+
+def join_and(operands: List[Node]) -> Optional[Node]:
+    """
+    Nested ANDs are flattened, so split_by_data sees all of their operands
+    """
+    operands = [conjunct for operand in operands for conjunct in conjuncts(operand)]
+    if not operands:
+        return None
+    return operands[0] if len(operands) == 1 else And(operands)
+
+
+def join_or(operands: List[Node]) -> Optional[Node]:
+    if not operands:
+        return None
+    return operands[0] if len(operands) == 1 else Or(operands)
+
+
+def exact_tag_alternatives(node: Node) -> Optional[List[Set[str]]]:
+    """
+    Sets of exact tags, every matching runner has all tags of at least one of them,
+    so Gitlab can list runners per set (tag_list=) instead of all runners of project
+    :return: None if matching runners cannot be narrowed down by exact tags
+    """
+    if isinstance(node, Term):
+        return [{node.value}] if node.field == "tag" and node.exact else None
+    if isinstance(node, Or):
+        alternatives = []
+        for operand in node.operands:
+            operand_alternatives = exact_tag_alternatives(operand)
+            if operand_alternatives is None:
+                return None
+            alternatives += operand_alternatives
+        return unique(alternatives)
+    if isinstance(node, And):
+        alternatives = None
+        for operand in node.operands:
+            operand_alternatives = exact_tag_alternatives(operand)
+            if operand_alternatives is None:
+                continue
+            if alternatives is None:
+                alternatives = operand_alternatives
+            elif len(alternatives) * len(operand_alternatives) <= MAX_SERVER_TAG_LISTS:
+                alternatives = [
+                    tags | operand_tags
+                    for tags in alternatives
+                    for operand_tags in operand_alternatives
+                ]
+            elif len(operand_alternatives) < len(alternatives):
+                # the narrowest requirement which keeps the number of listings small
+                alternatives = operand_alternatives
+        return unique(alternatives) if alternatives is not None else None
+    return None
+
+
+def unique(tag_sets: List[Set[str]]) -> List[Set[str]]:
+    seen = set()
+    result = []
+    for tags in tag_sets:
+        if frozenset(tags) not in seen:
+            seen.add(frozenset(tags))
+            result.append(tags)
+    return result
+
+
+def compile_predicate(
+    node: Node,
+    name_matching: str = NameMatching.SUBSTRING.value,
+    runner_index: Optional[RunnerIndex] = None,
+) -> Callable[[object], bool]:
+    """
+    Expression is compiled once into nested closures with field access specialized per term:
+    values are lowercased and patterns compiled here, tag terms become id lookups
+    when index of runners is passed
+    :return: predicate taking a runner
+    """
+    if isinstance(node, Not):
+        operand = compile_predicate(node.operand, name_matching, runner_index)
+        return lambda runner: not operand(runner)
+    if isinstance(node, And):
+        operands = [
+            compile_predicate(operand, name_matching, runner_index)
+            for operand in node.operands
+        ]
+        return lambda runner: all(operand(runner) for operand in operands)
+    if isinstance(node, Or) and all(
+        isinstance(operand, Term) and operand.field == "name"
+        for operand in node.operands
+    ):
+        # one matcher for all names, e.g. of --name, every name is scanned once
+        matcher = compile_name_matcher(
+            tuple(operand.value for operand in node.operands), name_matching
+        )
+        return lambda runner: matcher.matches(runner.description)
+    if isinstance(node, Or):
+        operands = [
+            compile_predicate(operand, name_matching, runner_index)
+            for operand in node.operands
+        ]
+        return lambda runner: any(operand(runner) for operand in operands)
+    return compile_term(node, name_matching, runner_index)
+
+
+def compile_term(
+    term: Term, name_matching: str, runner_index: Optional[RunnerIndex]
+) -> Callable[[object], bool]:
+    value = term.value.lower()
+    if term.field == "name":
+        matcher = compile_name_matcher((term.value,), name_matching)
+        return lambda runner: matcher.matches(runner.description)
+    if term.field == "status":
+        return lambda runner: runner.status == value
+    if runner_index is not None:
+        if term.exact:
+            runner_ids = runner_index.runner_ids_by_tag.get(value, set())
+        else:
+            runner_ids = runner_index.find_runner_ids([value])
+        return lambda runner: runner.id in runner_ids
+    if term.exact:
+        return lambda runner: any(tag.lower() == value for tag in runner.tag_list)
+    return lambda runner: any(value in tag.lower() for tag in runner.tag_list)
+
+
+def select_rows(
+    node: Node,
+    table: RunnerTable,
+    name_matching: str = NameMatching.SUBSTRING.value,
+) -> List[int]:
+    """
+    Expression evaluated on columns of the table instead of runner by runner
+    :return: matching rows in table order
+    """
+    return sorted(rows_of(node, table, name_matching))
+
+
+def rows_of(node: Node, table: RunnerTable, name_matching: str) -> Set[int]:
+    if isinstance(node, Not):
+        return set(range(len(table))) - rows_of(node.operand, table, name_matching)
+    if isinstance(node, And):
+        rows = rows_of(node.operands[0], table, name_matching)
+        for operand in node.operands[1:]:
+            if not rows:
+                break
+            rows &= rows_of(operand, table, name_matching)
+        return rows
+    if isinstance(node, Or):
+        if all(isinstance(operand, Term) for operand in node.operands):
+            fields = {operand.field for operand in node.operands}
+            # one scan of the column for all values, e.g. of --name or --tag
+            if fields == {"name"}:
+                matcher = compile_name_matcher(
+                    tuple(operand.value for operand in node.operands), name_matching
+                )
+                return set(table.rows_with_names(matcher))
+            if fields == {"tag"}:
+                return set(table.rows_with_tags([tag_query(o) for o in node.operands]))
+        rows = set()
+        for operand in node.operands:
+            rows |= rows_of(operand, table, name_matching)
+        return rows
+    if node.field == "name":
+        matcher = compile_name_matcher((node.value,), name_matching)
+        return set(table.rows_with_names(matcher))
+    if node.field == "status":
+        return set(table.rows_with_status(node.value.lower()))
+    return set(table.rows_with_tags([tag_query(node)]))
+
+
+def tag_query(term: Term) -> str:
+    return EXACT_TAG_PREFIX + term.value if term.exact else term.value
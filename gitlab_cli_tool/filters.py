@@ -0,0 +1,181 @@
+import fnmatch
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+from gitlab_cli_tool.models import Runner, NameMatching
+
+# tags are indexed by all their substrings up to this length
+NGRAM_SIZE = 3
+# tag query starting with it matches only equal tags, e.g. '=atf'
+EXACT_TAG_PREFIX = "="
+
+
+class RunnerIndex:
+    """
+    Inverted index of runners tags, built once per fleet snapshot.
+    Maps normalized (lowercase) tags to runner ids, substring lookups
+    go through n-grams of tags, so only candidate tags are checked instead of
+    every tag of every runner.
+    """
+
+    def __init__(self, runners: Iterable[Runner]):
+        self.runner_ids_by_tag: Dict[str, Set[int]] = {}
+        self.tags_by_ngram: Dict[str, Set[str]] = {}
+        # normalized tag -> tag as it was written in the runner
+        self.tags: Dict[str, str] = {}
+        for runner in runners:
+            for tag in runner.tag_list:
+                normalized_tag = tag.lower()
+                runner_ids = self.runner_ids_by_tag.get(normalized_tag)
+                if runner_ids is None:
+                    runner_ids = self.runner_ids_by_tag[normalized_tag] = set()
+                    self.tags[normalized_tag] = tag
+                    for ngram in self.ngrams(normalized_tag):
+                        self.tags_by_ngram.setdefault(ngram, set()).add(normalized_tag)
+                runner_ids.add(runner.id)
+
+    @staticmethod
+    def ngrams(text: str) -> Set[str]:
+        return {
+            text[start : start + size]
+            for size in range(1, NGRAM_SIZE + 1)
+            for start in range(len(text) - size + 1)
+        }
+
+    def find_tags(self, substring: str) -> Set[str]:
+        """
+        :param substring: part of tag, case insensitive, or whole tag prefixed with '='
+        :return: normalized tags which contain substring
+        """
+        query = substring.lower()
+        if query.startswith(EXACT_TAG_PREFIX):
+            query = query[len(EXACT_TAG_PREFIX) :]
+            return {query} if query in self.runner_ids_by_tag else set()
+        if not query:
+            return set(self.runner_ids_by_tag)
+        if len(query) <= NGRAM_SIZE:
+            return set(self.tags_by_ngram.get(query, ()))
+        tag_sets = sorted(
+            (
+                self.tags_by_ngram.get(query[start : start + NGRAM_SIZE], set())
+                for start in range(len(query) - NGRAM_SIZE + 1)
+            ),
+            key=len,
+        )
+        candidates = set.intersection(*tag_sets)
+        return {tag for tag in candidates if query in tag}
+
+    def find_runner_ids(self, substrings: List[str]) -> Set[int]:
+        """
+        There is logical OR between substrings
+        """
+        runner_ids = set()
+        for substring in substrings:
+            for tag in self.find_tags(substring):
+                runner_ids |= self.runner_ids_by_tag[tag]
+        return runner_ids
+
+    def filter(self, runners: List[Runner], substrings: List[str]) -> List[Runner]:
+        """
+        :param runners: runners from the indexed snapshot (or its subset)
+        :param substrings: parts of tags, runner matches if any of its tags contains any of them
+        :return: matching runners in their original order
+        """
+        runner_ids = self.find_runner_ids(substrings)
+        return [runner for runner in runners if runner.id in runner_ids]
+
+    def complete(self, substring: str) -> List[str]:
+        """
+        Tags containing substring, used for live completion in REPL
+        """
+        if substring.startswith(EXACT_TAG_PREFIX):
+            substring = substring[len(EXACT_TAG_PREFIX) :]
+            return sorted(
+                EXACT_TAG_PREFIX + self.tags[tag] for tag in self.find_tags(substring)
+            )
+        return sorted(self.tags[tag] for tag in self.find_tags(substring))
+
+
+class RunnerSet:
+    """
+    Runners keyed by id with insertion order kept.
+    Membership is O(1) and compares only ids instead of every field of the dataclass,
+    so set operations on big fleets are linear.
+    """
+
+    def __init__(self, runners: Iterable = ()):
+        self.runners = {runner.id: runner for runner in runners}
+
+    def __contains__(self, runner) -> bool:
+        return runner.id in self.runners
+
+    def __iter__(self) -> Iterator:
+        return iter(self.runners.values())
+
+    def __len__(self) -> int:
+        return len(self.runners)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, RunnerSet) and list(self) == list(other)
+
+    def union(self, other: "RunnerSet") -> "RunnerSet":
+        result = RunnerSet(self)
+        for runner in other:
+            result.runners.setdefault(runner.id, runner)
+        return result
+
+    def intersection(self, other: "RunnerSet") -> "RunnerSet":
+        return RunnerSet(runner for runner in self if runner in other)
+
+    def difference(self, other: "RunnerSet") -> "RunnerSet":
+        return RunnerSet(runner for runner in self if runner not in other)
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
+
+
+class NameMatcher:
+    """
+    Name patterns compiled once into one case insensitive regular expression,
+    so every description is scanned once for all patterns
+    instead of once per pattern.
+    """
+
+    def __init__(self, patterns: List[str], mode: str = NameMatching.SUBSTRING.value):
+        self.patterns = patterns
+        self.mode = mode
+        alternatives = [self.translate(pattern, mode) for pattern in patterns]
+        try:
+            self.regex = (
+                re.compile("|".join(alternatives), re.IGNORECASE)
+                if alternatives
+                else None
+            )
+        except re.error as e:
+            raise RuntimeError(f"Wrong name pattern {patterns}: {e}")
+
+    @staticmethod
+    def translate(pattern: str, mode: str) -> str:
+        if mode == NameMatching.GLOB.value:
+            return f"(?:^{fnmatch.translate(pattern)})"
+        elif mode == NameMatching.REGEX.value:
+            return f"(?:{pattern})"
+        return re.escape(pattern)
+
+    def matches(self, description: str) -> bool:
+        return self.regex is not None and self.regex.search(description) is not None
+
+    def filter(self, runners: Iterable) -> List:
+        return [runner for runner in runners if self.matches(runner.description)]
+
+
+@lru_cache(maxsize=32)
+def compile_name_matcher(
+    patterns: Tuple[str, ...], mode: str = NameMatching.SUBSTRING.value
+) -> NameMatcher:
+    """
+    The same patterns are compiled only once, e.g. when REPL repeats a command
+    """
+    return NameMatcher(list(patterns), mode)
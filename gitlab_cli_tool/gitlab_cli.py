@@ -2,7 +2,22 @@
 import argparse
 import sys
 
-from gitlab_cli_tool.cli_api import GitLabDataFilter, PropertyName, Actions
+from gitlab_cli_tool import __version__
+from gitlab_cli_tool.models import PropertyName, Actions, Backend, NameMatching
+from gitlab_cli_tool.timings import timer, IMPORT
+
+
+def positive_int(value: str) -> int:
+    """
+    argparse type of counts which must be at least 1
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{value!r} is not a whole number")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
 
 
 class GitLabCLI:
@@ -14,10 +29,28 @@ class GitLabCLI:
         self.branch = ""
         self.variables = []
         self.ignore = []
+        self.filter_expression = None
+        self.concurrency = None
+        self.cache_ttl = None
+        self.refresh = False
+        self.backend = Backend.REST.value
+        self.no_jobs = False
+        self.explain = False
+        self.name_matching = NameMatching.SUBSTRING.value
+        self.profile = False
+        self.trace = None
+        self.trace_format = "json"
+        # kept between commands, so REPL reuses credentials and open connections
+        self.secrets = None
+        self.api = None
+        self.runner_index = None
 
     @staticmethod
     def parse_args(args):
         parser = argparse.ArgumentParser(description="CLI for GitLab, to exit CTRL + D")
+        parser.add_argument(
+            "--version", action="version", version=f"%(prog)s {__version__}"
+        )
 
         parser.add_argument(
             "property_name",
@@ -47,6 +80,67 @@ class GitLabCLI:
             help="Ignore  runners, first specify if ignore by 'name' or 'tag', example 'runners list --name qa01 --ignore tag qa01-1'",
             nargs="+",
         )
+        parser.add_argument(
+            "-f",
+            "--filter",
+            help="Filtering by expression of name:, tag:, tag:= and status: terms with AND, OR, NOT, "
+            "e.g. 'runners list --filter \"tag:atf AND name:qa-0 AND NOT tag:ios13\"'",
+        )
+        parser.add_argument(
+            "-c",
+            "--concurrency",
+            help="Maximum number of runners changed at the same time by pause, resume and retag",
+            type=positive_int,
+        )
+        parser.add_argument(
+            "--cache-ttl",
+            help="For how many seconds cached runner details are used without asking Gitlab (default 3600)",
+            type=int,
+        )
+        parser.add_argument(
+            "--refresh",
+            help="Revalidate all cached runner details with Gitlab",
+            action="store_true",
+        )
+        parser.add_argument(
+            "--backend",
+            help="Source of runners data, 'auto' uses GraphQL when Gitlab supports it",
+            choices=[backend.value for backend in Backend],
+            default=Backend.REST.value,
+        )
+        parser.add_argument(
+            "-m",
+            "--match",
+            help="How names from --name and --ignore name are matched with runners names, "
+            "e.g. 'runners list --match regex --name qa-0[1-4].*'",
+            choices=[name_matching.value for name_matching in NameMatching],
+            default=NameMatching.SUBSTRING.value,
+        )
+        parser.add_argument(
+            "--no-jobs",
+            help="Hide ACTIVE JOBS column, running jobs of the project are not fetched",
+            action="store_true",
+        )
+        parser.add_argument(
+            "--explain",
+            help="Print requests planned for the command instead of running it",
+            action="store_true",
+        )
+        parser.add_argument(
+            "--profile",
+            help="Print requests per endpoint with their latency, time of filtering and rendering",
+            action="store_true",
+        )
+        parser.add_argument(
+            "--trace",
+            help="Save spans of all requests of the command to file, e.g. 'runners list --trace spans.json'",
+        )
+        parser.add_argument(
+            "--trace-format",
+            help="Format of --trace file, otlp is JSON of OpenTelemetry protocol",
+            choices=["json", "otlp"],
+            default="json",
+        )
         return parser.parse_args(args)
 
     def check_variables(self):
@@ -57,15 +151,15 @@ class GitLabCLI:
 
     def check_filters(self):
         # TODO check all combination, write function for checking that. Maybe group arguments together
-        if self.tags and self.names:
-            print("Tag and names cannot be filtered together")
-            return False
         if self.tags and self.branch:
             print("Tag and branch cannot be filtered together")
             return False
         if self.branch and self.names:
             print("Names and branch cannot be filtered together")
             return False
+        if self.filter_expression and self.branch:
+            print("Filter expression cannot be used together with branch")
+            return False
         # TODO variables need to be associated with pipeline
         if self.variables:
             if not self.check_variables():
@@ -99,11 +193,48 @@ class GitLabCLI:
         )
         self.variables = parsed_args.variables
         self.ignore = parsed_args.ignore
+        self.filter_expression = parsed_args.filter
+        self.concurrency = parsed_args.concurrency
+        self.cache_ttl = parsed_args.cache_ttl
+        self.refresh = parsed_args.refresh
+        self.backend = parsed_args.backend
+        self.no_jobs = parsed_args.no_jobs
+        self.explain = parsed_args.explain
+        self.name_matching = parsed_args.match
+        self.profile = parsed_args.profile
+        self.trace = parsed_args.trace
+        self.trace_format = parsed_args.trace_format
 
     def get_result(self, args):
         self.assign_args_to_cli(args)
         if not self.check_filters():
             return "No data"
+        if not (self.profile or self.trace):
+            return self.get_data()
+        from gitlab_cli_tool import tracing
+
+        phases_before = dict(timer.phases)
+        tracing.tracer.start()
+        try:
+            message = self.get_data()
+        finally:
+            spans = tracing.tracer.stop()
+            if self.trace:
+                tracing.dump(spans, self.trace, self.trace_format)
+        if self.profile:
+            phases = {
+                phase: elapsed - phases_before.get(phase, 0.0)
+                for phase, elapsed in timer.phases.items()
+            }
+            message = f"{message}\n\n{tracing.profile_report(spans, phases)}"
+        return message
+
+    def get_data(self):
+        # network libraries are imported only when a command really talks to Gitlab,
+        # --help, --version and wrong arguments stay fast
+        with timer.phase(IMPORT):
+            from gitlab_cli_tool.cli_api import GitLabDataFilter
+
         data_filter = GitLabDataFilter(
             property_name=self.property_name,
             action=self.action,
@@ -112,13 +243,36 @@ class GitLabCLI:
             branch=self.branch,
             variables=self.variables,
             ignore=self.ignore,
+            filter_expression=self.filter_expression,
+            concurrency=self.concurrency,
+            cache_ttl=self.cache_ttl,
+            refresh=self.refresh,
+            backend=self.backend,
+            no_jobs=self.no_jobs,
+            explain=self.explain,
+            name_matching=self.name_matching,
+            secrets=self.secrets,
+            api=self.api,
         )
+        self.secrets = data_filter.secrets
+        self.api = data_filter.api
         message = data_filter.get_filtered_data()
+        if data_filter.runner_index is not None:
+            self.runner_index = data_filter.runner_index
         return message
 
+    def close(self):
+        if self.api:
+            self.api.close()
+            self.api = None
+
 
 def main():
-    print(GitLabCLI().get_result(sys.argv[1:]))
+    cli = GitLabCLI()
+    try:
+        print(cli.get_result(sys.argv[1:]))
+    finally:
+        cli.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,165 @@
+import asyncio
+from typing import List, Dict, Optional, Tuple
+
+from aiohttp.client import ClientSession
+
+from gitlab_cli_tool.models import Runner
+from gitlab_cli_tool.scheduler import RateLimitScheduler
+
+PROJECT_RUNNERS_QUERY = """
+query projectRunners($projectIds: [ID!], $after: String) {
+  projects(ids: $projectIds) {
+    nodes {
+      name
+      runners(first: 100, after: $after) {
+        pageInfo {
+          hasNextPage
+          endCursor
+        }
+        nodes {
+          id
+          description
+          ipAddress
+          paused
+          runnerType
+          status
+          tagList
+        }
+      }
+    }
+  }
+}
+"""
+
+# running jobs of the project only, as in REST API, CiRunner.jobs counts jobs of all projects
+PROJECT_RUNNING_JOBS_QUERY = """
+query projectRunningJobs($projectIds: [ID!], $after: String) {
+  projects(ids: $projectIds) {
+    nodes {
+      name
+      jobs(statuses: [RUNNING], first: 100, after: $after) {
+        pageInfo {
+          hasNextPage
+          endCursor
+        }
+        nodes {
+          runner {
+            id
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
+
+class GraphQLError(Exception):
+    pass
+
+
+class GitlabGraphQLAPI:
+    """
+    Runners of a project with their tags and status are fetched with one GraphQL query
+    per 100 runners, running jobs of the project with one query per 100 jobs,
+    REST API needs a request per runner and a scan of all running jobs for the same data.
+    """
+
+    def __init__(self, server, token, scheduler: Optional[RateLimitScheduler] = None):
+        self.url = f"{server}/api/graphql"
+        self.headers = {"Authorization": f"Bearer {token}"}
+        # shared with REST API, Gitlab counts requests of both against the same limit
+        self.scheduler = scheduler or RateLimitScheduler()
+
+    async def query(self, session: ClientSession, query: str, variables: Dict) -> Dict:
+        payload = {"query": query, "variables": variables}
+        # queries only read, so they are retried like GET requests
+        response = await self.scheduler.request_async(
+            session, "POST", self.url, retry=True, headers=self.headers, json=payload
+        )
+        response.raise_for_status()
+        result = await response.json()
+        if result.get("errors"):
+            raise GraphQLError(result["errors"][0].get("message", result["errors"]))
+        return result["data"]
+
+    async def get_projects_runners(
+        self, session: ClientSession, project_id
+    ) -> Tuple[str, List[Runner]]:
+        """
+        :param session: aiohttp session
+        :param project_id: id of project
+        :return: name of project and list of runners with tags and active jobs assigned
+        """
+        (project_name, runner_nodes), (_, job_nodes) = await asyncio.gather(
+            self.get_project_nodes(
+                session, PROJECT_RUNNERS_QUERY, project_id, "runners"
+            ),
+            self.get_project_nodes(
+                session, PROJECT_RUNNING_JOBS_QUERY, project_id, "jobs"
+            ),
+        )
+        counted_jobs = {}
+        for node in job_nodes:
+            if node["runner"]:
+                runner_id = self.id_from_gid(node["runner"]["id"])
+                counted_jobs[runner_id] = counted_jobs.get(runner_id, 0) + 1
+        return project_name, [
+            self.runner_from_node(node, counted_jobs) for node in runner_nodes
+        ]
+
+    async def get_project_nodes(
+        self, session: ClientSession, query: str, project_id, connection: str
+    ) -> Tuple[str, List[Dict]]:
+        """
+        Follows all pages of a connection of the project
+        :param query: query of the connection with $projectIds and $after variables
+        :param connection: field of project, e.g. runners
+        :return: name of project and nodes of all pages
+        """
+        variables = {
+            "projectIds": [f"gid://gitlab/Project/{project_id}"],
+            "after": None,
+        }
+        nodes = []
+        while True:
+            data = await self.query(session, query, variables)
+            projects = data["projects"]["nodes"]
+            if not projects:
+                raise GraphQLError(f"Project {project_id} not found")
+            project = projects[0]
+            nodes += project[connection]["nodes"]
+            page_info = project[connection]["pageInfo"]
+            if not page_info["hasNextPage"]:
+                return project["name"], nodes
+            variables["after"] = page_info["endCursor"]
+
+    @staticmethod
+    def id_from_gid(gid: str) -> int:
+        """
+        e.g. gid://gitlab/Ci::Runner/1 -> 1
+        """
+        return int(gid.rsplit("/", 1)[-1])
+
+    @classmethod
+    def runner_from_node(cls, node: Dict, counted_jobs: Dict[int, int]) -> Runner:
+        """
+        Converts GraphQL CiRunner to the same Runner as REST API returns
+        :param counted_jobs: number of running jobs of the project per runner id
+        """
+        runner_id = cls.id_from_gid(node["id"])
+        status = "paused" if node["paused"] else node["status"].lower()
+        description = node["description"] or ""
+        return Runner(
+            id=runner_id,
+            description=description,
+            ip_address=node["ipAddress"] or "",
+            active=not node["paused"],
+            is_shared=node["runnerType"] == "INSTANCE_TYPE",
+            # CiRunner has no name, runners are known by their description
+            name=description,
+            online=node["status"] == "ONLINE",
+            status=status,
+            tag_list=node["tagList"] or [],
+            active_jobs=counted_jobs.get(runner_id, 0),
+        )
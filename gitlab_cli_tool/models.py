@@ -0,0 +1,103 @@
+import sys
+from dataclasses import dataclass, field, fields
+from enum import Enum
+from typing import Dict, List
+
+
+def add_slots(cls):
+    """
+    Recreates dataclass with __slots__, so instances have no __dict__.
+    dataclass(slots=True) needs Python 3.10, docker image runs 3.7
+    """
+    cls_dict = dict(cls.__dict__)
+    field_names = tuple(cls_field.name for cls_field in fields(cls))
+    cls_dict["__slots__"] = field_names
+    for field_name in field_names:
+        # class attributes with default values would conflict with slots
+        cls_dict.pop(field_name, None)
+    cls_dict.pop("__dict__", None)
+    cls_dict.pop("__weakref__", None)
+    slotted_cls = type(cls)(cls.__name__, cls.__bases__, cls_dict)
+    slotted_cls.__qualname__ = cls.__qualname__
+    return slotted_cls
+
+
+def intern_tags(tags: List[str]) -> List[str]:
+    """
+    The same tags repeat across the fleet, interned they are stored once
+    and compared by identity first
+    """
+    return [sys.intern(tag) for tag in tags]
+
+
+@add_slots
+@dataclass
+class Runner:
+    id: int
+    description: str
+    ip_address: str
+    active: bool
+    is_shared: bool
+    name: str
+    online: bool
+    status: str
+    tag_list: List[str] = field(default_factory=list)
+    active_jobs: int = 0
+
+    def __post_init__(self):
+        self.tag_list = intern_tags(self.tag_list)
+
+
+def runner_from_json(data: Dict) -> Runner:
+    """
+    Runner straight from REST API JSON (listing or /runners/:id), fields missing
+    in the listing get defaults, fields unknown to Runner are skipped
+    """
+    return Runner(
+        id=data["id"],
+        description=data.get("description") or "",
+        ip_address=data.get("ip_address") or "",
+        active=data.get("active", True),
+        is_shared=data.get("is_shared", False),
+        name=data.get("name") or "",
+        online=data.get("online", False),
+        status=data.get("status") or "",
+        tag_list=data.get("tag_list") or [],
+        active_jobs=data.get("active_jobs", 0),
+    )
+
+
+class Filtering(Enum):
+    WRONG = 0
+    NAMES = 1
+    TAGS = 2
+
+
+class Actions(Enum):
+    PAUSE = "pause"
+    RESUME = "resume"
+    LIST = "list"
+    RUN = "run"
+    RETAG = "retag"
+
+
+class Backend(Enum):
+    REST = "rest"
+    GRAPHQL = "graphql"
+    # GraphQL with fallback to REST when Gitlab does not support the query
+    AUTO = "auto"
+
+
+class NameMatching(Enum):
+    # name is a part of runner description (case insensitive)
+    SUBSTRING = "substring"
+    # shell-style wildcards matching whole description, e.g. qa-0[1-4].*
+    GLOB = "glob"
+    # regular expression searched in description
+    REGEX = "regex"
+
+
+class PropertyName(Enum):
+    RUNNERS = "runners"
+    PIPELINE = "pipeline"
+    # TODO implement listing etc for -> PROJECTS = 'projects'
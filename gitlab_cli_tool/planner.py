@@ -0,0 +1,86 @@
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+# Data needed by a phase, phases are executed in this order:
+# LIST - fields from the runners listing (/projects/:id/runners), e.g. description
+# DETAILS - tag list, one request to /runners/:id per runner
+LIST = "list"
+DETAILS = "details"
+PHASES = [LIST, DETAILS]
+
+
+@dataclass
+class PlannedFilter:
+    description: str
+    needs: str
+    apply: Callable[[List], List]
+
+
+class QueryPlan:
+    """
+    Filters are grouped by the data they need, so cheap filters on the runners listing
+    narrow down runners before details are fetched only for the survivors.
+    Filters are AND-ed (ignore is a complement), so their order does not change the result.
+    """
+
+    def __init__(
+        self,
+        filters: List[PlannedFilter],
+        show_active_jobs: bool = True,
+        server_tag_lists: Optional[List[List[str]]] = None,
+    ):
+        self.filters = sorted(filters, key=lambda f: PHASES.index(f.needs))
+        self.show_active_jobs = show_active_jobs
+        # Gitlab lists only runners having all exact tags of any of these lists
+        self.server_tag_lists = server_tag_lists or []
+
+    def filters_for(self, needs: str) -> List[PlannedFilter]:
+        return [planned for planned in self.filters if planned.needs == needs]
+
+    def apply(
+        self, runners: List, needs: str, counts: Optional[List[int]] = None
+    ) -> List:
+        """
+        :param counts: number of runners left after each filter is appended to it
+        """
+        for planned in self.filters_for(needs):
+            runners = planned.apply(runners)
+            if counts is not None:
+                counts.append(len(runners))
+        return runners
+
+    def explain(
+        self, project_id, listed: int, counts: List[int], cached_details: int = 0
+    ) -> str:
+        """
+        :param project_id: id of project
+        :param listed: number of runners in the listing
+        :param counts: number of runners left after each filter on the listing, see apply
+        :param cached_details: number of survivors with fresh details in cache
+        :return: description of planned requests, one line per phase
+        """
+        listings = [
+            f"GET /projects/{project_id}/runners?tag_list={','.join(tag_list)}"
+            for tag_list in self.server_tag_lists
+        ] or [f"GET /projects/{project_id}/runners"]
+        concurrently = ", concurrently" if len(listings) > 1 else ""
+        steps = [
+            f"{', '.join(listings)} (paginated{concurrently}) -> {listed} runners",
+        ]
+        steps += [
+            f"filter {planned.description} (local) -> {count} runners"
+            for planned, count in zip(self.filters_for(LIST), counts)
+        ]
+        survivors = counts[-1] if counts else listed
+        steps.append(
+            f"GET /runners/:id for {survivors - cached_details} runners"
+            f" ({cached_details} served from cache)"
+        )
+        steps += [
+            f"filter {planned.description} (local)"
+            for planned in self.filters_for(DETAILS)
+        ]
+        if self.show_active_jobs:
+            steps.append(f"GET /projects/{project_id}/jobs?scope[]=running (paginated)")
+        steps.append(f"GET /projects/{project_id}")
+        return "\n".join(f"{number}. {step}" for number, step in enumerate(steps, 1))
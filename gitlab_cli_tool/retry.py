@@ -0,0 +1,68 @@
+"""
+Transient failures of reads from Gitlab (502 of a proxy, connection reset) cost one more request
+instead of the whole command. Failed request is sent again after exponential backoff with full jitter,
+so requests failed at the same time do not come back at the same time,
+until max_attempts are made or deadline of the request passes.
+Throttling (429) is handled by the scheduler, see scheduler module.
+"""
+import random
+import threading
+import time
+from typing import Optional
+
+# statuses of a failing Gitlab or proxy in front of it, worth trying again
+TRANSIENT_STATUSES = (500, 502, 503, 504)
+# reads which may be sent again, other requests are retried only when asked for,
+# e.g. idempotent PUT of GitlabAPI.update_runner
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS")
+MAX_ATTEMPTS = 4
+BACKOFF = 0.5  # seconds, upper bound of the first delay, doubled after every attempt
+MAX_BACKOFF = 8.0  # seconds, upper bound of a single delay
+DEADLINE = 30.0  # seconds from the first attempt, no retry is started after that
+
+
+class RetryPolicy:
+    def __init__(
+        self,
+        max_attempts: int = MAX_ATTEMPTS,
+        backoff: float = BACKOFF,
+        max_backoff: float = MAX_BACKOFF,
+        deadline: float = DEADLINE,
+    ):
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.deadline = deadline
+        self.lock = threading.Lock()
+        # requests sent again since the object was created, shown in output of commands
+        self.retries = 0
+
+    def backoff_delay(self, attempt: int) -> float:
+        """
+        :param attempt: 0 for the first request
+        :return: seconds, random up to backoff * 2 ** attempt (full jitter)
+        """
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+
+    def next_delay(
+        self, attempt: int, started: float, retry_after: Optional[float] = None
+    ) -> Optional[float]:
+        """
+        Retry is counted when it is allowed
+        :param attempt: 0 for the first request
+        :param started: time.monotonic() of the first attempt
+        :param retry_after: seconds from Retry-After header of the failed response
+        :return: seconds to wait before the next attempt, None if request is not sent again
+        """
+        if attempt + 1 >= self.max_attempts:
+            return None
+        delay = self.backoff_delay(attempt) if retry_after is None else retry_after
+        if time.monotonic() + delay > started + self.deadline:
+            return None
+        with self.lock:
+            self.retries += 1
+        return delay
+
+    @staticmethod
+    def is_transient(status: int) -> bool:
+        return status in TRANSIENT_STATUSES
@@ -6,34 +6,70 @@ from prompt_toolkit.auto_suggest import AutoSuggestFromHistory
 from prompt_toolkit.completion import Completer, Completion
 from prompt_toolkit.history import FileHistory
 
-from gitlab_cli_tool.cli_api import PropertyName, Actions
+from gitlab_cli_tool.models import PropertyName, Actions
 from gitlab_cli_tool.gitlab_cli import GitLabCLI
 
 GitlabCLIKeywords = (
     [property_name.value for property_name in PropertyName]
     + [action.value for action in Actions]
-    + ["--branch", "--tag", "--name", "--variables", "--ignore"]
+    + [
+        "--branch",
+        "--tag",
+        "--name",
+        "--variables",
+        "--ignore",
+        "--concurrency",
+        "--cache-ttl",
+        "--refresh",
+        "--backend",
+        "--no-jobs",
+        "--explain",
+        "--match",
+        "--filter",
+        "--profile",
+        "--trace",
+        "--trace-format",
+    ]
 )
 
 
 class GitlabCLICompleter(Completer):
+    def __init__(self, cli=None):
+        self.cli = cli
+
     def get_completions(self, document, complete_event):
         word_before_cursor = document.get_word_before_cursor(WORD=True)
-        matches = fuzzyfinder(word_before_cursor, GitlabCLIKeywords)
+        if self.completing_tag(document, word_before_cursor):
+            # tags of runners from the last listing
+            matches = self.cli.runner_index.complete(word_before_cursor)
+        else:
+            matches = fuzzyfinder(word_before_cursor, GitlabCLIKeywords)
 
         for m in matches:
             yield Completion(m, start_position=-len(word_before_cursor))
 
+    def completing_tag(self, document, word_before_cursor):
+        if not (self.cli and self.cli.runner_index and word_before_cursor):
+            return False
+        if word_before_cursor.startswith("-"):
+            return False
+        options = [
+            word for word in document.text_before_cursor.split() if word.startswith("-")
+        ]
+        return bool(options) and options[-1] in ("-t", "--tag")
+
 
 def main():
     keyboard_interrupt = 0
+    # one client for the whole session, connections to Gitlab are reused between commands
+    cli = GitLabCLI()
     while 1:
         try:
             user_input = prompt(
                 u"Gitlabcli > ",
                 history=FileHistory("history.txt"),
                 auto_suggest=AutoSuggestFromHistory(),
-                completer=GitlabCLICompleter(),
+                completer=GitlabCLICompleter(cli),
             )
             keyboard_interrupt = 0
             if user_input.lower() == "exit" or user_input.lower() == "quit":
@@ -49,9 +85,10 @@ def main():
         else:
             try:
                 input = shlex.split(user_input)
-                print(GitLabCLI().get_result(input))
+                print(cli.get_result(input))
             except SystemExit:
                 pass
+    cli.close()
     print("Exited.")
 
 
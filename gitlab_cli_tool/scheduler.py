@@ -0,0 +1,331 @@
+"""
+All requests to Gitlab, from threads (requests, python-gitlab) and from the event loop (aiohttp),
+wait in one first-in first-out queue for a free slot.
+Number of slots adapts to Gitlab with AIMD: it grows by one per round of successful requests
+and is halved when Gitlab answers 429 Too Many Requests.
+RateLimit-Remaining and RateLimit-Reset hold requests back before the limit is hit,
+Retry-After pauses the queue, throttled requests go back to the queue instead of failing.
+Reads failed for a transient reason are sent again by the retry policy, see retry module.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from datetime import timedelta
+from email.utils import parsedate_to_datetime
+from typing import Callable, Deque, Mapping, Optional
+
+from requests.adapters import HTTPAdapter
+from requests import exceptions
+from requests.hooks import dispatch_hook
+
+from gitlab_cli_tool.retry import RetryPolicy, IDEMPOTENT_METHODS
+
+# slots at the start, the same as requests changed at the same time by pause and retag
+INITIAL_CONCURRENCY = 20
+# aiohttp keeps at most 100 connections open
+MAX_CONCURRENCY = 100
+# the same request is put back to the queue at most that many times
+MAX_THROTTLED_RETRIES = 10
+# seconds, pause after 429 without Retry-After and RateLimit-Reset
+DEFAULT_RETRY_AFTER = 1.0
+
+
+class Ticket:
+    """
+    Place of a request in the queue, wake is called once it gets a slot
+    """
+
+    __slots__ = ("wake", "granted", "started")
+
+    def __init__(self, wake: Callable[[], None] = None):
+        self.wake = wake
+        self.granted = False
+        self.started = 0.0
+
+
+class RateLimitScheduler:
+    def __init__(
+        self,
+        concurrency: int = INITIAL_CONCURRENCY,
+        max_concurrency: int = MAX_CONCURRENCY,
+        min_concurrency: int = 1,
+        retry_policy: Optional[RetryPolicy] = None,
+    ):
+        self.lock = threading.Lock()
+        self.limit = float(concurrency)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.in_flight = 0
+        self.waiters: Deque[Ticket] = deque()
+        # time.monotonic() until which no request is started (Retry-After)
+        self.paused_until = 0.0
+        # requests Gitlab still allows until budget_reset, None if it does not tell
+        self.remaining: Optional[int] = None
+        self.budget_reset = 0.0
+        self.last_decrease = 0.0
+        self.wake_timer: Optional[threading.Timer] = None
+        self.throttled = 0
+        self.retry_policy = retry_policy or RetryPolicy()
+
+    @property
+    def concurrency(self) -> int:
+        return max(self.min_concurrency, int(self.limit))
+
+    def can_start(self, now: float) -> bool:
+        if now < self.paused_until:
+            return False
+        if self.remaining is not None:
+            if now >= self.budget_reset:
+                self.remaining = None
+            elif self.remaining <= 0:
+                return False
+        return self.in_flight < self.concurrency
+
+    def start(self, ticket: Ticket, now: float) -> Ticket:
+        self.in_flight += 1
+        if self.remaining is not None:
+            self.remaining -= 1
+        ticket.granted = True
+        ticket.started = now
+        return ticket
+
+    def wake_waiters(self):
+        """
+        Waiters get free slots in order of arrival, called with lock held
+        """
+        now = time.monotonic()
+        while self.waiters and self.can_start(now):
+            ticket = self.start(self.waiters.popleft(), now)
+            ticket.wake()
+        if self.waiters and self.in_flight == 0 and self.wake_timer is None:
+            # nothing in flight will release a slot, the queue waits for the pause to end
+            resume_at = self.paused_until
+            if self.remaining is not None and self.remaining <= 0:
+                resume_at = max(resume_at, self.budget_reset)
+            self.wake_timer = threading.Timer(max(0.0, resume_at - now), self.resume)
+            self.wake_timer.daemon = True
+            self.wake_timer.start()
+
+    def resume(self):
+        with self.lock:
+            self.wake_timer = None
+            self.wake_waiters()
+
+    def acquire(self) -> Ticket:
+        event = threading.Event()
+        with self.lock:
+            self.wake_waiters()
+            if not self.waiters and self.can_start(time.monotonic()):
+                return self.start(Ticket(), time.monotonic())
+            ticket = Ticket(event.set)
+            self.waiters.append(ticket)
+            self.wake_waiters()
+        event.wait()
+        return ticket
+
+    async def acquire_async(self) -> Ticket:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def wake():
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+        with self.lock:
+            self.wake_waiters()
+            if not self.waiters and self.can_start(time.monotonic()):
+                return self.start(Ticket(), time.monotonic())
+            ticket = Ticket(wake)
+            self.waiters.append(ticket)
+            self.wake_waiters()
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self.lock:
+                if ticket.granted:
+                    self.in_flight -= 1
+                    self.wake_waiters()
+                else:
+                    self.waiters.remove(ticket)
+            raise
+        return ticket
+
+    def release(self):
+        with self.lock:
+            self.in_flight -= 1
+            self.wake_waiters()
+
+    def observe(self, ticket: Ticket, status: int, headers: Mapping[str, str]) -> bool:
+        """
+        Adapts the queue to the response, called before the slot of the request is released
+        :return: True if request was throttled and should be sent again
+        """
+        with self.lock:
+            now = time.monotonic()
+            reset_in = None
+            if headers.get("RateLimit-Reset"):
+                reset_in = max(0.0, float(headers["RateLimit-Reset"]) - time.time())
+            if headers.get("RateLimit-Remaining") and reset_in is not None:
+                # other requests in flight may not be counted by Gitlab yet
+                self.remaining = int(headers["RateLimit-Remaining"]) - (
+                    self.in_flight - 1
+                )
+                self.budget_reset = now + reset_in
+            if status != 429:
+                if status < 500:
+                    self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+                return False
+            self.throttled += 1
+            retry_after = self.retry_after(headers)
+            if retry_after is None:
+                retry_after = DEFAULT_RETRY_AFTER if reset_in is None else reset_in
+            self.paused_until = max(self.paused_until, now + retry_after)
+            # requests started before the last decrease saw the same congestion
+            if ticket.started >= self.last_decrease:
+                self.limit = max(self.min_concurrency, self.limit / 2)
+                self.last_decrease = now
+            return True
+
+    @staticmethod
+    def retry_after(headers: Mapping[str, str]) -> Optional[float]:
+        """
+        Retry-After is either seconds or an HTTP date
+        """
+        value = headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    @contextmanager
+    def slot(self):
+        ticket = self.acquire()
+        try:
+            yield ticket
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def slot_async(self):
+        ticket = await self.acquire_async()
+        try:
+            yield ticket
+        finally:
+            self.release()
+
+    async def request_async(
+        self, session, method: str, url: str, retry: Optional[bool] = None, **kwargs
+    ):
+        """
+        aiohttp request sent when the scheduler allows it, sent again when throttled
+        and on transient failures allowed by retry_policy.
+        Body is read before the slot is released, the response is usable after that.
+        :param retry: False if transient failures are not retried, by default reads are retried
+        """
+        from aiohttp import ClientConnectionError, ClientPayloadError
+
+        if retry is None:
+            retry = method in IDEMPOTENT_METHODS
+        started = time.monotonic()
+        attempt = throttled_attempts = 0
+        while True:
+            try:
+                async with self.slot_async() as ticket:
+                    response = await session.request(method, url, **kwargs)
+                    # connection goes back to the pool once the body is read,
+                    # read() and json() of the response return the same body later
+                    await response.read()
+                    throttled = self.observe(ticket, response.status, response.headers)
+            except (ClientConnectionError, ClientPayloadError, asyncio.TimeoutError):
+                delay = (
+                    self.retry_policy.next_delay(attempt, started) if retry else None
+                )
+                if delay is None:
+                    raise
+            else:
+                if throttled and throttled_attempts < MAX_THROTTLED_RETRIES:
+                    throttled_attempts += 1
+                    continue
+                delay = self.transient_failure_delay(
+                    retry, attempt, started, response.status, response.headers
+                )
+                if delay is None:
+                    return response
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    def transient_failure_delay(
+        self,
+        retry: bool,
+        attempt: int,
+        started: float,
+        status: int,
+        headers: Mapping[str, str],
+    ) -> Optional[float]:
+        """
+        :return: seconds to wait before the request is sent again, None if response is final
+        """
+        if not retry or not self.retry_policy.is_transient(status):
+            return None
+        return self.retry_policy.next_delay(attempt, started, self.retry_after(headers))
+
+
+class ScheduledAdapter(HTTPAdapter):
+    """
+    Transport of requests.Session which sends every request through the scheduler,
+    reads failed for a transient reason are sent again by retry policy of the scheduler
+    """
+
+    def __init__(self, scheduler: RateLimitScheduler, **kwargs):
+        self.scheduler = scheduler
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        retry = request.method in IDEMPOTENT_METHODS
+        started = time.monotonic()
+        attempt = throttled_attempts = 0
+        while True:
+            sent = time.perf_counter()
+            try:
+                with self.scheduler.slot() as ticket:
+                    response = super().send(request, **kwargs)
+                    throttled = self.scheduler.observe(
+                        ticket, response.status_code, response.headers
+                    )
+            except (exceptions.ConnectionError, exceptions.Timeout):
+                delay = (
+                    self.scheduler.retry_policy.next_delay(attempt, started)
+                    if retry
+                    else None
+                )
+                if delay is None:
+                    raise
+            else:
+                if throttled and throttled_attempts < MAX_THROTTLED_RETRIES:
+                    throttled_attempts += 1
+                    self.discard(response, sent)
+                    continue
+                delay = self.scheduler.transient_failure_delay(
+                    retry, attempt, started, response.status_code, response.headers
+                )
+                if delay is None:
+                    return response
+                self.discard(response, sent)
+            attempt += 1
+            time.sleep(delay)
+
+    @staticmethod
+    def discard(response, sent: float):
+        """
+        Response which is not returned to the session still goes to its hooks, e.g. to tracer
+        """
+        response.elapsed = timedelta(seconds=time.perf_counter() - sent)
+        dispatch_hook("response", response.request.hooks, response)
+        response.close()
@@ -0,0 +1,276 @@
+import sys
+from array import array
+from bisect import bisect_right
+from collections import Counter
+from itertools import compress
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from gitlab_cli_tool.filters import EXACT_TAG_PREFIX, NameMatcher
+from gitlab_cli_tool.models import Runner
+
+# columns which can be used for sorting and aggregation
+COLUMNS = ("id", "description", "status", "active", "active_jobs", "name")
+
+
+class StringColumn:
+    """
+    Strings stored as one utf-8 buffer with offsets instead of one object per string
+    """
+
+    def __init__(self):
+        self.data = bytearray()
+        self.offsets = array("q", [0])
+
+    def append(self, value: str):
+        self.data += value.encode()
+        self.offsets.append(len(self.data))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row: int) -> str:
+        return self.data[self.offsets[row] : self.offsets[row + 1]].decode()
+
+    def __iter__(self) -> Iterator[str]:
+        return (self[row] for row in range(len(self)))
+
+    def nbytes(self) -> int:
+        return sys.getsizeof(self.data) + sys.getsizeof(self.offsets)
+
+
+class RunnerTable:
+    """
+    Runners stored column by column: numbers and flags in typed arrays,
+    strings in buffers, statuses and tags as ids into vocabularies of distinct values,
+    so a fleet of tens of thousands of runners takes a few MB
+    and filters scan flat arrays instead of objects.
+    Tags form a sparse matrix stored as coordinates (row, tag id) in row order.
+    Filters return row numbers in table order, take() builds table of those rows.
+    """
+
+    def __init__(self):
+        self.ids = array("q")
+        self.active = array("b")
+        self.is_shared = array("b")
+        self.online = array("b")
+        self.active_jobs = array("l")
+        self.status_ids = array("B")
+        self.descriptions = StringColumn()
+        self.ip_addresses = StringColumn()
+        self.names: List[str] = []
+        # tags of row are tag_ids[tag_offsets[row]:tag_offsets[row + 1]]
+        self.tag_offsets = array("i", [0])
+        self.tag_rows = array("i")
+        self.tag_ids = array("i")
+        # vocabularies, id is the position of value
+        self.statuses: List[str] = []
+        self.status_id_by_status: Dict[str, int] = {}
+        self.tags = StringColumn()
+        # needed only while appending, dropped by compact() and rebuilt when needed
+        self.tag_id_by_tag: Optional[Dict[str, int]] = {}
+        # lowercase tags joined with newlines and start of every tag in the text
+        self.tag_search_text: Optional[Tuple[str, array]] = None
+
+    @classmethod
+    def from_runners(cls, runners: Iterable[Runner]) -> "RunnerTable":
+        table = cls()
+        for runner in runners:
+            table.append(runner)
+        table.compact()
+        return table
+
+    def compact(self):
+        self.tag_id_by_tag = None
+
+    def status_id(self, status: str) -> int:
+        status_id = self.status_id_by_status.get(status)
+        if status_id is None:
+            status_id = self.status_id_by_status[status] = len(self.statuses)
+            self.statuses.append(sys.intern(status))
+        return status_id
+
+    def tag_id(self, tag: str) -> int:
+        if self.tag_id_by_tag is None:
+            self.tag_id_by_tag = {
+                value: tag_id for tag_id, value in enumerate(self.tags)
+            }
+        tag_id = self.tag_id_by_tag.get(tag)
+        if tag_id is None:
+            tag_id = self.tag_id_by_tag[tag] = len(self.tags)
+            self.tags.append(tag)
+            self.tag_search_text = None
+        return tag_id
+
+    def append(self, runner: Runner):
+        row = len(self.ids)
+        self.ids.append(runner.id)
+        self.active.append(runner.active)
+        self.is_shared.append(runner.is_shared)
+        self.online.append(runner.online)
+        self.active_jobs.append(runner.active_jobs)
+        self.status_ids.append(self.status_id(runner.status))
+        self.descriptions.append(runner.description)
+        self.ip_addresses.append(runner.ip_address)
+        self.names.append(sys.intern(runner.name))
+        for tag in runner.tag_list:
+            self.tag_rows.append(row)
+            self.tag_ids.append(self.tag_id(tag))
+        self.tag_offsets.append(len(self.tag_ids))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def row_tags(self, row: int) -> List[str]:
+        tag_ids = self.tag_ids[self.tag_offsets[row] : self.tag_offsets[row + 1]]
+        return [self.tags[tag_id] for tag_id in tag_ids]
+
+    def runner(self, row: int) -> Runner:
+        return Runner(
+            id=self.ids[row],
+            description=self.descriptions[row],
+            ip_address=self.ip_addresses[row],
+            active=bool(self.active[row]),
+            is_shared=bool(self.is_shared[row]),
+            name=self.names[row],
+            online=bool(self.online[row]),
+            status=self.statuses[self.status_ids[row]],
+            tag_list=self.row_tags(row),
+            active_jobs=self.active_jobs[row],
+        )
+
+    def to_runners(self, rows: Optional[Iterable[int]] = None) -> List[Runner]:
+        if rows is None:
+            rows = range(len(self))
+        return [self.runner(row) for row in rows]
+
+    def take(self, rows: Iterable[int]) -> "RunnerTable":
+        table = RunnerTable()
+        for runner in self.to_runners(rows):
+            table.append(runner)
+        table.compact()
+        return table
+
+    def column(self, name: str) -> Sequence:
+        if name == "status":
+            return [self.statuses[status_id] for status_id in self.status_ids]
+        columns = {
+            "id": self.ids,
+            "description": self.descriptions,
+            "active": self.active,
+            "active_jobs": self.active_jobs,
+            "name": self.names,
+        }
+        if name not in columns:
+            raise RuntimeError(f"Unknown column {name}, expected one of {COLUMNS}")
+        return columns[name]
+
+    def rows_with_status(self, status: str) -> List[int]:
+        status_id = self.status_id_by_status.get(status)
+        return [row for row, value in enumerate(self.status_ids) if value == status_id]
+
+    def find_tag_ids(self, substrings: List[str]) -> Set[int]:
+        """
+        Tag vocabulary is searched as one lowercase text, so every substring
+        is found by str.find instead of a loop over distinct tags
+        """
+        if self.tag_search_text is None:
+            lowercase_tags = [tag.lower() for tag in self.tags]
+            starts = array("q")
+            position = 1
+            for tag in lowercase_tags:
+                starts.append(position)
+                position += len(tag) + 1
+            text = "\n" + "\n".join(lowercase_tags) + "\n"
+            self.tag_search_text = text, starts
+        text, starts = self.tag_search_text
+        tag_ids = set()
+        for substring in substrings:
+            query = substring.lower()
+            # exact query includes newline before the tag
+            skip = 0
+            if query.startswith(EXACT_TAG_PREFIX):
+                query = f"\n{query[len(EXACT_TAG_PREFIX) :]}\n"
+                skip = 1
+            elif not query:
+                tag_ids.update(range(len(starts)))
+                continue
+            position = text.find(query)
+            while position != -1:
+                tag_id = bisect_right(starts, position + skip) - 1
+                tag_ids.add(tag_id)
+                if tag_id + 1 >= len(starts):
+                    break
+                position = text.find(query, starts[tag_id + 1] - skip)
+        return tag_ids
+
+    def rows_with_tags(self, substrings: List[str]) -> List[int]:
+        """
+        There is logical OR between substrings, they work like RunnerIndex queries:
+        case insensitive parts of tags or whole tags prefixed with '='
+        """
+        matching = bytearray(len(self.tags))
+        for tag_id in self.find_tag_ids(substrings):
+            matching[tag_id] = 1
+        # coordinates are in row order, so rows come out sorted
+        rows = compress(self.tag_rows, map(matching.__getitem__, self.tag_ids))
+        return list(dict.fromkeys(rows))
+
+    def rows_with_names(self, matcher: NameMatcher) -> List[int]:
+        return [
+            row
+            for row, description in enumerate(self.descriptions)
+            if matcher.matches(description)
+        ]
+
+    def sort(self, column: str = "description", reverse: bool = False) -> List[int]:
+        """
+        :return: row numbers ordered by column values
+        """
+        values = self.column(column)
+        return sorted(range(len(self)), key=values.__getitem__, reverse=reverse)
+
+    def count_by(self, column: str) -> Dict:
+        """
+        Number of runners per value of column, 'tag' counts runners per tag
+        """
+        if column == "tag":
+            return {
+                self.tags[tag_id]: count
+                for tag_id, count in Counter(self.tag_ids).most_common()
+            }
+        if column == "status":
+            return {
+                self.statuses[status_id]: count
+                for status_id, count in Counter(self.status_ids).most_common()
+            }
+        return dict(Counter(self.column(column)).most_common())
+
+    def total_active_jobs(self) -> int:
+        return sum(self.active_jobs)
+
+    def nbytes(self) -> int:
+        """
+        Approximate memory taken by the table, interned strings counted once
+        """
+        arrays = (
+            self.ids,
+            self.active,
+            self.is_shared,
+            self.online,
+            self.active_jobs,
+            self.status_ids,
+            self.tag_offsets,
+            self.tag_rows,
+            self.tag_ids,
+        )
+        size = sum(sys.getsizeof(column) for column in arrays)
+        size += self.descriptions.nbytes() + self.ip_addresses.nbytes()
+        size += sys.getsizeof(self.names)
+        size += sys.getsizeof(self.statuses) + sys.getsizeof(self.status_id_by_status)
+        size += sum(sys.getsizeof(status) for status in self.statuses)
+        size += self.tags.nbytes()
+        if self.tag_id_by_tag is not None:
+            size += sys.getsizeof(self.tag_id_by_tag)
+        if self.tag_search_text is not None:
+            size += sum(sys.getsizeof(part) for part in self.tag_search_text)
+        return size + sum(sys.getsizeof(name) for name in set(self.names))
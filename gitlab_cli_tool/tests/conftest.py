@@ -1,11 +1,15 @@
+import asyncio
+import os
 from unittest import mock
 
 import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
 
 from gitlab_cli_tool.cli_api import GitlabAPI, GitLabDataFilter, Runner
 
 CORRECT_CLI_ARGUMENTS = ["runners", "list", "--tag", "atf"]
-WRONG_CLI_ARGUMENTS = ["runners", "list", "--tag", "atf", "--name", "qa-01.01"]
+WRONG_CLI_ARGUMENTS = ["runners", "list", "--tag", "atf", "--branch", "main"]
 ALL_FILTERED_RUNNERS = [
     {"id": 261},
     {"id": 262},
@@ -71,6 +75,13 @@ HEADERS_FOR_PAGINATION = [
     },
 ]
 
+HEADERS_WITH_TOTAL_PAGES = {
+    "Content-Type": "application/json",
+    "X-Total-Pages": "3",
+    "X-Total": "3",
+    "X-Per-Page": "40",
+}
+
 ALL_INFO_RUNNERS_DICT = [
     {
         "id": 1,
@@ -121,6 +132,26 @@ ALL_INFO_RUNNERS_DICT = [
 ALL_INFO_RUNNERS = [Runner(**runner) for runner in ALL_INFO_RUNNERS_DICT]
 
 
+# tests with these markers are skipped unless the environment variable is set, e.g.
+# GITLAB_CLI_BENCHMARKS=1 pytest
+OPT_IN_MARKERS = {
+    "benchmark": "GITLAB_CLI_BENCHMARKS",
+    "slow": "GITLAB_CLI_SLOW_TESTS",
+}
+
+
+def pytest_configure(config):
+    for marker, variable in OPT_IN_MARKERS.items():
+        config.addinivalue_line("markers", f"{marker}: runs only with {variable}=1")
+
+
+def pytest_collection_modifyitems(config, items):
+    for item in items:
+        for marker, variable in OPT_IN_MARKERS.items():
+            if marker in item.keywords and not os.environ.get(variable):
+                item.add_marker(pytest.mark.skip(reason=f"set {variable}=1 to run"))
+
+
 @pytest.fixture()
 def project_runners_with_names():
     project_runners = [1, 2, 3, 4]
@@ -219,9 +250,33 @@ def gitlabapi():
         return GitlabAPI("server", "token", "trigger_token")
 
 
+@pytest.fixture()
+def gitlab_stub(gitlabapi):
+    """
+    Runs a coroutine against aiohttp stub of Gitlab, gitlabapi sends its requests to the stub
+    :return: function taking routes of the stub (e.g. [web.get(path, handler)]),
+    function returning the coroutine and middlewares of the stub, returns result of the coroutine
+    """
+
+    def run(routes, coroutine_function, middlewares=()):
+        async def run_with_stub():
+            app = web.Application(middlewares=list(middlewares))
+            app.add_routes(routes)
+            async with TestServer(app) as server:
+                gitlabapi.server = str(server.make_url("")).rstrip("/")
+                try:
+                    return await coroutine_function()
+                finally:
+                    await gitlabapi.close_aiohttp_session()
+
+        return asyncio.run(run_with_stub())
+
+    return run
+
+
 @pytest.fixture()
 def gitlabdatafilter():
-    with mock.patch("gitlab_cli_tool.cli_api.Gitlab"):
+    with mock.patch("gitlab.Gitlab"):
         return GitLabDataFilter(
             property_name="dummy",
             action="dummy",
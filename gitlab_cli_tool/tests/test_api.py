@@ -1,10 +1,14 @@
+import asyncio
 import os
 import tempfile
+import time
 from unittest import mock
 from unittest.mock import call
 
+import aiohttp
 import pytest
 import responses
+from aiohttp import web
 
 from gitlab_cli_tool.cli_api import Filtering
 from gitlab_cli_tool.cli_api import GitLabDataFilter, GitlabAPI, Runner
@@ -16,6 +20,7 @@ from gitlab_cli_tool.tests.conftest import (
     RUNNERS,
     URLS_FOR_PAGINATION,
     HEADERS_FOR_PAGINATION,
+    HEADERS_WITH_TOTAL_PAGES,
     FILTERED_BY_NAME,
 )
 
@@ -27,6 +32,14 @@ def test_parser_names():
     assert parsed_args.tag == ["atf"]
 
 
+def test_concurrency_must_be_positive(capsys):
+    assert GitLabCLI.parse_args(["runners", "pause", "-c", "5"]).concurrency == 5
+    for value in ("0", "-3", "many"):
+        with pytest.raises(SystemExit):
+            GitLabCLI.parse_args(["runners", "pause", "--concurrency", value])
+    assert "must be at least 1, got -3" in capsys.readouterr().err
+
+
 def test_checking_filters():
     cli = GitLabCLI()
     cli.assign_args_to_cli(WRONG_CLI_ARGUMENTS)
@@ -122,6 +135,121 @@ def test_handle_pagination(gitlabapi):
     assert output == expected_output
 
 
+@responses.activate
+def test_handle_pagination_with_total_pages(gitlabapi):
+    for page, url in enumerate(URLS_FOR_PAGINATION, start=1):
+        responses.add(
+            responses.Response(
+                method="GET",
+                url=url,
+                json=[{"id": str(page)}],
+                headers=HEADERS_WITH_TOTAL_PAGES,
+            )
+        )
+    output = gitlabapi.handle_pagination(URLS_FOR_PAGINATION[0])
+    expected_output = [{"id": "1"}, {"id": "2"}, {"id": "3"}]
+    assert output == expected_output
+    assert len(responses.calls) == 3
+
+
+@responses.activate
+def test_iterate_pagination_is_lazy(gitlabapi):
+    for page, url in enumerate(URLS_FOR_PAGINATION, start=1):
+        responses.add(
+            responses.Response(
+                method="GET",
+                url=url,
+                json=[{"id": str(page)}],
+                headers=HEADERS_FOR_PAGINATION[page - 1],
+            )
+        )
+    items = gitlabapi.iterate_pagination(URLS_FOR_PAGINATION[0])
+    assert next(items) == {"id": "1"}
+    assert len(responses.calls) == 1
+    assert list(items) == [{"id": "2"}, {"id": "3"}]
+    assert len(responses.calls) == 3
+
+
+def test_aiterate_pagination(gitlabapi, gitlab_stub):
+    async def jobs(request):
+        page = int(request.query.get("page", 1))
+        headers = {"X-Total-Pages": "3"}
+        return web.json_response([{"id": page}], headers=headers)
+
+    async def collect():
+        url = f"{gitlabapi.server}/api/v4/projects/1/jobs?per_page=1"
+        async with aiohttp.ClientSession() as session:
+            return [item async for item in gitlabapi.aiterate_pagination(url, session)]
+
+    output = gitlab_stub([web.get("/api/v4/projects/1/jobs", jobs)], collect)
+    assert output == [{"id": 1}, {"id": 2}, {"id": 3}]
+
+
+def test_get_keyset_url(gitlabapi):
+    jobs_url = "https://gitlab.server.com/api/v4/projects/1/jobs?per_page=100"
+    assert (
+        gitlabapi.get_keyset_url(jobs_url)
+        == jobs_url + "&pagination=keyset&order_by=id&sort=desc"
+    )
+    projects_url = "https://gitlab.server.com/api/v4/projects?per_page=100&sort=desc"
+    assert (
+        gitlabapi.get_keyset_url(projects_url)
+        == projects_url + "&pagination=keyset&order_by=id"
+    )
+    # runners do not support keyset pagination
+    assert gitlabapi.get_keyset_url(URLS_FOR_PAGINATION[0]) == URLS_FOR_PAGINATION[0]
+    # page was requested explicitly
+    assert gitlabapi.get_keyset_url(URLS_FOR_PAGINATION[1]) == URLS_FOR_PAGINATION[1]
+
+
+@responses.activate
+def test_handle_pagination_keyset(gitlabapi):
+    first_url = "https://gitlab.server.com/api/v4/projects/1/jobs?per_page=1&pagination=keyset&order_by=id&sort=desc"
+    next_url = first_url + "&id_before=2"
+    responses.add(
+        responses.Response(
+            method="GET",
+            url=first_url,
+            json=[{"id": 2}],
+            headers={"Link": f'<{next_url}>; rel="next"'},
+        )
+    )
+    responses.add(responses.Response(method="GET", url=next_url, json=[{"id": 1}]))
+    output = gitlabapi.handle_pagination(
+        "https://gitlab.server.com/api/v4/projects/1/jobs?per_page=1"
+    )
+    assert output == [{"id": 2}, {"id": 1}]
+
+
+@responses.activate
+def test_handle_pagination_keyset_not_supported(gitlabapi):
+    url = "https://gitlab.server.com/api/v4/projects/1/jobs?per_page=1"
+    responses.add(
+        responses.Response(
+            method="GET",
+            url=gitlabapi.get_keyset_url(url),
+            status=405,
+            json={"error": "not supported"},
+        )
+    )
+    responses.add(
+        responses.Response(
+            method="GET", url=url, json=[{"id": 1}], headers={"X-Total-Pages": "1"}
+        )
+    )
+    assert gitlabapi.handle_pagination(url) == [{"id": 1}]
+
+
+def test_get_total_pages(gitlabapi):
+    response = mock.Mock()
+    response.headers = {"X-Total-Pages": "7"}
+    assert gitlabapi.get_total_pages(response) == 7
+    response.headers = {"X-Total": "201", "X-Per-Page": "100"}
+    assert gitlabapi.get_total_pages(response) == 3
+    response.headers = {}
+    assert gitlabapi.get_total_pages(response) is None
+
+
 def test_count_jobs_for_runners():
     output = GitlabAPI.count_jobs_for_runners(JOBS_WITH_RUNNERS)
     expected_output = {278: 2, 279: 1, 280: 2}
@@ -173,6 +301,99 @@ def test_assign_active_jobs_to_runners(
     assert output == expected_list_of_runners
 
 
+def test_change_runners_status(gitlabapi, gitlab_stub, project_runners_dict, capsys):
+    gitlabapi.retry_policy.backoff = 0
+    runners = project_runners_dict[:4]
+    updated = []
+
+    async def put_runner(request):
+        runner_id = int(request.match_info["id"])
+        if runner_id == 9:
+            return web.json_response({"message": "error"}, status=500)
+        updated.append((runner_id, await request.json()))
+        return web.json_response({"id": runner_id})
+
+    gitlabapi.max_concurrent_requests = 2
+    output = gitlab_stub(
+        [web.put("/api/v4/runners/{id}", put_runner)],
+        lambda: gitlabapi.change_runners_status(runners, False),
+    )
+    assert sorted(updated) == [
+        (1, {"active": False}),
+        (8, {"active": False}),
+        (11, {"active": False}),
+    ]
+    assert [runner.status for runner in output] == ["paused", "paused", "", "paused"]
+    captured = capsys.readouterr().out
+    assert "Runner 9 cannot be paused" in captured
+    assert "3 runners paused, 1 failed" in captured
+
+
+def test_get_runners_with_project_data_runs_phases_concurrently(gitlabapi, gitlab_stub):
+    delay = 0.2
+    # (path, started, finished) of every request, recorded by the server
+    requests_in_flight = []
+
+    @web.middleware
+    async def record(request, handler):
+        started = time.monotonic()
+        response = await handler(request)
+        requests_in_flight.append((request.path, started, time.monotonic()))
+        return response
+
+    async def get_runner(request):
+        await asyncio.sleep(delay)
+        runner_id = int(request.match_info["id"])
+        return web.json_response({"id": runner_id, "tag_list": [f"tag{runner_id}"]})
+
+    async def get_project(request):
+        await asyncio.sleep(delay)
+        return web.json_response({"id": 1, "name": "dummy-project"})
+
+    async def get_jobs(request):
+        await asyncio.sleep(delay)
+        return web.json_response(JOBS_WITH_RUNNERS, headers={"X-Total-Pages": "1"})
+
+    runners = [
+        Runner(
+            id=runner_id,
+            description=f"runner-{runner_id}",
+            ip_address="",
+            active=True,
+            is_shared=False,
+            name="",
+            online=True,
+            status="online",
+        )
+        for runner_id in (278, 279)
+    ]
+
+    gitlabapi.runner_cache.refresh = True
+    gitlabapi.runner_cache.save = mock.Mock()
+    runner_list, project_name, counted_jobs = gitlab_stub(
+        [
+            web.get("/api/v4/runners/{id}", get_runner),
+            web.get("/api/v4/projects/1", get_project),
+            web.get("/api/v4/projects/1/jobs", get_jobs),
+        ],
+        lambda: gitlabapi.get_runners_with_project_data_async(runners, 1),
+        middlewares=[record],
+    )
+    assert [runner.tag_list for runner in runner_list] == [["tag278"], ["tag279"]]
+    assert project_name == "dummy-project"
+    assert counted_jobs == {278: 2, 279: 1, 280: 2}
+    assert sorted(path for path, _, _ in requests_in_flight) == [
+        "/api/v4/projects/1",
+        "/api/v4/projects/1/jobs",
+        "/api/v4/runners/278",
+        "/api/v4/runners/279",
+    ]
+    # every request was started before any of them finished, phases overlap
+    assert max(started for _, started, _ in requests_in_flight) < min(
+        finished for _, _, finished in requests_in_flight
+    )
+
+
 def test_format_variables(gitlabapi):
     variables = ["var1=1", "var2=2"]
     expected_output = {"var1": "1", "var2": "2"}
@@ -264,7 +485,7 @@ def test_assign_secrets(
     assert call().__enter__().write(file_content) in open_mock.mock_calls
 
 
-@mock.patch("gitlab_cli_tool.cli_api.Gitlab")
+@mock.patch("gitlab.Gitlab")
 @mock.patch("os.path.expanduser")
 def test_assign_secrets_temporary_file_no_exist(expanduser_mock, gitlab_mock):
     expected_output = [
@@ -285,7 +506,7 @@ def test_assign_secrets_temporary_file_no_exist(expanduser_mock, gitlab_mock):
         assert gitlab_filter.trigger_token == "trigger_token"
 
 
-@mock.patch("gitlab_cli_tool.cli_api.Gitlab")
+@mock.patch("gitlab.Gitlab")
 @mock.patch("os.path.expanduser")
 def test_assign_secrets_temporary_file_exists(expanduser_mock, gitlab_mock):
     with tempfile.TemporaryDirectory() as tmpdirname:
@@ -300,3 +521,81 @@ def test_assign_secrets_temporary_file_exists(expanduser_mock, gitlab_mock):
         assert gitlab_filter.server == "test_server"
         assert gitlab_filter.token == "test_token"
         assert gitlab_filter.trigger_token == "test_trigger_token"
+
+
+@mock.patch("gitlab_cli_tool.cli_api.GitLabDataFilter.get_filtered_data")
+def test_cli_reuses_api_between_commands(get_filtered_data_mock):
+    def assign_secrets(data_filter):
+        data_filter.secrets = {
+            "SERVER": "server",
+            "TOKEN": "token",
+            "TRIGGER_TOKEN": "trigger_token",
+            "PROJECT_ID": "1",
+        }
+        data_filter.assign_secrets_to_class(data_filter.secrets)
+
+    cli = GitLabCLI()
+    with mock.patch.object(GitLabDataFilter, "assign_secrets", assign_secrets):
+        cli.get_result(CORRECT_CLI_ARGUMENTS)
+        api = cli.api
+        cli.get_result(CORRECT_CLI_ARGUMENTS + ["--concurrency", "5"])
+    assert cli.api is api
+    assert api.max_concurrent_requests == 5
+    cli.close()
+    assert cli.api is None
+
+
+def test_run_async_reuses_loop_and_session(gitlabapi):
+    async def get_session():
+        return await gitlabapi.get_aiohttp_session()
+
+    session = gitlabapi.run_async(get_session())
+    assert gitlabapi.run_async(get_session()) is session
+    gitlabapi.close()
+    assert session.closed
+
+
+@responses.activate
+def test_get_projects_runners_decodes_json_without_python_gitlab(gitlabapi):
+    gitlabapi.server = "https://gitlab.server.com"
+    responses.add(
+        responses.GET,
+        "https://gitlab.server.com/api/v4/projects/1/runners?per_page=100",
+        json=[
+            {
+                "id": 6,
+                "description": "qa-01.01",
+                "ip_address": None,
+                "active": True,
+                "paused": False,
+                "is_shared": False,
+                "runner_type": "project_type",
+                "name": "gitlab-runner",
+                "online": True,
+                "status": "online",
+            }
+        ],
+    )
+    assert gitlabapi.get_projects_runners(1) == [
+        Runner(
+            id=6,
+            description="qa-01.01",
+            ip_address="",
+            active=True,
+            is_shared=False,
+            name="gitlab-runner",
+            online=True,
+            status="online",
+        )
+    ]
+    # python-gitlab client is created only when it is used
+    assert gitlabapi._gl is None
+
+
+def test_python_gitlab_client_is_created_on_first_use(gitlabapi):
+    with mock.patch("gitlab.Gitlab") as gitlab_mock:
+        assert gitlabapi._gl is None
+        assert gitlabapi.gl is gitlabapi.gl
+    gitlab_mock.assert_called_once_with(
+        gitlabapi.server, gitlabapi.token, session=gitlabapi.session
+    )
@@ -0,0 +1,62 @@
+import requests
+
+from gitlab_cli_tool.benchmarks import cli as cli_benchmark
+from gitlab_cli_tool.benchmarks.mock_gitlab import MockGitlab
+
+
+def test_mock_gitlab_paginates_like_gitlab():
+    with MockGitlab(runners_count=150) as server:
+        url = f"{server.url}/api/v4/projects/1/runners?per_page=100"
+        response = requests.get(url, headers={"PRIVATE-TOKEN": server.token})
+        assert len(response.json()) == 100
+        assert response.headers["X-Total-Pages"] == "2"
+        assert response.links["next"]["url"].endswith("page=2")
+        last_page = requests.get(
+            response.links["next"]["url"], headers={"PRIVATE-TOKEN": server.token}
+        )
+        assert len(last_page.json()) == 50
+        assert "next" not in last_page.links
+        assert last_page.links["prev"]["url"].endswith("page=1")
+        unauthorized = requests.get(url, headers={"PRIVATE-TOKEN": "wrong"})
+        assert unauthorized.status_code == 401
+
+
+def test_mock_gitlab_runner_etag():
+    with MockGitlab(runners_count=1) as server:
+        url = f"{server.url}/api/v4/runners/1000"
+        headers = {"PRIVATE-TOKEN": server.token}
+        etag = requests.get(url, headers=headers).headers["ETag"]
+        response = requests.get(url, headers={**headers, "If-None-Match": etag})
+        assert response.status_code == 304
+
+
+def test_mock_gitlab_rate_limit_and_errors():
+    with MockGitlab(runners_count=1, rate_limit=2, rate_limit_window=60) as server:
+        url = f"{server.url}/api/v4/runners/1000"
+        headers = {"PRIVATE-TOKEN": server.token}
+        responses = [requests.get(url, headers=headers) for _ in range(3)]
+        assert [response.status_code for response in responses] == [200, 200, 429]
+        assert responses[0].headers["RateLimit-Remaining"] == "1"
+        assert responses[2].headers["RateLimit-Remaining"] == "0"
+        assert 0 < int(responses[2].headers["Retry-After"]) <= 60
+    with MockGitlab(runners_count=1, error_rate=1.0) as server:
+        url = f"{server.url}/api/v4/projects/1/runners?per_page=100"
+        response = requests.get(url, headers={"PRIVATE-TOKEN": server.token})
+        assert response.status_code == 502
+        assert response.headers["Content-Type"].startswith("text/html")
+        assert server.statuses == {502: 1}
+
+
+def test_cli_benchmark_covers_phases_of_both_paths():
+    results = cli_benchmark.run(
+        list(cli_benchmark.PATHS), ["tag", "pause"], runners_count=20, repeat=1
+    )
+    for path in cli_benchmark.PATHS:
+        for command in ("tag", "pause"):
+            phases = results[path][command]
+            assert set(phases) == set(cli_benchmark.PHASES)
+            assert phases["http"] > 0
+            assert phases["total"] >= phases["http"] + phases["filter"]
+    assert results["oneshot"]["tag"]["startup"] > 0
+    assert results["oneshot"]["tag"]["import"] > 0
+    assert "+0.0%" in cli_benchmark.compare_table(results, results)
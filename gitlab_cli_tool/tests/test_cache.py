@@ -0,0 +1,98 @@
+import os
+import tempfile
+from unittest import mock
+
+from aiohttp import web
+
+from gitlab_cli_tool.benchmarks import load
+from gitlab_cli_tool.benchmarks.cli import gitlab_home
+from gitlab_cli_tool.benchmarks.mock_gitlab import MockGitlab
+from gitlab_cli_tool.cache import RunnerCache
+
+
+def test_runner_cache_save_and_load():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        with mock.patch("gitlab_cli_tool.cache.CACHE_DIR", tmpdirname):
+            cache = RunnerCache("https://gitlab.server.com")
+            cache.put(1, {"id": 1, "tag_list": ["atf"]}, 'W/"etag"')
+            cache.save()
+            assert os.path.exists(cache.filepath)
+            other_server_cache = RunnerCache("https://other.server.com")
+            assert other_server_cache.get(1) is None
+            cache = RunnerCache("https://gitlab.server.com")
+            entry = cache.get(1)
+    assert entry["data"] == {"id": 1, "tag_list": ["atf"]}
+    assert entry["etag"] == 'W/"etag"'
+    assert cache.is_fresh(entry)
+    cache.ttl = 0
+    assert not cache.is_fresh(entry)
+    cache.ttl = 3600
+    cache.refresh = True
+    assert not cache.is_fresh(entry)
+
+
+def test_get_runners_tag_list_uses_cache(gitlabapi, gitlab_stub):
+    requests_headers = []
+
+    async def get_runner(request):
+        requests_headers.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return web.Response(status=304)
+        return web.json_response(
+            {"id": 1, "tag_list": ["atf", "qa-01.01"]}, headers={"ETag": '"v1"'}
+        )
+
+    async def get_tags():
+        session = await gitlabapi.get_aiohttp_session()
+        tags = [await gitlabapi.get_runners_tag_list(runner, session)]
+        tags.append(await gitlabapi.get_runners_tag_list(runner, session))
+        gitlabapi.runner_cache.ttl = 0
+        tags.append(await gitlabapi.get_runners_tag_list(runner, session))
+        return tags
+
+    runner = mock.Mock()
+    runner.id = 1
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        with mock.patch("gitlab_cli_tool.cache.CACHE_DIR", tmpdirname):
+            gitlabapi.runner_cache = RunnerCache("server")
+            output = gitlab_stub(
+                [web.get("/api/v4/runners/{id}", get_runner)], get_tags
+            )
+    assert output == [["atf", "qa-01.01"]] * 3
+    # second call was served from cache, third one was revalidated
+    assert requests_headers == [None, '"v1"']
+
+
+def test_list_after_retag_shows_new_tags(monkeypatch):
+    """
+    Retag starts from tags on Gitlab, not from the cache, and its result is cached
+    """
+    with MockGitlab(20) as server, gitlab_home(server) as home:
+        monkeypatch.setenv("HOME", home)
+        monkeypatch.setattr("builtins.input", lambda prompt: "Y")
+        api = None
+
+        def run(**kwargs):
+            nonlocal api
+            data_filter = load.make_filter(server, api, kwargs)
+            api = data_filter.api
+            return data_filter.get_filtered_data()
+
+        try:
+            run(action=["list"])
+            # changed on Gitlab while the cached details are still fresh
+            server.runners[1001]["tag_list"].append("gpu")
+            run(action=["retag", "pool-1:pool-one"], names=["qa-00.01"])
+            assert server.runners[1001]["tag_list"] == [
+                "atf",
+                "qa-00.01",
+                "pool-one",
+                "gpu",
+            ]
+            requests_before = server.requests["GET /api/v4/runners/{runner_id}"]
+            output = run(action=["list"], tags=["=pool-one"])
+            assert "qa-00.01" in output and "pool-one" in output
+            # details came from the PUT response
+            assert server.requests["GET /api/v4/runners/{runner_id}"] == requests_before
+        finally:
+            api.close()
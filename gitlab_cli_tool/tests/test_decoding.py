@@ -0,0 +1,38 @@
+import json
+
+import pytest
+
+from gitlab_cli_tool import decoding
+from gitlab_cli_tool.benchmarks import decode as decode_benchmark
+from gitlab_cli_tool.models import runner_from_json
+
+BACKENDS = decode_benchmark.available_backends()
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_decode_runners_page(backend):
+    data = decode_benchmark.load_page("runners_page.json")
+    runners = decoding.decode_runners(data, backend)
+    assert runners == [runner_from_json(runner) for runner in json.loads(data)]
+    assert runners[0].description == "qa-01.01"
+    assert runners[0].tag_list == []
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_decode_job_runner_ids(backend):
+    data = b'[{"id": 1, "runner": {"id": 278}}, {"id": 2, "runner": null}, {"id": 3}]'
+    assert decoding.decode_job_runner_ids(data, backend) == [278]
+
+
+def test_requests_ask_for_compression(gitlabapi):
+    assert gitlabapi.session.headers["Accept-Encoding"].startswith("gzip, deflate")
+    assert gitlabapi.headers["Accept-Encoding"] == decoding.ACCEPT_ENCODING
+
+
+def test_decode_benchmark_runs():
+    rows = decode_benchmark.run(repeat=1)
+    assert {row[0] for row in rows} == set(decode_benchmark.PAGES)
+    sizes = decode_benchmark.compressed_sizes(
+        decode_benchmark.load_page("jobs_page.json")
+    )
+    assert sizes["gzip"] < sizes["identity"]
@@ -0,0 +1,184 @@
+from unittest import mock
+
+import pytest
+
+from gitlab_cli_tool import expressions
+from gitlab_cli_tool.benchmarks.micro import build_fleet
+from gitlab_cli_tool.expressions import And, Not, Or, Term
+from gitlab_cli_tool.filters import RunnerIndex
+from gitlab_cli_tool.gitlab_cli import GitLabCLI
+from gitlab_cli_tool.planner import LIST, DETAILS
+from gitlab_cli_tool.table import RunnerTable
+from gitlab_cli_tool.tests.conftest import ALL_INFO_RUNNERS
+
+
+def test_parse_precedence():
+    assert expressions.parse(
+        "tag:atf AND name:qa-0 OR NOT tag:=ios13 AND status:paused"
+    ) == Or(
+        [
+            And([Term("tag", "atf"), Term("name", "qa-0")]),
+            And([Not(Term("tag", "ios13", exact=True)), Term("status", "paused")]),
+        ]
+    )
+    assert expressions.parse('(name:"qa-0" or tag:x1) and not status:online') == And(
+        [
+            Or([Term("name", "qa-0"), Term("tag", "x1")]),
+            Not(Term("status", "online")),
+        ]
+    )
+
+
+@pytest.mark.parametrize(
+    "expression",
+    ["", "tag:", "tag:atf AND", "(tag:atf", "tag:atf)", "colour:red", "name:=qa", "qa"],
+)
+def test_parse_errors(expression):
+    with pytest.raises(RuntimeError):
+        expressions.parse(expression)
+
+
+def test_predicate_on_listing_and_index():
+    expression = expressions.parse("tag:=tag-x3 AND NOT name:02.02 OR name:01.02")
+    expected = ALL_INFO_RUNNERS[1:3]
+    predicate = expressions.compile_predicate(expression)
+    assert [runner for runner in ALL_INFO_RUNNERS if predicate(runner)] == expected
+    predicate = expressions.compile_predicate(
+        expression, runner_index=RunnerIndex(ALL_INFO_RUNNERS)
+    )
+    assert [runner for runner in ALL_INFO_RUNNERS if predicate(runner)] == expected
+
+
+def test_predicate_with_index_matches_scan_on_big_fleet():
+    runners = build_fleet(2000, max_tags=3)
+    index = RunnerIndex(runners)
+    for text in (
+        "tag:=os-3 AND NOT tag:pool-1",
+        "name:qa-001 OR tag:t-4 AND status:online",
+    ):
+        expression = expressions.parse(text)
+        scan = expressions.compile_predicate(expression)
+        indexed = expressions.compile_predicate(expression, runner_index=index)
+        assert [runner for runner in runners if scan(runner)] == [
+            runner for runner in runners if indexed(runner)
+        ]
+
+
+def test_rows_of_table_match_predicate():
+    runners = build_fleet(2000, max_tags=3)
+    table = RunnerTable.from_runners(runners)
+    for text in (
+        "tag:=os-3 AND NOT tag:pool-1",
+        "name:qa-001 OR tag:t-4 AND status:online",
+        "(tag:=os-1 OR tag:host-12) AND NOT (name:5 OR name:7)",
+        "NOT status:online",
+    ):
+        expression = expressions.parse(text)
+        predicate = expressions.compile_predicate(expression)
+        rows = expressions.select_rows(expression, table)
+        assert [runners[row] for row in rows] == [
+            runner for runner in runners if predicate(runner)
+        ]
+
+
+def test_details_are_filtered_on_table(gitlabdatafilter):
+    gitlabdatafilter.names = None
+    gitlabdatafilter.tags = ["=tag-x2", "tag-x3"]
+    gitlabdatafilter.ignore = ["tag", "=tag-x1"]
+    gitlabdatafilter.filter_expression = None
+    (planned,) = gitlabdatafilter.plan_query().filters
+    with mock.patch(
+        "gitlab_cli_tool.cli_api.RunnerTable.from_runners",
+        wraps=RunnerTable.from_runners,
+    ) as from_runners:
+        assert planned.apply(ALL_INFO_RUNNERS[:]) == []
+    from_runners.assert_called_once_with(ALL_INFO_RUNNERS)
+    gitlabdatafilter.ignore = None
+    (planned,) = gitlabdatafilter.plan_query().filters
+    assert planned.apply(ALL_INFO_RUNNERS[:]) == ALL_INFO_RUNNERS
+
+
+def test_split_by_data_and_exact_tag_alternatives():
+    expression = expressions.parse(
+        "name:qa AND (tag:=atf OR tag:=ios) AND tag:=linux AND status:online"
+    )
+    listing, details = expressions.split_by_data(expression)
+    assert expressions.describe(listing) == "(name:qa AND status:online)"
+    assert expressions.describe(details) == "((tag:=atf OR tag:=ios) AND tag:=linux)"
+    assert expressions.exact_tag_alternatives(expression) == [
+        {"atf", "linux"},
+        {"ios", "linux"},
+    ]
+    assert (
+        expressions.exact_tag_alternatives(
+            expressions.parse("NOT tag:=atf OR (tag:=atf AND name:qa)")
+        )
+        is None
+    )
+    assert expressions.exact_tag_alternatives(
+        expressions.parse("tag:=a OR (tag:=a AND tag:ios)")
+    ) == [{"a"}]
+
+
+def test_filter_expression_pushes_exact_tags_down(gitlabdatafilter):
+    gitlabdatafilter.names = None
+    gitlabdatafilter.tags = None
+    gitlabdatafilter.ignore = None
+    gitlabdatafilter.filter_expression = "tag:=tag-x2 AND name:qa-0 AND NOT tag:x3"
+    plan = gitlabdatafilter.plan_query()
+    assert [planned.needs for planned in plan.filters] == [LIST, DETAILS]
+    with mock.patch.object(
+        gitlabdatafilter.api, "get_projects_runners", return_value=ALL_INFO_RUNNERS[:]
+    ) as get_projects_runners_mock, mock.patch.object(
+        gitlabdatafilter.api,
+        "get_runners_with_project_data",
+        side_effect=lambda runners, project_id, with_active_jobs: (
+            runners,
+            "dummy-project",
+            {},
+        ),
+    ):
+        runners = gitlabdatafilter.get_filtered_runners()
+    get_projects_runners_mock.assert_called_once_with(
+        gitlabdatafilter.project_id, [["tag-x2"]]
+    )
+    assert runners == ALL_INFO_RUNNERS[:2]
+
+
+def test_filter_expression_is_combined_with_names_and_tags():
+    cli = GitLabCLI()
+    cli.assign_args_to_cli(["runners", "list", "--filter", "tag:atf", "--name", "qa"])
+    assert cli.check_filters()
+    cli.assign_args_to_cli(
+        ["runners", "list", "--filter", "tag:atf", "--branch", "main"]
+    )
+    assert not cli.check_filters()
+
+
+def test_tag_name_and_ignore_are_one_predicate(gitlabdatafilter):
+    gitlabdatafilter.names = ["qa-0"]
+    gitlabdatafilter.tags = ["=tag-x2", "tag-x3"]
+    gitlabdatafilter.ignore = ["name", "qa-01.02"]
+    gitlabdatafilter.filter_expression = "status:online"
+    plan = gitlabdatafilter.plan_query()
+    assert [(planned.description, planned.needs) for planned in plan.filters] == [
+        ("(name:qa-0 AND status:online AND NOT name:qa-01.02) as substring", LIST),
+        ("(tag:=tag-x2 OR tag:tag-x3)", DETAILS),
+    ]
+    # not every runner has an exact tag, Gitlab lists all runners
+    assert plan.server_tag_lists == []
+    runners = ALL_INFO_RUNNERS[:]
+    for planned in plan.filters:
+        runners = planned.apply(runners)
+    expected = [
+        runner
+        for runner in ALL_INFO_RUNNERS
+        if "qa-0" in runner.description
+        and runner.status == "online"
+        and runner.description != "qa-01.02"
+        and (
+            "tag-x2" in runner.tag_list
+            or any("tag-x3" in tag for tag in runner.tag_list)
+        )
+    ]
+    assert runners == expected
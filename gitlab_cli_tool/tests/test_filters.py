@@ -0,0 +1,104 @@
+import pytest
+from prompt_toolkit.document import Document
+
+from gitlab_cli_tool.filters import RunnerIndex, NameMatcher, compile_name_matcher
+from gitlab_cli_tool.gitlab_cli import GitLabCLI
+from gitlab_cli_tool.run import GitlabCLICompleter
+from gitlab_cli_tool.tests.conftest import ALL_INFO_RUNNERS
+
+
+def test_runner_index_find_tags():
+    index = RunnerIndex(ALL_INFO_RUNNERS)
+    assert index.find_tags("TAG-X1") == {"tag-x1"}
+    assert index.find_tags("x") == {"tag-x1", "tag-x2", "tag-x3"}
+    assert index.find_tags("ag-x") == {"tag-x1", "tag-x2", "tag-x3"}
+    assert index.find_tags("") == {"tag-x1", "tag-x2", "tag-x3"}
+    assert index.find_tags("tag-x4") == set()
+    assert index.find_tags("x1-tag") == set()
+
+
+def test_runner_index_filter_keeps_or_semantics_and_order(gitlabapi):
+    index = RunnerIndex(ALL_INFO_RUNNERS)
+    assert index.filter(ALL_INFO_RUNNERS, ["x3"]) == ALL_INFO_RUNNERS[2:]
+    assert index.filter(ALL_INFO_RUNNERS, ["x3", "x2"]) == ALL_INFO_RUNNERS
+    # subset of indexed snapshot
+    assert index.filter(ALL_INFO_RUNNERS[1:3], ["tag"]) == ALL_INFO_RUNNERS[1:3]
+    for tags in (["x1"], ["x2"], ["x3"], ["x2", "x3"], ["tag-x"], ["TAG-X2"]):
+        expected = [
+            runner
+            for runner in ALL_INFO_RUNNERS
+            if any(gitlabapi.check_if_tag_in_list(tag, runner.tag_list) for tag in tags)
+        ]
+        assert index.filter(ALL_INFO_RUNNERS, tags) == expected
+
+
+def test_completer_suggests_tags_from_last_listing():
+    cli = GitLabCLI()
+    completer = GitlabCLICompleter(cli)
+    text = "runners list --tag x"
+    assert "tag-x1" not in [
+        completion.text
+        for completion in completer.get_completions(Document(text), None)
+    ]
+    cli.runner_index = RunnerIndex(ALL_INFO_RUNNERS)
+    assert [
+        completion.text
+        for completion in completer.get_completions(Document(text), None)
+    ] == ["tag-x1", "tag-x2", "tag-x3"]
+    text = "runners list --name qa"
+    assert "tag-x1" not in [
+        completion.text
+        for completion in completer.get_completions(Document(text), None)
+    ]
+
+
+def test_name_matcher_substring():
+    matcher = NameMatcher(["QA-01", "02.0", "qa-0.1"])
+    assert matcher.filter(ALL_INFO_RUNNERS) == ALL_INFO_RUNNERS
+    # dot is not a wildcard in substring mode
+    matcher = NameMatcher(["qa.01"])
+    assert matcher.filter(ALL_INFO_RUNNERS) == []
+    assert NameMatcher([]).filter(ALL_INFO_RUNNERS) == []
+
+
+def test_name_matcher_glob_and_regex():
+    runners = ALL_INFO_RUNNERS
+    assert NameMatcher(["qa-0[2-4].*"], "glob").filter(runners) == runners[2:]
+    assert NameMatcher(["*.02"], "glob").filter(runners) == [runners[1], runners[3]]
+    # glob matches whole description
+    assert NameMatcher(["qa-01"], "glob").filter(runners) == []
+    assert NameMatcher(["qa-0[1-4].*"], "regex").filter(runners) == runners
+    assert NameMatcher([r"01$", r"^QA-02\.01"], "regex").filter(runners) == [
+        runners[0],
+        runners[2],
+    ]
+    with pytest.raises(RuntimeError):
+        NameMatcher(["qa-0[1"], "regex")
+
+
+def test_compile_name_matcher_is_cached():
+    assert compile_name_matcher(("qa-01",), "substring") is compile_name_matcher(
+        ("qa-01",), "substring"
+    )
+    assert compile_name_matcher(("qa-01",), "substring") is not compile_name_matcher(
+        ("qa-01",), "glob"
+    )
+
+
+def test_ignore_by_name_with_regex(gitlabdatafilter):
+    gitlabdatafilter.name_matching = "regex"
+    gitlabdatafilter.ignore = ["name", r"\.0[12]$"]
+    assert gitlabdatafilter.ignore_runners(ALL_INFO_RUNNERS[:]) == []
+    gitlabdatafilter.ignore = ["name", r"\.01$"]
+    assert gitlabdatafilter.ignore_runners(ALL_INFO_RUNNERS[:]) == [
+        ALL_INFO_RUNNERS[1],
+        ALL_INFO_RUNNERS[3],
+    ]
+
+
+def test_runner_index_exact_tags():
+    index = RunnerIndex(ALL_INFO_RUNNERS)
+    assert index.find_tags("=TAG-X1") == {"tag-x1"}
+    assert index.find_tags("=tag-x") == set()
+    assert index.filter(ALL_INFO_RUNNERS, ["=tag-x3"]) == ALL_INFO_RUNNERS[2:]
+    assert index.complete("=x2") == ["=tag-x2"]
@@ -0,0 +1,149 @@
+import aiohttp
+import pytest
+from aiohttp import web
+
+from gitlab_cli_tool.cli_api import Runner
+from gitlab_cli_tool.graphql_api import GitlabGraphQLAPI, GraphQLError
+from gitlab_cli_tool.tests.conftest import ALL_INFO_RUNNERS
+
+GRAPHQL_RUNNERS_PAGES = {
+    None: {
+        "pageInfo": {"hasNextPage": True, "endCursor": "cursor1"},
+        "nodes": [
+            {
+                "id": "gid://gitlab/Ci::Runner/1",
+                "description": "qa-01.01",
+                "ipAddress": "123.12.12.10",
+                "paused": False,
+                "runnerType": "PROJECT_TYPE",
+                "status": "ONLINE",
+                "tagList": ["atf", "qa-01.01"],
+            }
+        ],
+    },
+    "cursor1": {
+        "pageInfo": {"hasNextPage": False, "endCursor": "cursor2"},
+        "nodes": [
+            {
+                "id": "gid://gitlab/Ci::Runner/2",
+                "description": "qa-01.02",
+                "ipAddress": None,
+                "paused": True,
+                "runnerType": "INSTANCE_TYPE",
+                "status": "OFFLINE",
+                "tagList": [],
+            }
+        ],
+    },
+}
+# runner 2 is shared, its jobs in other projects are not counted
+GRAPHQL_JOBS_PAGE = {
+    "pageInfo": {"hasNextPage": False, "endCursor": "cursor1"},
+    "nodes": [
+        {"runner": {"id": "gid://gitlab/Ci::Runner/1"}},
+        {"runner": None},
+        {"runner": {"id": "gid://gitlab/Ci::Runner/1"}},
+    ],
+}
+
+
+@pytest.fixture()
+def get_projects_runners(gitlabapi, gitlab_stub):
+    """
+    :return: function running GitlabGraphQLAPI.get_projects_runners against given handler
+    """
+
+    def run(handler):
+        async def get():
+            graphql = GitlabGraphQLAPI(gitlabapi.server, "token")
+            async with aiohttp.ClientSession() as session:
+                return await graphql.get_projects_runners(session, 234)
+
+        return gitlab_stub([web.post("/api/graphql", handler)], get)
+
+    return run
+
+
+def test_get_projects_runners(get_projects_runners):
+    requests = []
+
+    async def graphql_endpoint(request):
+        body = await request.json()
+        if "projectRunningJobs" in body["query"]:
+            project = {"name": "dummy", "jobs": GRAPHQL_JOBS_PAGE}
+        else:
+            requests.append((request.headers["Authorization"], body["variables"]))
+            runners = GRAPHQL_RUNNERS_PAGES[body["variables"]["after"]]
+            project = {"name": "dummy", "runners": runners}
+        return web.json_response({"data": {"projects": {"nodes": [project]}}})
+
+    project_name, runners = get_projects_runners(graphql_endpoint)
+    assert project_name == "dummy"
+    assert runners == [
+        Runner(
+            id=1,
+            description="qa-01.01",
+            ip_address="123.12.12.10",
+            active=True,
+            is_shared=False,
+            name="qa-01.01",
+            online=True,
+            status="online",
+            tag_list=["atf", "qa-01.01"],
+            active_jobs=2,
+        ),
+        Runner(
+            id=2,
+            description="qa-01.02",
+            ip_address="",
+            active=False,
+            is_shared=True,
+            name="qa-01.02",
+            online=False,
+            status="paused",
+            tag_list=[],
+            active_jobs=0,
+        ),
+    ]
+    assert requests == [
+        ("Bearer token", {"projectIds": ["gid://gitlab/Project/234"], "after": None}),
+        (
+            "Bearer token",
+            {"projectIds": ["gid://gitlab/Project/234"], "after": "cursor1"},
+        ),
+    ]
+
+
+def test_get_projects_runners_graphql_error(get_projects_runners):
+    async def graphql_endpoint(request):
+        return web.json_response(
+            {"errors": [{"message": "Field 'runners' doesn't exist on type 'Project'"}]}
+        )
+
+    with pytest.raises(GraphQLError) as raise_info:
+        get_projects_runners(graphql_endpoint)
+    assert "doesn't exist" in str(raise_info.value)
+
+
+def test_auto_backend_falls_back_to_rest(gitlabdatafilter_with_api):
+    data_filter = gitlabdatafilter_with_api
+    data_filter.backend = "auto"
+    data_filter.names = None
+    data_filter.tags = None
+    data_filter.api.get_projects_runners_graphql.side_effect = GraphQLError("error")
+    data_filter.api.get_runners_with_project_data.return_value = (
+        ALL_INFO_RUNNERS[:2],
+        "dummy",
+        {},
+    )
+    assert data_filter.get_filtered_runners() == ALL_INFO_RUNNERS[:2]
+    assert data_filter.counted_jobs == {}
+
+    data_filter.api.get_projects_runners_graphql.side_effect = None
+    data_filter.api.get_projects_runners_graphql.return_value = (
+        "dummy",
+        ALL_INFO_RUNNERS[2:],
+    )
+    assert data_filter.get_filtered_runners() == ALL_INFO_RUNNERS[2:]
+    assert data_filter.project_name == "dummy"
+    assert data_filter.api.get_runners_with_project_data.call_count == 1
@@ -0,0 +1,79 @@
+import math
+
+import pytest
+
+from gitlab_cli_tool.benchmarks import load
+
+# runners named qa-0X.YY, matched by --name qa-0
+PAUSED_RUNNERS = 100
+
+
+def pages(items: int) -> int:
+    return max(1, math.ceil(items / 100))
+
+
+# only the smallest fleet runs by default, bigger ones with GITLAB_CLI_SLOW_TESTS=1
+FLEETS = [load.FLEETS[0]] + [
+    pytest.param(fleet, marks=pytest.mark.slow) for fleet in load.FLEETS[1:]
+]
+
+
+@pytest.fixture(scope="module", params=FLEETS)
+def fleet_results(request):
+    return {
+        result.scenario: result for result in load.run_fleet(request.param, latency=0)
+    }
+
+
+def test_scenarios_succeed(fleet_results):
+    assert [result.error for result in fleet_results.values()] == [None] * len(
+        load.SCENARIOS
+    )
+    for result in fleet_results.values():
+        assert set(result.statuses) == {200}
+
+
+def test_requests_scale_with_fleet(fleet_results):
+    fleet = fleet_results["list cold"].fleet
+    listing = pages(fleet)
+    # project name and running jobs (every third runner has one) with every listing
+    project_data = 1 + pages(math.ceil(fleet / 3))
+    assert fleet_results["list cold"].requests_count == listing + fleet + project_data
+    # details of every runner come from the cache
+    assert fleet_results["list warm"].requests_count == listing + project_data
+    assert fleet_results["list --tag"].requests_count == listing + project_data
+    changed = min(fleet, PAUSED_RUNNERS)
+    assert fleet_results["pause"].requests["PUT /api/v4/runners/{runner_id}"] == changed
+    # details of changed runners are fetched again, not taken from the cache
+    assert fleet_results["pause"].requests_count == listing + project_data + 2 * changed
+    assert (
+        fleet_results["resume"].requests_count == listing + project_data + 2 * changed
+    )
+
+
+def test_warm_listing_is_faster_than_cold(fleet_results):
+    assert fleet_results["list warm"].seconds < fleet_results["list cold"].seconds
+
+
+def test_failures_are_recorded():
+    results = load.run_fleet(20, error_rate=1.0)
+    assert all(result.error for result in results)
+    assert "502" in load.results_table(results)
+
+
+def test_transient_failures_cost_one_request_each():
+    results = {
+        result.scenario: result
+        for result in load.run_fleet(50, error_rate=0.05, seed=1)
+    }
+    assert [result.error for result in results.values()] == [None] * len(load.SCENARIOS)
+    listing, project_data = pages(50), 1 + pages(math.ceil(50 / 3))
+    for scenario, requests_count in (
+        ("list cold", listing + 50 + project_data),
+        ("list warm", listing + project_data),
+        ("pause", listing + project_data + 2 * 50),
+    ):
+        assert (
+            results[scenario].requests_count
+            == requests_count + results[scenario].statuses[502]
+        )
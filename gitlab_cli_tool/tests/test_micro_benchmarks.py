@@ -0,0 +1,45 @@
+import os
+
+import pytest
+
+from gitlab_cli_tool.benchmarks import micro
+
+# 100k fleets take about a minute, e.g. GITLAB_CLI_BENCHMARK_SIZES=1000,10000,100000
+SIZES = [
+    int(size)
+    for size in os.environ.get("GITLAB_CLI_BENCHMARK_SIZES", "1000,10000").split(",")
+]
+BASELINES = micro.load_baselines()
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("size", SIZES)
+@pytest.mark.parametrize("case", list(micro.CASES))
+def test_no_regression_against_baseline(case, size):
+    baseline = BASELINES.get(micro.key(case, size))
+    if baseline is None:
+        pytest.skip(
+            "No baseline, run: python -m gitlab_cli_tool.benchmarks.micro --update"
+        )
+    relative = micro.measure(case, size)
+    if relative > baseline * micro.THRESHOLD:
+        # one slow run is often a busy machine, a regression is slow again
+        relative = min(relative, micro.measure(case, size))
+    assert relative <= baseline * micro.THRESHOLD, (
+        f"{case} on {size} runners is {relative / baseline:.1f}x slower than baseline, "
+        "if it is expected run: python -m gitlab_cli_tool.benchmarks.micro --update"
+    )
+
+
+def test_fleet_has_1_to_50_tags_per_runner():
+    tags_counts = {len(runner.tag_list) for runner in micro.make_fleet(1000)}
+    assert tags_counts == set(range(1, micro.MAX_TAGS + 1))
+
+
+def test_retag_does_not_change_original_runner():
+    runner = micro.make_fleet(100)[1]
+    tag_list = list(runner.tag_list)
+    measured = micro.CASES["retag_algorithm"]([runner])
+    ((changed, new_runner),) = measured()
+    assert runner.tag_list == tag_list
+    assert new_runner.tag_list == ["os-1", "pool-one"] + tag_list[2:]
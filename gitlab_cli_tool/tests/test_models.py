@@ -0,0 +1,17 @@
+import pytest
+
+from gitlab_cli_tool.models import Runner
+from gitlab_cli_tool.benchmarks.micro import build_fleet
+
+
+def vars_of(runner):
+    return {name: getattr(runner, name) for name in Runner.__slots__}
+
+
+def test_runner_has_slots_and_interned_tags():
+    first, second = build_fleet(2)[0], Runner(**vars_of(build_fleet(1)[0]))
+    assert not hasattr(first, "__dict__")
+    with pytest.raises(AttributeError):
+        first.colour = "red"
+    assert first == second
+    assert first.tag_list[0] is second.tag_list[0]
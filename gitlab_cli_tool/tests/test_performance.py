@@ -0,0 +1,57 @@
+import time
+
+import pytest
+
+from gitlab_cli_tool.filters import RunnerSet
+from gitlab_cli_tool.benchmarks.micro import build_fleet
+
+FLEET_SIZE = 10000
+# seconds, timings are asserted only with GITLAB_CLI_BENCHMARKS=1
+BUDGET = 0.5
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def test_relative_complement_of_runners_10k(gitlabdatafilter):
+    runners = build_fleet(FLEET_SIZE, max_tags=3)
+    # ignored runners are copies, so they are compared by id and not by identity
+    runners_to_ignore = build_fleet(FLEET_SIZE, max_tags=3)[::2]
+    output = gitlabdatafilter.relative_complement_of_runners(runners, runners_to_ignore)
+    assert output == runners[1::2]
+
+
+def test_runner_set_operations_10k():
+    runners = build_fleet(FLEET_SIZE, max_tags=3)
+    even = RunnerSet(runners[::2])
+    first_half = RunnerSet(runners[: FLEET_SIZE // 2])
+    assert len(even.union(first_half)) == FLEET_SIZE // 2 + FLEET_SIZE // 4
+    assert list(even.intersection(first_half)) == runners[: FLEET_SIZE // 2 : 2]
+    assert list(even.difference(first_half)) == runners[FLEET_SIZE // 2 :: 2]
+    assert runners[0] in even and runners[1] not in even
+
+
+@pytest.mark.benchmark
+def test_relative_complement_of_runners_10k_within_budget(gitlabdatafilter):
+    runners = build_fleet(FLEET_SIZE, max_tags=3)
+    runners_to_ignore = build_fleet(FLEET_SIZE, max_tags=3)[::2]
+    _, elapsed = timed(
+        gitlabdatafilter.relative_complement_of_runners, runners, runners_to_ignore
+    )
+    # list based complement needed ~50M dataclass comparisons for the same fleet
+    assert elapsed < BUDGET
+
+
+@pytest.mark.benchmark
+def test_runner_set_operations_10k_within_budget():
+    runners = build_fleet(FLEET_SIZE, max_tags=3)
+    even = RunnerSet(runners[::2])
+    first_half = RunnerSet(runners[: FLEET_SIZE // 2])
+    elapsed = [
+        timed(operation, first_half)[1]
+        for operation in (even.union, even.intersection, even.difference)
+    ]
+    assert max(elapsed) < BUDGET
@@ -0,0 +1,171 @@
+from unittest import mock
+
+import responses
+
+from gitlab_cli_tool.cli_api import GitLabDataFilter
+from gitlab_cli_tool.planner import LIST, DETAILS, PlannedFilter, QueryPlan
+from gitlab_cli_tool.tests.conftest import ALL_INFO_RUNNERS, ALL_INFO_RUNNERS_DICT
+
+
+def test_plan_orders_filters_by_needed_data(gitlabdatafilter):
+    gitlabdatafilter.names = None
+    gitlabdatafilter.tags = ["tag-x3"]
+    gitlabdatafilter.ignore = ["name", "qa-02.02"]
+    plan = gitlabdatafilter.plan_query()
+    assert [planned.needs for planned in plan.filters] == [LIST, DETAILS]
+    assert plan.apply(ALL_INFO_RUNNERS[:], LIST) == ALL_INFO_RUNNERS[:3]
+    assert plan.apply(ALL_INFO_RUNNERS[:3], DETAILS) == ALL_INFO_RUNNERS[2:3]
+
+
+def test_details_fetched_only_for_runners_left_after_name_filter(gitlabdatafilter):
+    gitlabdatafilter.names = ["qa-01"]
+    gitlabdatafilter.tags = None
+    gitlabdatafilter.ignore = ["tag", "tag-x2"]
+    with mock.patch.object(
+        gitlabdatafilter.api, "get_projects_runners", return_value=ALL_INFO_RUNNERS[:]
+    ), mock.patch.object(
+        gitlabdatafilter.api,
+        "get_runners_with_project_data",
+        side_effect=lambda runners, project_id, with_active_jobs: (
+            runners,
+            "dummy-project",
+            {},
+        ),
+    ) as get_runners_data_mock:
+        runners = gitlabdatafilter.get_filtered_runners()
+    get_runners_data_mock.assert_called_once_with(
+        ALL_INFO_RUNNERS[:2], gitlabdatafilter.project_id, True
+    )
+    assert runners == []
+
+
+def test_explain(gitlabdatafilter):
+    gitlabdatafilter.project_id = 234
+    gitlabdatafilter.names = ["qa-01"]
+    gitlabdatafilter.tags = None
+    gitlabdatafilter.ignore = None
+    gitlabdatafilter.show_active_jobs = False
+    with mock.patch.object(
+        gitlabdatafilter.api, "get_projects_runners", return_value=ALL_INFO_RUNNERS[:]
+    ), mock.patch.object(
+        gitlabdatafilter.api.runner_cache,
+        "has_fresh",
+        side_effect=lambda runner_id: runner_id == 1,
+    ):
+        output = gitlabdatafilter.explain_query()
+    assert output == (
+        "1. GET /projects/234/runners (paginated) -> 4 runners\n"
+        "2. filter name:qa-01 as substring (local) -> 2 runners\n"
+        "3. GET /runners/:id for 1 runners (1 served from cache)\n"
+        "4. GET /projects/234"
+    )
+
+
+def test_explain_graphql_plan_sends_no_request(gitlabdatafilter):
+    gitlabdatafilter.names = ["qa-01"]
+    gitlabdatafilter.tags = None
+    gitlabdatafilter.ignore = None
+    for backend in ("graphql", "auto"):
+        gitlabdatafilter.backend = backend
+        with mock.patch.object(
+            gitlabdatafilter.api, "get_projects_runners"
+        ) as get_projects_runners_mock:
+            output = gitlabdatafilter.explain_query()
+        get_projects_runners_mock.assert_not_called()
+        assert output.startswith("1. POST /api/graphql")
+    assert output.splitlines()[-1] == (
+        "REST API is used instead when Gitlab does not support the query, "
+        "see --backend rest --explain"
+    )
+
+
+def test_explain_counts_runners_after_each_filter():
+    plan = QueryPlan(
+        [
+            PlannedFilter(
+                "name:qa-0",
+                LIST,
+                lambda runners: [r for r in runners if "qa-0" in r.description],
+            ),
+            PlannedFilter(
+                "name:qa-01",
+                LIST,
+                lambda runners: [r for r in runners if "qa-01" in r.description],
+            ),
+            PlannedFilter(
+                "status:paused",
+                LIST,
+                lambda runners: [r for r in runners if r.status == "paused"],
+            ),
+        ],
+        show_active_jobs=False,
+    )
+    counts = []
+    assert plan.apply(ALL_INFO_RUNNERS[:], LIST, counts) == []
+    assert counts == [4, 2, 0]
+    assert plan.explain(234, 4, counts).splitlines()[1:5] == [
+        "2. filter name:qa-0 (local) -> 4 runners",
+        "3. filter name:qa-01 (local) -> 2 runners",
+        "4. filter status:paused (local) -> 0 runners",
+        "5. GET /runners/:id for 0 runners (0 served from cache)",
+    ]
+    # without filters all listed runners survive
+    assert (
+        QueryPlan([], show_active_jobs=False)
+        .explain(234, 4, [])
+        .endswith(
+            "GET /runners/:id for 4 runners (0 served from cache)\n3. GET /projects/234"
+        )
+    )
+
+
+def test_format_output_without_active_jobs():
+    output = GitLabDataFilter.format_output(
+        ALL_INFO_RUNNERS[:1], "dummy-project", show_active_jobs=False
+    )
+    assert "ACTIVE JOBS" not in output
+    assert output.splitlines()[2].split() == [
+        "qa-01.01",
+        "tag-x1,",
+        "tag-x2",
+        "dummy-project",
+        "online",
+    ]
+
+
+@responses.activate
+def test_exact_tags_are_fetched_by_gitlab_and_deduplicated(gitlabdatafilter):
+    gitlabdatafilter.project_id = 234
+    gitlabdatafilter.names = None
+    gitlabdatafilter.tags = ["=tag-x2", "=tag-x3"]
+    gitlabdatafilter.ignore = None
+    gitlabdatafilter.show_active_jobs = False
+    gitlabdatafilter.api.server = "https://gitlab.server.com"
+    for tag, listing in (
+        ("tag-x2", [ALL_INFO_RUNNERS_DICT[i] for i in (0, 1, 3)]),
+        ("tag-x3", ALL_INFO_RUNNERS_DICT[2:]),
+    ):
+        responses.add(
+            responses.GET,
+            f"https://gitlab.server.com/api/v4/projects/234/runners?per_page=100&tag_list={tag}",
+            json=listing,
+        )
+    with mock.patch.object(
+        gitlabdatafilter.api.runner_cache, "has_fresh", return_value=False
+    ):
+        assert gitlabdatafilter.api.get_projects_runners(
+            234, gitlabdatafilter.plan_query().server_tag_lists
+        ) == [
+            ALL_INFO_RUNNERS[0],
+            ALL_INFO_RUNNERS[1],
+            ALL_INFO_RUNNERS[3],
+            ALL_INFO_RUNNERS[2],
+        ]
+        output = gitlabdatafilter.explain_query()
+    assert output.splitlines()[0] == (
+        "1. GET /projects/234/runners?tag_list=tag-x2, "
+        "GET /projects/234/runners?tag_list=tag-x3 (paginated, concurrently) -> 4 runners"
+    )
+    # substring tags need all runners of project
+    gitlabdatafilter.tags = ["=tag-x2", "x3"]
+    assert gitlabdatafilter.plan_query().server_tag_lists == []
@@ -6,6 +6,7 @@ from unittest.mock import call
 
 import pytest
 import responses
+from aiohttp import web
 
 from gitlab_cli_tool.cli_api import Filtering, Runner
 from gitlab_cli_tool.cli_api import GitLabDataFilter, GitlabAPI
@@ -307,3 +308,41 @@ def test_retag_filtered_runners(gitlabdatafilter):
     ]
     expected_runners = [Runner(**runner) for runner in expected_runners_list]
     assert expected_runners == [runner[2] for runner in runners_after_changes]
+
+
+def test_change_runners_tags_with_retries(gitlabapi, gitlab_stub, capsys):
+    gitlabapi.retry_policy.backoff = 0
+    runners = [copy.deepcopy(runner) for runner in ALL_INFO_RUNNERS]
+    for runner in runners:
+        runner.tag_list = ["tag-TEST"]
+    attempts = {}
+
+    async def put_runner(request):
+        runner_id = int(request.match_info["id"])
+        attempts[runner_id] = attempts.get(runner_id, 0) + 1
+        if runner_id == 1 and attempts[runner_id] == 1:
+            return web.json_response({}, status=429, headers={"Retry-After": "0"})
+        if runner_id == 2 and attempts[runner_id] < 3:
+            return web.json_response({}, status=502)
+        if runner_id == 3:
+            return web.json_response({}, status=503)
+        if runner_id == 4:
+            return web.json_response({}, status=403)
+        assert (await request.json()) == {"tag_list": "tag-TEST"}
+        return web.json_response({"id": runner_id})
+
+    gitlab_stub(
+        [web.put("/api/v4/runners/{id}", put_runner)],
+        lambda: gitlabapi.change_runners_tags(runners),
+    )
+    # 429 and 5xx are retried, 403 is not
+    assert attempts == {1: 2, 2: 3, 3: 4, 4: 1}
+    captured = capsys.readouterr().out
+    assert (
+        "Tags changed for 2 runners:\n  qa-01.01 (id: 1)\n  qa-01.02 (id: 2)"
+        in captured
+    )
+    assert (
+        "Tags NOT changed for 2 runners:\n  qa-02.01 (id: 3)\n  qa-02.02 (id: 4)"
+        in captured
+    )
@@ -0,0 +1,138 @@
+import time
+from unittest import mock
+
+import pytest
+import requests
+import responses
+from aiohttp import web
+
+from gitlab_cli_tool.models import Runner
+from gitlab_cli_tool.retry import RetryPolicy
+from gitlab_cli_tool.tests.conftest import URLS_FOR_PAGINATION
+
+ERROR_PAGE = "<html><body><h1>502 Bad Gateway</h1></body></html>"
+
+
+@pytest.fixture()
+def api(gitlabapi):
+    gitlabapi.retry_policy.backoff = 0
+    return gitlabapi
+
+
+def test_backoff_grows_exponentially_with_jitter():
+    policy = RetryPolicy(backoff=1, max_backoff=5)
+    delays = [
+        [policy.backoff_delay(attempt) for _ in range(200)] for attempt in range(4)
+    ]
+    for attempt, attempt_delays in enumerate(delays):
+        assert all(0 <= delay <= min(5, 2**attempt) for delay in attempt_delays)
+        # jittered, failed requests do not come back at the same time
+        assert len(set(attempt_delays)) > 1
+    assert max(delays[2]) > max(delays[0])
+
+
+def test_retries_stop_at_max_attempts_and_deadline():
+    policy = RetryPolicy(max_attempts=3, backoff=0, deadline=10)
+    started = time.monotonic()
+    assert policy.next_delay(0, started) == 0
+    assert policy.next_delay(1, started) == 0
+    assert policy.next_delay(2, started) is None
+    # Retry-After is respected, but not past the deadline
+    assert policy.next_delay(0, started, retry_after=5) == 5
+    assert policy.next_delay(0, started, retry_after=11) is None
+    assert policy.next_delay(0, started - 10) is None
+    assert policy.retries == 3
+
+
+@responses.activate
+def test_pagination_retries_error_page(api):
+    responses.add(responses.GET, URLS_FOR_PAGINATION[0], body=ERROR_PAGE, status=502)
+    responses.add(responses.GET, URLS_FOR_PAGINATION[0], json=[{"id": "1"}])
+    assert api.handle_pagination(URLS_FOR_PAGINATION[0]) == [{"id": "1"}]
+    assert len(responses.calls) == 2
+    assert api.retry_policy.retries == 1
+
+
+@responses.activate
+def test_pagination_raises_when_gitlab_keeps_failing(api):
+    responses.add(responses.GET, URLS_FOR_PAGINATION[0], body=ERROR_PAGE, status=502)
+    # error page has no Link header and no JSON, it is not taken for the last page
+    with pytest.raises(requests.HTTPError):
+        api.handle_pagination(URLS_FOR_PAGINATION[0])
+    assert len(responses.calls) == api.retry_policy.max_attempts
+
+
+@responses.activate
+def test_pagination_retries_connection_errors(api):
+    responses.add(
+        responses.GET,
+        URLS_FOR_PAGINATION[0],
+        body=requests.ConnectionError("Connection reset by peer"),
+    )
+    responses.add(responses.GET, URLS_FOR_PAGINATION[0], json=[{"id": "1"}])
+    assert api.handle_pagination(URLS_FOR_PAGINATION[0]) == [{"id": "1"}]
+
+
+@responses.activate
+def test_writes_are_not_retried(api):
+    url = "https://gitlab.server.com/api/v4/projects/1/trigger/pipeline"
+    responses.add(responses.POST, url, status=502)
+    assert api.session.post(url).status_code == 502
+    assert len(responses.calls) == 1
+
+
+def test_tags_of_runners_are_retried(api, gitlab_stub):
+    attempts = {}
+
+    async def get_runner(request):
+        runner_id = int(request.match_info["id"])
+        attempts[runner_id] = attempts.get(runner_id, 0) + 1
+        if attempts[runner_id] == 1:
+            return web.Response(text=ERROR_PAGE, status=502, content_type="text/html")
+        if runner_id == 2 and attempts[runner_id] == 2:
+            return web.json_response({}, status=503, headers={"Retry-After": "0"})
+        return web.json_response({"id": runner_id, "tag_list": [f"tag{runner_id}"]})
+
+    runners = [
+        Runner(
+            id=runner_id,
+            description=f"runner-{runner_id}",
+            ip_address="",
+            active=True,
+            is_shared=False,
+            name="",
+            online=True,
+            status="online",
+        )
+        for runner_id in (1, 2)
+    ]
+
+    api.runner_cache.refresh = True
+    api.runner_cache.save = mock.Mock()
+    runners_tags = gitlab_stub(
+        [web.get("/api/v4/runners/{id}", get_runner)],
+        lambda: api.assign_tags_to_runners(runners),
+    )
+    assert runners_tags == [["tag1"], ["tag2"]]
+    assert attempts == {1: 2, 2: 3}
+    assert api.retry_policy.retries == 3
+
+
+def test_get_project_raises_instead_of_returning_none(api):
+    api._gl = mock.Mock()
+    api._gl.projects.get.side_effect = TypeError("'NoneType' object is not iterable")
+    with pytest.raises(RuntimeError, match="Wrong Gitlab Credentials"):
+        api.get_project(1)
+
+
+def test_retries_are_shown_in_output(gitlabdatafilter):
+    def get_property_data():
+        gitlabdatafilter.api.retry_policy.retries += 2
+        return "table"
+
+    gitlabdatafilter.get_property_data = get_property_data
+    assert gitlabdatafilter.get_filtered_data() == (
+        "table\n2 requests to Gitlab sent again after transient errors"
+    )
+    gitlabdatafilter.get_property_data = lambda: "table"
+    assert gitlabdatafilter.get_filtered_data() == "table"
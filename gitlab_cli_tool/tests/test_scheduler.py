@@ -0,0 +1,97 @@
+import asyncio
+import time
+from email.utils import formatdate
+
+import requests
+import responses
+
+from gitlab_cli_tool.benchmarks import load
+from gitlab_cli_tool.scheduler import RateLimitScheduler, ScheduledAdapter
+
+
+def test_throttling_halves_concurrency_once_per_congestion():
+    scheduler = RateLimitScheduler(concurrency=8)
+    tickets = [scheduler.acquire() for _ in range(4)]
+    headers = {"Retry-After": "0"}
+    assert all(scheduler.observe(ticket, 429, headers) for ticket in tickets)
+    assert scheduler.concurrency == 4
+    assert scheduler.throttled == 4
+    for _ in tickets:
+        scheduler.release()
+    ticket = scheduler.acquire()
+    for _ in range(4):
+        assert not scheduler.observe(ticket, 200, {})
+    # additive increase, one slot per round of successful requests
+    assert scheduler.concurrency == 4 and scheduler.limit > 4.9
+    assert scheduler.observe(ticket, 429, headers)
+    assert scheduler.concurrency == 2
+
+
+def test_requests_wait_for_rate_limit_reset():
+    scheduler = RateLimitScheduler()
+    ticket = scheduler.acquire()
+    scheduler.observe(
+        ticket,
+        200,
+        {"RateLimit-Remaining": "1", "RateLimit-Reset": str(time.time() + 0.3)},
+    )
+    scheduler.release()
+    start = time.monotonic()
+    scheduler.acquire()
+    scheduler.release()
+    assert time.monotonic() - start < 0.1
+    # budget of the window is spent, next request waits for the reset
+    scheduler.acquire()
+    scheduler.release()
+    assert time.monotonic() - start >= 0.2
+    assert scheduler.remaining is None
+
+
+def test_waiting_requests_get_slots_in_order():
+    scheduler = RateLimitScheduler(concurrency=1)
+    started = []
+
+    async def request(number):
+        async with scheduler.slot_async():
+            started.append(number)
+            await asyncio.sleep(0.001)
+
+    async def run():
+        tasks = [asyncio.ensure_future(request(number)) for number in range(2)]
+        # cancelled while waiting, its place in the queue is not lost for others
+        cancelled = asyncio.ensure_future(request(-1))
+        tasks += [asyncio.ensure_future(request(number)) for number in range(2, 5)]
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+    assert started == [0, 1, 2, 3, 4]
+    assert scheduler.in_flight == 0 and not scheduler.waiters
+
+
+@responses.activate
+def test_throttled_request_is_sent_again():
+    url = "https://gitlab.server.com/api/v4/projects/1"
+    responses.add(responses.GET, url, status=429, headers={"Retry-After": "0"})
+    responses.add(responses.GET, url, json={"name": "project"})
+    scheduler = RateLimitScheduler()
+    session = requests.Session()
+    session.mount("https://", ScheduledAdapter(scheduler))
+    assert session.get(url).json() == {"name": "project"}
+    assert len(responses.calls) == 2
+    assert scheduler.throttled == 1
+
+
+def test_rate_limited_gitlab_is_not_tripped():
+    results = load.run_fleet(20, rate_limit=30)
+    assert [result.error for result in results] == [None] * len(load.SCENARIOS)
+    assert all(429 not in result.statuses for result in results)
+
+
+def test_retry_after_is_seconds_or_http_date():
+    assert RateLimitScheduler.retry_after({"Retry-After": "3"}) == 3
+    http_date = formatdate(time.time() + 30, usegmt=True)
+    assert 25 < RateLimitScheduler.retry_after({"Retry-After": http_date}) <= 30
+    assert RateLimitScheduler.retry_after({"Retry-After": "soon"}) is None
+    assert RateLimitScheduler.retry_after({}) is None
@@ -0,0 +1,81 @@
+import os
+import subprocess
+import sys
+from typing import Dict, Tuple
+
+import pytest
+
+from gitlab_cli_tool import __version__
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+NETWORK_MODULES = ("aiohttp", "requests", "gitlab", "tabulate")
+# cumulative import time of the one-shot CLI module in microseconds,
+# it takes ~15 ms without network libraries and ~250 ms with them, checked with GITLAB_CLI_BENCHMARKS=1
+STARTUP_BUDGET_US = 150000
+
+
+def run_with_import_times(*args) -> Tuple[subprocess.CompletedProcess, Dict[str, int]]:
+    """
+    :return: finished process and cumulative import time of every imported module
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=PROJECT_DIR,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+    )
+    import_times = {}
+    for line in completed.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        parts = line[len("import time:") :].split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            import_times[parts[2].strip()] = int(parts[1])
+    return completed, import_times
+
+
+def imported_network_modules(import_times: Dict[str, int]):
+    return {
+        module for module in import_times if module.split(".")[0] in NETWORK_MODULES
+    }
+
+
+def test_cli_module_does_not_import_network_libraries():
+    completed, import_times = run_with_import_times(
+        "-c", "import gitlab_cli_tool.gitlab_cli"
+    )
+    assert completed.returncode == 0, completed.stderr
+    assert imported_network_modules(import_times) == set()
+
+
+@pytest.mark.benchmark
+def test_cli_module_imports_within_budget():
+    completed, import_times = run_with_import_times(
+        "-c", "import gitlab_cli_tool.gitlab_cli"
+    )
+    assert completed.returncode == 0, completed.stderr
+    assert import_times["gitlab_cli_tool.gitlab_cli"] < STARTUP_BUDGET_US
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        ["--version"],
+        ["--help"],
+        ["runners", "list", "--tag", "atf", "--branch", "main"],
+    ],
+)
+def test_version_help_and_wrong_arguments_skip_network_libraries(args):
+    completed, import_times = run_with_import_times(
+        "-m", "gitlab_cli_tool.gitlab_cli", *args
+    )
+    assert completed.returncode == 0, completed.stderr
+    assert imported_network_modules(import_times) == set()
+    if args == ["--version"]:
+        assert completed.stdout.split()[-1] == __version__
+
+
+def test_repl_module_does_not_import_network_libraries():
+    completed, import_times = run_with_import_times("-c", "import gitlab_cli_tool.run")
+    assert completed.returncode == 0, completed.stderr
+    assert imported_network_modules(import_times) == set()
@@ -0,0 +1,63 @@
+import time
+
+import pytest
+
+from gitlab_cli_tool.benchmarks.micro import build_fleet
+from gitlab_cli_tool.filters import RunnerIndex, NameMatcher
+from gitlab_cli_tool.table import RunnerTable
+from gitlab_cli_tool.tests.conftest import ALL_INFO_RUNNERS
+
+FLEET_SIZE = 50000
+
+
+def test_table_round_trip_and_filters():
+    table = RunnerTable.from_runners(ALL_INFO_RUNNERS)
+    assert len(table) == 4
+    assert table.to_runners() == ALL_INFO_RUNNERS
+    assert list(table.tags) == ["tag-x1", "tag-x2", "tag-x3"]
+    assert table.rows_with_tags(["X3"]) == [2, 3]
+    assert table.rows_with_tags(["=tag-x2", "=tag-x"]) == [0, 1, 3]
+    assert table.rows_with_names(NameMatcher(["qa-02"])) == [2, 3]
+    assert table.rows_with_status("online") == [0, 1, 2, 3]
+    assert table.rows_with_status("paused") == []
+    assert table.take([3, 0]).to_runners() == [ALL_INFO_RUNNERS[3], ALL_INFO_RUNNERS[0]]
+
+
+def test_table_tag_queries_match_runner_index():
+    runners = build_fleet(3, max_tags=3)
+    runners[1].tag_list = ["ATF", "os-1"]
+    runners[2].tag_list = ["atf", "os-11", ""]
+    table = RunnerTable.from_runners(runners)
+    index = RunnerIndex(runners)
+    for query in ("=atf", "atf", "=os-1", "os-1", "", "=", "s-"):
+        assert table.rows_with_tags([query]) == [
+            runner.id for runner in index.filter(runners, [query])
+        ]
+
+
+def test_table_sort_and_aggregate():
+    table = RunnerTable.from_runners(build_fleet(30, max_tags=3))
+    assert table.sort("description", reverse=True)[:2] == [29, 28]
+    assert table.count_by("status") == {"online": 20, "offline": 10}
+    assert table.count_by("tag")["os-1"] == 5
+    assert table.count_by("active") == {1: 24, 0: 6}
+    assert table.total_active_jobs() == sum(i % 4 for i in range(30))
+    with pytest.raises(RuntimeError):
+        table.sort("colour")
+
+
+def test_table_50k_is_compact():
+    runners = build_fleet(FLEET_SIZE, max_tags=3)
+    table = RunnerTable.from_runners(runners)
+    assert table.nbytes() < 10 * 1024 * 1024
+    rows = table.rows_with_tags(["pool-7", "=os-3"])
+    index = RunnerIndex(runners)
+    assert [runners[row] for row in rows] == index.filter(runners, ["pool-7", "=os-3"])
+
+
+@pytest.mark.benchmark
+def test_table_50k_filters_in_milliseconds():
+    table = RunnerTable.from_runners(build_fleet(FLEET_SIZE, max_tags=3))
+    start = time.perf_counter()
+    table.rows_with_tags(["pool-7", "=os-3"])
+    assert time.perf_counter() - start < 0.1
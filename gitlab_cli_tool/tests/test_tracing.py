@@ -0,0 +1,114 @@
+import json
+import os
+from unittest import mock
+
+import pytest
+
+from gitlab_cli_tool import tracing
+from gitlab_cli_tool.benchmarks.cli import gitlab_home
+from gitlab_cli_tool.benchmarks.mock_gitlab import MockGitlab
+from gitlab_cli_tool.gitlab_cli import GitLabCLI
+from gitlab_cli_tool.timings import FILTER, RENDER
+from gitlab_cli_tool.tracing import Span, Tracer
+
+
+def make_span(
+    url="https://gitlab.server.com/api/v4/runners/1", status=200, duration=0.01
+):
+    return Span(
+        name=tracing.endpoint("GET", url),
+        client="aiohttp",
+        method="GET",
+        url=url,
+        status=status,
+        bytes=100,
+        start_ns=0,
+        duration=duration,
+    )
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("https://gitlab.server.com/api/v4/runners/278", "GET /api/v4/runners/:id"),
+        (
+            "https://gitlab.server.com/api/v4/projects/1/runners?per_page=100&page=2",
+            "GET /api/v4/projects/:id/runners",
+        ),
+        ("https://gitlab.server.com", "GET /"),
+    ],
+)
+def test_endpoint(url, expected):
+    assert tracing.endpoint("GET", url) == expected
+
+
+def test_request_after_failed_one_is_retry():
+    tracer = Tracer()
+    tracer.start()
+    tracer.record(make_span(status=502))
+    tracer.record(make_span(status=429))
+    tracer.record(make_span())
+    tracer.record(make_span("https://gitlab.server.com/api/v4/runners/2"))
+    spans = tracer.stop()
+    assert [span.attempt for span in spans] == [0, 1, 2, 0]
+    assert not tracer.enabled and tracer.spans == []
+
+
+def test_profile_report():
+    spans = [make_span(duration=duration / 1000) for duration in range(1, 101)]
+    spans[0].status = 502
+    spans[1].attempt = 1
+    report = tracing.profile_report(spans, {FILTER: 0.002, RENDER: 0.0105})
+    row = report.splitlines()[2].split()
+    # calls, failed, retries, KB, p50, p95, max
+    assert row[3:] == ["100", "1", "1", "9.8", "50", "95", "100"]
+    assert report.splitlines()[-1] == (
+        "100 requests, 1 retries, filtering 2.0 ms, tabulate 10.5 ms"
+    )
+
+
+@pytest.mark.parametrize("trace_format", tracing.TRACE_FORMATS)
+def test_dump(tmp_path, trace_format):
+    filepath = str(tmp_path / "spans.json")
+    tracing.dump([make_span(status=502)], filepath, trace_format)
+    with open(filepath) as f:
+        data = json.load(f)
+    if trace_format == "json":
+        assert data[0]["status"] == 502
+    else:
+        span = data["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+        assert span["name"] == "GET /api/v4/runners/:id"
+        assert span["endTimeUnixNano"] == "10000000"
+        assert span["status"] == {"code": tracing.OTLP_STATUS_ERROR}
+        assert {
+            "key": "http.response.status_code",
+            "value": {"intValue": "502"},
+        } in span["attributes"]
+
+
+def test_profile_of_command_against_gitlab(tmp_path):
+    trace_file = str(tmp_path / "spans.json")
+    with MockGitlab(runners_count=150) as server, gitlab_home(server) as home:
+        with mock.patch.dict(os.environ, {"HOME": home}):
+            cli = GitLabCLI()
+            try:
+                output = cli.get_result(
+                    [
+                        "runners",
+                        "list",
+                        "--tag",
+                        "atf",
+                        "--profile",
+                        "--trace",
+                        trace_file,
+                    ]
+                )
+            finally:
+                cli.close()
+    assert "GET /api/v4/projects/:id/runners  requests        2" in output
+    assert "GET /api/v4/runners/:id           aiohttp       150" in output
+    assert output.splitlines()[-1].startswith("154 requests, 0 retries")
+    with open(trace_file) as f:
+        spans = json.load(f)
+    assert len(spans) == sum(server.requests.values()) == 154
+    assert not tracing.tracer.enabled
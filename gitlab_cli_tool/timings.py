@@ -0,0 +1,37 @@
+"""
+Wall time of phases of a command (import, secrets, http, filter, render),
+read by benchmarks, e.g. gitlab_cli_tool.benchmarks.cli
+"""
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+IMPORT = "import"
+SECRETS = "secrets"
+HTTP = "http"
+FILTER = "filter"
+RENDER = "render"
+
+
+class PhaseTimer:
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+    def reset(self) -> Dict[str, float]:
+        """
+        :return: seconds spent in every phase since the previous reset
+        """
+        phases, self.phases = self.phases, {}
+        return phases
+
+
+timer = PhaseTimer()
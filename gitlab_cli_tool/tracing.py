@@ -0,0 +1,289 @@
+"""
+Spans of HTTP requests sent to Gitlab by requests (also python-gitlab, which shares
+the session of GitlabAPI) and aiohttp, recorded while tracer is started, e.g. by --profile.
+Latency of a request is the time until its response headers arrive.
+"""
+import json
+import math
+import os
+import re
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Tuple
+
+from tabulate import tabulate
+
+from gitlab_cli_tool import __version__
+from gitlab_cli_tool.timings import FILTER, RENDER
+
+ID_SEGMENT_REGEX = re.compile(r"/\d+(?=/|$)")
+ERROR_STATUSES = (429, 500, 502, 503, 504)
+TRACE_FORMATS = ("json", "otlp")
+# https://opentelemetry.io/docs/specs/otel/trace/api/#spankind
+OTLP_SPAN_KIND_CLIENT = 3
+OTLP_STATUS_ERROR = 2
+
+
+@dataclass
+class Span:
+    name: str  # method and endpoint with ids replaced, e.g. GET /api/v4/runners/:id
+    client: str  # requests, python-gitlab or aiohttp
+    method: str
+    url: str
+    status: int  # 0 if no response came
+    bytes: int  # body as sent by Gitlab, compressed if it was compressed
+    start_ns: int  # unix time
+    duration: float  # seconds
+    attempt: int = 0  # 0 for first request, then number of the retry
+    error: Optional[str] = None
+
+    @property
+    def failed(self) -> bool:
+        return self.error is not None or self.status in ERROR_STATUSES
+
+
+def endpoint(method: str, url: str) -> str:
+    path = url.split("://", 1)[-1].split("?", 1)[0]
+    path = path[path.find("/") :] if "/" in path else "/"
+    return f"{method} {ID_SEGMENT_REGEX.sub('/:id', path)}"
+
+
+class Tracer:
+    """
+    Request to the same url after a failed one is counted as its retry
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.spans: List[Span] = []
+        self.failures: Dict[Tuple[str, str], int] = {}
+
+    def start(self):
+        self.enabled = True
+        self.spans = []
+        self.failures = {}
+
+    def stop(self) -> List[Span]:
+        self.enabled = False
+        spans, self.spans = self.spans, []
+        return spans
+
+    def record(self, span: Span) -> Span:
+        key = (span.method, span.url)
+        span.attempt = self.failures.get(key, 0)
+        if span.failed:
+            self.failures[key] = span.attempt + 1
+        # list.append is atomic, pages are fetched from many threads
+        self.spans.append(span)
+        return span
+
+    def requests_hook(self, response, *args, **kwargs):
+        """
+        Response hook of requests.Session
+        """
+        if self.enabled:
+            request = response.request
+            client = (
+                "python-gitlab"
+                if request.headers.get("User-Agent", "").startswith("python-gitlab")
+                else "requests"
+            )
+            duration = response.elapsed.total_seconds()
+            content_length = response.headers.get("Content-Length")
+            self.record(
+                Span(
+                    name=endpoint(request.method, request.url),
+                    client=client,
+                    method=request.method,
+                    url=request.url,
+                    status=response.status_code,
+                    bytes=int(content_length)
+                    if content_length
+                    else len(response.content),
+                    start_ns=time.time_ns() - int(duration * 1e9),
+                    duration=duration,
+                )
+            )
+        return response
+
+    def aiohttp_trace_config(self):
+        """
+        :return: aiohttp.TraceConfig recording spans of requests of a ClientSession
+        """
+        from aiohttp import TraceConfig
+
+        async def on_request_start(session, context, params):
+            context.start = time.perf_counter()
+            context.start_ns = time.time_ns()
+            context.span = None
+
+        def make_span(context, params, status: int, bytes: int, error=None) -> Span:
+            url = str(params.url)
+            return Span(
+                name=endpoint(params.method, url),
+                client="aiohttp",
+                method=params.method,
+                url=url,
+                status=status,
+                bytes=bytes,
+                start_ns=context.start_ns,
+                duration=time.perf_counter() - context.start,
+                error=error,
+            )
+
+        async def on_request_end(session, context, params):
+            if self.enabled:
+                content_length = params.response.headers.get("Content-Length")
+                context.span = self.record(
+                    make_span(
+                        context,
+                        params,
+                        params.response.status,
+                        int(content_length) if content_length else 0,
+                    )
+                )
+                context.count_chunks = content_length is None
+
+        async def on_response_chunk_received(session, context, params):
+            # chunked body, its size is known only when it is read
+            if context.span is not None and context.count_chunks:
+                context.span.bytes += len(params.chunk)
+
+        async def on_request_exception(session, context, params):
+            if self.enabled:
+                self.record(
+                    make_span(context, params, 0, 0, type(params.exception).__name__)
+                )
+
+        trace_config = TraceConfig()
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_request_end.append(on_request_end)
+        trace_config.on_response_chunk_received.append(on_response_chunk_received)
+        trace_config.on_request_exception.append(on_request_exception)
+        return trace_config
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """
+    Nearest-rank percentile of sorted values
+    """
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+
+def profile_report(spans: List[Span], phases: Dict[str, float]) -> str:
+    """
+    :param spans: requests of the command
+    :param phases: seconds spent in phases of the command, see timings
+    :return: calls, retries and latency per endpoint and time of filtering and rendering
+    """
+    by_endpoint: Dict[Tuple[str, str], List[Span]] = {}
+    for span in spans:
+        by_endpoint.setdefault((span.name, span.client), []).append(span)
+    rows = []
+    for (name, client), endpoint_spans in sorted(by_endpoint.items()):
+        latencies = sorted(span.duration * 1000 for span in endpoint_spans)
+        rows.append(
+            [
+                name,
+                client,
+                len(endpoint_spans),
+                sum(span.failed for span in endpoint_spans),
+                sum(span.attempt > 0 for span in endpoint_spans),
+                round(sum(span.bytes for span in endpoint_spans) / 1024, 1),
+                round(percentile(latencies, 0.5), 1),
+                round(percentile(latencies, 0.95), 1),
+                round(latencies[-1], 1),
+            ]
+        )
+    table = tabulate(
+        rows,
+        [
+            "ENDPOINT",
+            "CLIENT",
+            "CALLS",
+            "FAILED",
+            "RETRIES",
+            "KB",
+            "P50 MS",
+            "P95 MS",
+            "MAX MS",
+        ],
+    )
+    summary = (
+        f"{len(spans)} requests, {sum(span.attempt > 0 for span in spans)} retries, "
+        f"filtering {phases.get(FILTER, 0.0) * 1000:.1f} ms, "
+        f"tabulate {phases.get(RENDER, 0.0) * 1000:.1f} ms"
+    )
+    return f"{table}\n{summary}" if spans else summary
+
+
+def otlp_attribute(key: str, value) -> Dict:
+    if isinstance(value, bool) or not isinstance(value, int):
+        return {"key": key, "value": {"stringValue": str(value)}}
+    # OTLP JSON encodes 64 bit integers as strings
+    return {"key": key, "value": {"intValue": str(value)}}
+
+
+def to_otlp(spans: List[Span]) -> Dict:
+    """
+    Spans of one command as one trace in OTLP JSON, e.g. for an OpenTelemetry collector
+    """
+    trace_id = os.urandom(16).hex()
+    otlp_spans = []
+    for span in spans:
+        attributes = [
+            otlp_attribute("http.request.method", span.method),
+            otlp_attribute("url.full", span.url),
+            otlp_attribute("http.response.body.size", span.bytes),
+            otlp_attribute("http.request.resend_count", span.attempt),
+            otlp_attribute("gitlab_cli.client", span.client),
+        ]
+        if span.status:
+            attributes.append(otlp_attribute("http.response.status_code", span.status))
+        if span.error:
+            attributes.append(otlp_attribute("error.type", span.error))
+        otlp_spans.append(
+            {
+                "traceId": trace_id,
+                "spanId": os.urandom(8).hex(),
+                "name": span.name,
+                "kind": OTLP_SPAN_KIND_CLIENT,
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.start_ns + int(span.duration * 1e9)),
+                "attributes": attributes,
+                "status": {"code": OTLP_STATUS_ERROR} if span.failed else {},
+            }
+        )
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": [otlp_attribute("service.name", "gitlab-cli")]
+                },
+                "scopeSpans": [
+                    {
+                        "scope": {"name": "gitlab_cli_tool", "version": __version__},
+                        "spans": otlp_spans,
+                    }
+                ],
+            }
+        ]
+    }
+
+
+def dump(spans: List[Span], filepath: str, trace_format: str = "json"):
+    """
+    :param trace_format: json (list of spans) or otlp (OpenTelemetry OTLP JSON)
+    """
+    if trace_format not in TRACE_FORMATS:
+        raise RuntimeError(
+            f"Wrong trace format {trace_format}, use one of {TRACE_FORMATS}"
+        )
+    data = (
+        to_otlp(spans) if trace_format == "otlp" else [asdict(span) for span in spans]
+    )
+    with open(filepath, "w") as f:
+        json.dump(data, f, indent=2)
+
+
+tracer = Tracer()